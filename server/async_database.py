@@ -0,0 +1,252 @@
+"""
+Couche d'accès asynchrone à PostgreSQL (asyncpg)
+Miroir d'OptimizedDatabase.execute_query / execute_prepared : les lectures
+indépendantes partent en parallèle sur un pool asyncpg au lieu de
+s'enchaîner sur une connexion psycopg2.
+
+Le pool vit dans une boucle asyncio dédiée (thread démon) : les coroutines
+peuvent être attendues depuis n'importe quelle boucle (route Flask async,
+application ASGI) et le code synchrone passe par run() ou fetch_many().
+Sans asyncpg, ou si une lecture asynchrone échoue, fetch_many() retombe sur
+l'API synchrone.
+
+Le pool asyncpg s'ajoute au pool psycopg2 d'optimized_db, qui reste le moteur
+de toutes les écritures : il est volontairement petit (ASYNC_DB_POOL_MAX, 4
+par défaut) et ne sert qu'aux lectures parallèles. Un worker ouvre au plus
+DB_POOL_MAX + ASYNC_DB_POOL_MAX connexions, à prévoir dans max_connections
+de PostgreSQL (multiplié par le nombre de workers).
+"""
+
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+
+from config import Config
+from optimized_database import optimized_db
+from performance_monitor import performance_monitor
+from prepared_statements import PREPARED_QUERIES
+import logging
+
+try:
+    import asyncpg
+    ASYNCPG_AVAILABLE = True
+except ImportError:
+    ASYNCPG_AVAILABLE = False
+
+# Erreurs qui justifient une nouvelle tentative (connexion perdue ou pool saturé)
+if ASYNCPG_AVAILABLE:
+    CONNECTION_ERRORS = (OSError, asyncio.TimeoutError, asyncpg.PostgresConnectionError, asyncpg.InterfaceError)
+else:
+    CONNECTION_ERRORS = (OSError, asyncio.TimeoutError)
+
+logger = logging.getLogger(__name__)
+
+_PLACEHOLDER = re.compile(r"%%|%s")
+
+def to_asyncpg_query(query: str) -> str:
+    """Convertir les paramètres psycopg2 (%s) en paramètres numérotés ($1, $2, ...)"""
+    counter = iter(range(1, query.count('%s') + 1))
+    return _PLACEHOLDER.sub(lambda m: '%' if m.group() == '%%' else f"${next(counter)}", query)
+
+class AsyncDatabase:
+    """Accès asynchrone à la base, pool asyncpg ouvert à la première requête"""
+
+    def __init__(self, dsn: Optional[str] = None, min_connections=None, max_connections=None, fallback=None):
+        self.dsn = dsn or Config.DATABASE_URL
+        self.min_connections = min_connections or Config.ASYNC_DB_POOL_MIN
+        self.max_connections = max_connections or Config.ASYNC_DB_POOL_MAX
+        self.max_retries = 3
+        self.retry_backoff = Config.DB_RETRY_BACKOFF
+        self.fallback = fallback  # Base synchrone (OptimizedDatabase) utilisée sans asyncpg
+        self.loop = None
+        self.thread = None
+        self.pool = None
+        self.pool_lock = None  # asyncio.Lock, créé dans la boucle du pool
+        self.lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return ASYNCPG_AVAILABLE
+
+    # ------------------------------------------------------------------
+    # Boucle et pool
+    # ------------------------------------------------------------------
+
+    def _ensure_loop(self):
+        with self.lock:
+            if self.loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name='async-database', daemon=True)
+                thread.start()
+                self.loop, self.thread = loop, thread
+            return self.loop
+
+    async def _get_pool(self):
+        if not ASYNCPG_AVAILABLE:
+            raise RuntimeError("asyncpg n'est pas installé")
+        if self.pool is None:
+            if self.pool_lock is None:
+                self.pool_lock = asyncio.Lock()
+            async with self.pool_lock:
+                if self.pool is None:
+                    self.pool = await asyncpg.create_pool(
+                        self.dsn,
+                        min_size=self.min_connections,
+                        max_size=self.max_connections,
+                        max_inactive_connection_lifetime=Config.DB_POOL_MAX_IDLE,
+                        init=self._init_connection
+                    )
+                    print("Pool de connexions asynchrone initialisé avec succès")
+        return self.pool
+
+    @staticmethod
+    async def _init_connection(conn) -> None:
+        # JSON/JSONB décodés en dict, comme avec psycopg2
+        for type_name in ('json', 'jsonb'):
+            await conn.set_type_codec(type_name, encoder=json.dumps, decoder=json.loads, schema='pg_catalog')
+
+    async def _call(self, coro):
+        """Exécuter coro dans la boucle du pool, quelle que soit la boucle appelante"""
+        loop = self._ensure_loop()
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            return await coro
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+    def run(self, coro, timeout: Optional[float] = None):
+        """Pont synchrone : attendre le résultat d'une coroutine depuis un thread (route Flask)"""
+        loop = self._ensure_loop()
+        if threading.current_thread() is self.thread:
+            coro.close()
+            raise RuntimeError("run() ne peut pas être appelé depuis la boucle du pool")
+        return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
+
+    # ------------------------------------------------------------------
+    # Requêtes
+    # ------------------------------------------------------------------
+
+    async def execute_query(self, query: str, params: Sequence = None, fetch_one: bool = False,
+                            fetch_all: bool = False):
+        """Miroir asynchrone d'OptimizedDatabase.execute_query (paramètres %s)"""
+        return await self._call(self._execute(query, to_asyncpg_query(query), params or (), fetch_one, fetch_all))
+
+    async def execute_prepared(self, name: str, params: Sequence = (), fetch_one: bool = False,
+                               fetch_all: bool = False):
+        """Requête du registre PREPARED_QUERIES (asyncpg prépare et met en cache par connexion)"""
+        if name not in PREPARED_QUERIES:
+            raise KeyError(f"Requête préparée inconnue: {name}")
+        return await self._call(self._execute(f"EXECUTE {name}", PREPARED_QUERIES[name], params,
+                                              fetch_one, fetch_all))
+
+    async def gather(self, *coros) -> List:
+        """Attendre plusieurs requêtes lancées en parallèle (ordre des résultats conservé)"""
+        return list(await asyncio.gather(*coros))
+
+    async def _execute(self, label: str, sql: str, params: Sequence, fetch_one: bool, fetch_all: bool):
+        """Exécuter sql avec nouvelles tentatives ; durée transmise à performance_monitor
+
+        Lève l'exception d'origine pour une erreur non liée à la connexion, et
+        la dernière erreur de connexion une fois les tentatives épuisées : un
+        échec ne se confond pas avec une absence de lignes.
+        """
+        retries = self.max_retries
+
+        for attempt in range(retries):
+            success = False
+            start_time = time.perf_counter()
+            try:
+                pool = await self._get_pool()
+                async with pool.acquire(timeout=Config.DB_POOL_TIMEOUT) as conn:
+                    if fetch_one:
+                        row = await conn.fetchrow(sql, *params)
+                        result = dict(row) if row else None
+                    elif fetch_all:
+                        result = [dict(row) for row in await conn.fetch(sql, *params)]
+                    else:
+                        # Statut de commande ("UPDATE 3") -> nombre de lignes, comme cursor.rowcount
+                        count = (await conn.execute(sql, *params)).split()[-1]
+                        result = int(count) if count.isdigit() else -1
+                    success = True
+                    return result
+
+            except CONNECTION_ERRORS as e:
+                print(f"Erreur de connexion asynchrone (tentative {attempt + 1}/{retries}): {e}")
+                if attempt == retries - 1:
+                    raise
+
+            except Exception as e:
+                print(f"Erreur lors de l'exécution de la requête asynchrone: {e}")
+                raise
+            finally:
+                performance_monitor.record_database_query(label, time.perf_counter() - start_time, success)
+
+            delay = min(self.retry_backoff * (2 ** attempt), 2.0)
+            await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+
+    def fetch_many(self, calls: Iterable[Tuple[str, Sequence]], fetch_one: bool = False,
+                   fetch_all: bool = False) -> List[Any]:
+        """Exécuter en parallèle des lectures indépendantes depuis du code synchrone
+
+        calls : (nom du registre PREPARED_QUERIES ou SQL %s, paramètres).
+        Résultats dans l'ordre des appels ; exécution séquentielle par la base
+        synchrone si asyncpg est absent ou si une lecture asynchrone échoue
+        (base, connexion ou boucle).
+        """
+        calls = list(calls)
+        if not calls:
+            return []
+
+        if ASYNCPG_AVAILABLE:
+            try:
+                return self.run(self.gather(*[
+                    self.execute_prepared(query, params, fetch_one, fetch_all) if query in PREPARED_QUERIES
+                    else self.execute_query(query, params, fetch_one, fetch_all)
+                    for query, params in calls
+                ]))
+            except Exception as e:
+                logger.warning(f"Lectures asynchrones indisponibles, repli synchrone: {e}")
+
+        if self.fallback is None:
+            return [None] * len(calls)
+        return [
+            self.fallback.execute_prepared(query, tuple(params), fetch_one, fetch_all) if query in PREPARED_QUERIES
+            else self.fallback.execute_query(query, tuple(params) if params else None, fetch_one, fetch_all)
+            for query, params in calls
+        ]
+
+    def get_pool_stats(self) -> dict:
+        """Métriques du pool asyncpg (vide tant qu'il n'est pas ouvert)"""
+        if self.pool is None:
+            return {}
+        return {
+            'size': self.pool.get_size(),
+            'idle': self.pool.get_idle_size(),
+            'min_connections': self.pool.get_min_size(),
+            'max_connections': self.pool.get_max_size()
+        }
+
+    def close(self) -> None:
+        """Fermer le pool et arrêter la boucle"""
+        if self.loop is None:
+            return
+        if self.pool is not None:
+            try:
+                self.run(self.pool.close(), timeout=10)
+            except Exception as e:
+                print(f"Erreur lors de la fermeture du pool asynchrone: {e}")
+            self.pool = None
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=5)
+        if not self.thread.is_alive():
+            self.loop.close()
+        self.loop, self.thread, self.pool_lock = None, None, None
+
+# Instance globale ; repli synchrone sur optimized_db
+async_db = AsyncDatabase(fallback=optimized_db)
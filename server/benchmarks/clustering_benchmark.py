@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark du clustering de documents : calcul paire par paire vs TF-IDF corpus
+Compare le temps de calcul de la matrice de similarité pour 1k, 5k et 20k documents
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sklearn.base import clone
+from services.document_clustering_service import DocumentClusteringService
+
+VOCABULARY = [
+    'attaque', 'menace', 'réseau', 'intrusion', 'malware', 'frontière', 'convoi',
+    'satellite', 'communication', 'chiffrement', 'exfiltration', 'milice', 'patrouille',
+    'rançongiciel', 'banque', 'élection', 'manifestation', 'infrastructure', 'critique',
+    'surveillance', 'agent', 'terrain', 'alerte', 'urgence', 'serveur', 'données'
+]
+SOURCES = ['SIGINT', 'HUMINT', 'OSINT', 'COMINT', 'IMINT']
+TYPES = ['THREAT', 'REPORT', 'ALERT']
+ENTITIES = ['Bamako', 'Gao', 'Tombouctou', 'Kidal', 'Mopti', 'APT29', 'Lazarus']
+
+def print_header(text):
+    print(f"\n{'='*60}")
+    print(f"  {text}")
+    print(f"{'='*60}")
+
+def generate_documents(count: int, seed: int = 42):
+    """Générer un corpus synthétique reproductible"""
+    rng = random.Random(seed)
+    # Chaque thème combine quelques mots pour obtenir des groupes de documents proches
+    topics = [rng.sample(VOCABULARY, 6) for _ in range(max(count // 20, 1))]
+    documents = []
+    for i in range(count):
+        topic = rng.choice(topics)
+        words = rng.choices(topic, k=rng.randint(15, 40)) + rng.choices(VOCABULARY, k=rng.randint(2, 8))
+        documents.append({
+            'id': str(i),
+            'content': ' '.join(words),
+            'source': rng.choice(SOURCES),
+            'type': rng.choice(TYPES),
+            'created_at': f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T10:00:00",
+            'entities': [{'text': name, 'type': 'LOCATION'} for name in rng.sample(ENTITIES, rng.randint(0, 3))]
+        })
+    return documents
+
+def benchmark_pairwise(documents, sample_pairs: int, seed: int = 42):
+    """Mesurer le coût par paire de l'ancien calcul et l'extrapoler à n(n-1)/2 paires
+
+    Les bornes min_df=2/max_df=0.8 du vectoriseur de production rejettent un
+    corpus de deux documents ; on les relâche pour mesurer le coût d'un fit par paire.
+    """
+    service = DocumentClusteringService()
+    service.vectorizer = clone(service.vectorizer).set_params(min_df=1, max_df=1.0)
+
+    n_docs = len(documents)
+    total_pairs = n_docs * (n_docs - 1) // 2
+    rng = random.Random(seed)
+
+    pairs = min(sample_pairs, total_pairs)
+    start = time.perf_counter()
+    for _ in range(pairs):
+        i, j = rng.sample(range(n_docs), 2)
+        service.calculate_document_similarity(documents[i], documents[j])
+    elapsed = time.perf_counter() - start
+
+    return elapsed / pairs * total_pairs
+
+def benchmark_corpus(documents):
+    """Mesurer le nouveau calcul : un seul fit TF-IDF et produits matriciels par blocs"""
+    service = DocumentClusteringService()
+
+    start = time.perf_counter()
+    similarity_matrix = service.compute_similarity_matrix(documents)
+    matrix_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    clusters = service._hierarchical_clustering(documents, similarity_matrix)
+    clustering_time = time.perf_counter() - start
+
+    return matrix_time, clustering_time, len(clusters)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 5000, 20000])
+    parser.add_argument('--sample-pairs', type=int, default=2000,
+                        help="Nombre de paires mesurées pour extrapoler l'ancien calcul")
+    args = parser.parse_args()
+
+    print_header("BENCHMARK CLUSTERING DE DOCUMENTS")
+    print(f"{'Documents':>10} | {'Paire/paire (est.)':>18} | {'Corpus':>10} | {'Clustering':>10} | {'Gain':>8}")
+
+    for size in args.sizes:
+        documents = generate_documents(size)
+        pairwise_time = benchmark_pairwise(documents, args.sample_pairs)
+        matrix_time, clustering_time, clusters_found = benchmark_corpus(documents)
+        corpus_time = matrix_time + clustering_time
+
+        print(f"{size:>10} | {pairwise_time:>17.1f}s | {matrix_time:>9.2f}s | {clustering_time:>9.2f}s | "
+              f"{pairwise_time / corpus_time:>7.0f}x  ({clusters_found} clusters)")
+
+if __name__ == "__main__":
+    main()
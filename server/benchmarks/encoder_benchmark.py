@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark de l'encodeur BERT partagé : documents/seconde selon la taille des micro-lots
+Compare l'ancienne boucle document par document (lot de 1, sans padding) et
+TextEncoder.encode avec padding dynamique et lots triés par longueur
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+
+from models.model_registry import configure_torch_threads, get_text_encoder, model_registry
+
+VOCABULARY = [
+    'attaque', 'menace', 'réseau', 'intrusion', 'malware', 'frontière', 'convoi',
+    'satellite', 'communication', 'chiffrement', 'exfiltration', 'milice', 'patrouille',
+    'rançongiciel', 'banque', 'élection', 'manifestation', 'infrastructure', 'critique',
+    'surveillance', 'agent', 'terrain', 'alerte', 'urgence', 'serveur', 'données'
+]
+
+def print_header(text):
+    print(f"\n{'='*60}")
+    print(f"  {text}")
+    print(f"{'='*60}")
+
+def generate_texts(count: int, seed: int = 42):
+    """Textes de longueurs variées (10 à 300 mots) pour exercer le padding"""
+    rng = random.Random(seed)
+    return [' '.join(rng.choices(VOCABULARY, k=rng.randint(10, 300))) for _ in range(count)]
+
+def benchmark_loop(encoder, texts):
+    """Ancien chemin : un forward par document puis moyenne sur tous les tokens"""
+    start = time.perf_counter()
+    with torch.inference_mode():
+        for text in texts:
+            inputs = encoder.tokenize(text, return_tensors='pt', max_length=512, truncation=True)
+            encoder.model(**inputs).last_hidden_state.mean(dim=1)
+    return time.perf_counter() - start
+
+def benchmark_batched(encoder, texts, batch_size: int):
+    start = time.perf_counter()
+    encoder.encode(texts, batch_size=batch_size)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--documents', type=int, default=256)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 4, 8, 16, 32, 64])
+    parser.add_argument('--model', default=None, help="Identifiant de l'encodeur (ML_ENCODER_MODEL par défaut)")
+    args = parser.parse_args()
+
+    threads = configure_torch_threads()
+    encoder = get_text_encoder(args.model)
+    texts = generate_texts(args.documents)
+    encoder.encode(texts[:8])  # Préchauffage (allocations, caches)
+
+    print_header("BENCHMARK ENCODEUR (INFÉRENCE PAR MICRO-LOTS)")
+    print(f"Modèle: {encoder.model_id} | threads torch: {threads} | documents: {len(texts)}")
+    print(f"Chargement: {model_registry.get_stats()[f'encoder:{encoder.model_id}']['load_time']}s")
+    print(f"{'Lot':>10} | {'Durée':>9} | {'Docs/s':>9} | {'Gain':>7}")
+
+    loop_time = benchmark_loop(encoder, texts)
+    print(f"{'boucle':>10} | {loop_time:>8.2f}s | {len(texts) / loop_time:>9.1f} | {1:>6.1f}x")
+
+    for batch_size in args.batch_sizes:
+        elapsed = benchmark_batched(encoder, texts, batch_size)
+        print(f"{batch_size:>10} | {elapsed:>8.2f}s | {len(texts) / elapsed:>9.1f} | {loop_time / elapsed:>6.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Rapport de parité des modèles exportés (TorchScript et ONNX)
+Sauvegarde les trois modèles du moteur deep learning dans un répertoire
+temporaire, recharge le moteur avec chaque runtime et affiche l'écart maximal
+au mode eager par cas (lots de tailles et de longueurs variées, padding compris) ;
+les assertions correspondantes sont dans test_model_export.py
+
+Usage: python benchmarks/export_parity.py [--atol 1e-4] [--rtol 1e-3]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import torch
+    TORCH_AVAILABLE = True
+except ImportError:
+    TORCH_AVAILABLE = False
+
+def print_header(text):
+    print(f"\n{'='*60}")
+    print(f"  {text}")
+    print(f"{'='*60}")
+
+def attention_inputs(lengths, dim=768, seed=0):
+    """Séquences d'embeddings paddées (steps, batch, dim) et masque (batch, steps)"""
+    generator = torch.Generator().manual_seed(seed)
+    steps = max(lengths)
+    embeddings = torch.zeros(steps, len(lengths), dim)
+    padding_mask = torch.ones(len(lengths), steps, dtype=torch.bool)
+    for i, length in enumerate(lengths):
+        embeddings[:length, i] = torch.randn(length, dim, generator=generator)
+        padding_mask[i, :length] = False
+    return embeddings, padding_mask
+
+def parity_cases():
+    """(modèle, description, entrées) : lot unitaire, lots plus grands que ceux du traçage"""
+    generator = torch.Generator().manual_seed(42)
+    return [
+        ('lstm', "1 séquence x 10 pas", (torch.rand(1, 10, 10, generator=generator),)),
+        ('lstm', "32 séquences x 3 pas", (torch.rand(32, 3, 10, generator=generator),)),
+        ('autoencoder', "1 menace", (torch.rand(1, 50, generator=generator),)),
+        ('autoencoder', "64 menaces", (torch.rand(64, 50, generator=generator),)),
+        ('attention', "1 document, sans padding", attention_inputs([1])),
+        ('attention', "4 séquences de 6 documents", attention_inputs([6, 6, 6, 6], seed=1)),
+        ('attention', "8 séquences paddées (1 à 12)", attention_inputs([12, 1, 5, 7, 12, 3, 9, 2], seed=2)),
+    ]
+
+def check_runtime(engine_class, runtime, model_path, reference, atol, rtol):
+    engine = engine_class(model_path, runtime=runtime)
+    success = True
+    for (model, description, inputs), expected in zip(parity_cases(), reference):
+        runner = engine.runners[model]
+        if runner is engine._eager_modules()[model]:
+            print(f"✗ {runtime:<12} {model:<12} graphe non chargé (repli eager)")
+            success = False
+            break
+        with torch.inference_mode():
+            output = runner(*inputs)
+        max_error = (output - expected).abs().max().item()
+        if torch.allclose(output, expected, atol=atol, rtol=rtol):
+            print(f"✓ {runtime:<12} {model:<12} {description:<32} écart max {max_error:.2e}")
+        else:
+            print(f"✗ {runtime:<12} {model:<12} {description:<32} écart max {max_error:.2e}")
+            success = False
+    return success
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--atol', type=float, default=1e-4)
+    parser.add_argument('--rtol', type=float, default=1e-3)
+    args = parser.parse_args()
+
+    print_header("Parité des modèles exportés")
+    if not TORCH_AVAILABLE:
+        print("- torch non installé, parité des modèles exportés non vérifiée")
+        return 0
+
+    from models.deep_learning_models import DeepLearningThreatEngine
+    from models.model_export import ONNXRUNTIME_AVAILABLE
+
+    torch.manual_seed(0)
+    with tempfile.TemporaryDirectory() as model_path:
+        engine = DeepLearningThreatEngine(model_path, runtime='eager')
+        engine.save_models()
+        with torch.inference_mode():
+            reference = [engine.runners[model](*inputs) for model, _, inputs in parity_cases()]
+
+        success = check_runtime(DeepLearningThreatEngine, 'torchscript', model_path, reference, args.atol, args.rtol)
+        if ONNXRUNTIME_AVAILABLE:
+            success = check_runtime(DeepLearningThreatEngine, 'onnx', model_path, reference, args.atol, args.rtol) and success
+        else:
+            print("- onnx         onnxruntime non installé, parité ONNX non vérifiée")
+
+    print_header("Résultat: " + ("sorties identiques à la tolérance près" if success else "écart détecté"))
+    return 0 if success else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
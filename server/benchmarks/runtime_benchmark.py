@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark des runtimes CPU des modèles deep learning
+Latence médiane d'une passe avant (ThreatLSTM, ThreatAutoencoder,
+AttentionThreatClassifier) en eager, TorchScript gelé et onnxruntime,
+pour plusieurs tailles de lot ; les graphes sont exportés par save_models
+dans un répertoire temporaire
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+
+from models.deep_learning_models import DeepLearningThreatEngine
+from models.model_export import ONNXRUNTIME_AVAILABLE
+from models.model_registry import configure_torch_threads
+
+def print_header(text):
+    print(f"\n{'='*60}")
+    print(f"  {text}")
+    print(f"{'='*60}")
+
+def make_inputs(model: str, batch_size: int):
+    """Entrées représentatives : historique de 10 pas, 50 caractéristiques, 8 documents"""
+    if model == 'lstm':
+        return (torch.rand(batch_size, 10, 10),)
+    if model == 'autoencoder':
+        return (torch.rand(batch_size, 50),)
+    return torch.randn(8, batch_size, 768), torch.zeros(batch_size, 8, dtype=torch.bool)
+
+def median_latency(runner, inputs, iterations: int) -> float:
+    with torch.inference_mode():
+        for _ in range(5):  # Préchauffage (allocations, optimisations du graphe au premier appel)
+            runner(*inputs)
+        timings = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            runner(*inputs)
+            timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    threads = configure_torch_threads()
+    runtimes = ['eager', 'torchscript'] + (['onnx'] if ONNXRUNTIME_AVAILABLE else [])
+
+    with tempfile.TemporaryDirectory() as model_path:
+        DeepLearningThreatEngine(model_path, runtime='eager').save_models()
+        engines = {runtime: DeepLearningThreatEngine(model_path, runtime=runtime) for runtime in runtimes}
+
+        print_header("BENCHMARK DES RUNTIMES CPU")
+        print(f"Threads torch: {threads} | itérations: {args.iterations} | runtimes: {', '.join(runtimes)}")
+        print(f"{'Modèle':<12} | {'Lot':>4} | {'Runtime':<12} | {'Médiane':>10} | {'Gain':>6}")
+
+        for model in ('lstm', 'autoencoder', 'attention'):
+            for batch_size in args.batch_sizes:
+                inputs = make_inputs(model, batch_size)
+                eager_time = None
+                for runtime in runtimes:
+                    elapsed = median_latency(engines[runtime].runners[model], inputs, args.iterations)
+                    eager_time = eager_time or elapsed
+                    print(f"{model:<12} | {batch_size:>4} | {runtime:<12} | {elapsed * 1000:>8.3f}ms | "
+                          f"{eager_time / elapsed:>5.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Niveau L2 partagé du cache (Redis) et équivalent en mémoire pour les tests
+Les workers gunicorn gardent chacun leur cache L1 ; le L2 est commun et les
+invalidations sont diffusées aux L1 par pub/sub
+"""
+
+import json
+import pickle
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+class CacheBackend:
+    """Interface d'un cache L2 (valeurs sérialisées, tags, diffusion)"""
+
+    def get(self, key: str) -> Optional[tuple]:
+        """Renvoie (valeur, ttl restant en secondes) ou None"""
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: int, tags: List[str]) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def invalidate_tags(self, tags: List[str]) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def publish(self, message: Dict) -> None:
+        raise NotImplementedError
+
+    def subscribe(self, callback: Callable[[Dict], None]) -> None:
+        raise NotImplementedError
+
+    @staticmethod
+    def serialize(value: Any) -> bytes:
+        return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def deserialize(payload: bytes) -> Any:
+        return pickle.loads(payload)
+
+# Lecture des membres d'un tag et suppression des valeurs et du tag en une seule
+# opération atomique : une clé étiquetée entre les deux ne peut pas survivre
+INVALIDATE_TAGS_SCRIPT = """
+for _, tag_key in ipairs(KEYS) do
+    for _, key in ipairs(redis.call('SMEMBERS', tag_key)) do
+        redis.call('DEL', ARGV[1] .. key)
+    end
+    redis.call('DEL', tag_key)
+end
+return 0
+"""
+
+class RedisCacheBackend(CacheBackend):
+    """L2 Redis : valeurs pickle, un SET Redis par tag, canal pub/sub d'invalidation"""
+
+    def __init__(self, redis_url: str, prefix: str = 'smartanalysis:cache:'):
+        import redis
+        self.client = redis.from_url(redis_url, socket_connect_timeout=0.5, socket_timeout=1.0)
+        self.client.ping()
+        self.prefix = prefix
+        self.channel = f"{prefix}invalidations"
+        self.tag_ttl_margin = 3600
+        self.pubsub_thread = None
+        self.invalidate_tags_script = self.client.register_script(INVALIDATE_TAGS_SCRIPT)
+
+    def _value_key(self, key: str) -> str:
+        return f"{self.prefix}k:{key}"
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.prefix}t:{tag}"
+
+    def get(self, key: str) -> Optional[tuple]:
+        pipe = self.client.pipeline()
+        pipe.get(self._value_key(key))
+        pipe.pttl(self._value_key(key))
+        payload, ttl_ms = pipe.execute()
+        if payload is None:
+            return None
+        return self.deserialize(payload), max(ttl_ms, 0) / 1000.0
+
+    def set(self, key: str, value: Any, ttl: int, tags: List[str]) -> None:
+        pipe = self.client.pipeline()
+        pipe.set(self._value_key(key), self.serialize(value), px=max(int(ttl * 1000), 1))
+        for tag in tags:
+            pipe.sadd(self._tag_key(tag), key)
+            # Marge d'une heure : le SET du tag survit aux clés qu'il référence
+            pipe.expire(self._tag_key(tag), max(int(ttl), 1) + self.tag_ttl_margin)
+        pipe.execute()
+
+    def delete(self, key: str) -> None:
+        self.client.delete(self._value_key(key))
+
+    def invalidate_tags(self, tags: List[str]) -> None:
+        if tags:
+            self.invalidate_tags_script(keys=[self._tag_key(tag) for tag in tags],
+                                        args=[self._value_key('')])
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(match=f"{self.prefix}*", count=500))
+        for start in range(0, len(keys), 500):
+            self.client.delete(*keys[start:start + 500])
+
+    def publish(self, message: Dict) -> None:
+        self.client.publish(self.channel, json.dumps(message))
+
+    def subscribe(self, callback: Callable[[Dict], None]) -> None:
+        def handler(raw_message):
+            try:
+                callback(json.loads(raw_message['data']))
+            except Exception as e:
+                logger.error(f"Erreur message d'invalidation du cache: {e}")
+
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{self.channel: handler})
+        self.pubsub_thread = pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+
+class InMemoryCacheStore:
+    """Stockage partagé entre plusieurs InMemoryCacheBackend (simule un serveur Redis)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values: Dict[str, tuple] = {}
+        self.tags: Dict[str, set] = defaultdict(set)
+        self.subscribers: List[Callable[[Dict], None]] = []
+
+class InMemoryCacheBackend(CacheBackend):
+    """L2 en mémoire, même contrat que RedisCacheBackend (tests, développement)
+
+    Plusieurs instances partageant un même InMemoryCacheStore se comportent
+    comme plusieurs workers connectés au même Redis ; la diffusion est synchrone.
+    """
+
+    def __init__(self, store: Optional[InMemoryCacheStore] = None):
+        self.store = store or InMemoryCacheStore()
+
+    def get(self, key: str) -> Optional[tuple]:
+        with self.store.lock:
+            item = self.store.values.get(key)
+            if item is None:
+                return None
+            payload, expires_at = item
+            remaining = expires_at - time.time()
+            if remaining <= 0:
+                del self.store.values[key]
+                return None
+        return self.deserialize(payload), remaining
+
+    def set(self, key: str, value: Any, ttl: int, tags: List[str]) -> None:
+        payload = self.serialize(value)
+        with self.store.lock:
+            self.store.values[key] = (payload, time.time() + ttl)
+            for tag in tags:
+                self.store.tags[tag].add(key)
+
+    def delete(self, key: str) -> None:
+        with self.store.lock:
+            self.store.values.pop(key, None)
+
+    def invalidate_tags(self, tags: List[str]) -> None:
+        with self.store.lock:
+            for tag in tags:
+                for key in self.store.tags.pop(tag, set()):
+                    self.store.values.pop(key, None)
+
+    def clear(self) -> None:
+        with self.store.lock:
+            self.store.values.clear()
+            self.store.tags.clear()
+
+    def publish(self, message: Dict) -> None:
+        # Aller-retour JSON comme sur le canal Redis
+        payload = json.dumps(message)
+        for callback in list(self.store.subscribers):
+            callback(json.loads(payload))
+
+    def subscribe(self, callback: Callable[[Dict], None]) -> None:
+        self.store.subscribers.append(callback)
+
+def create_cache_backend(kind: str, redis_url: Optional[str] = None) -> Optional[CacheBackend]:
+    """Créer le niveau L2 configuré ('redis', 'memory' ou 'none')
+
+    Si Redis est injoignable, le cache reste sur le seul niveau L1.
+    """
+    if kind == 'memory':
+        return InMemoryCacheBackend()
+    if kind == 'redis':
+        try:
+            return RedisCacheBackend(redis_url)
+        except Exception as e:
+            logger.warning(f"Cache L2 Redis indisponible, cache local uniquement: {e}")
+    return None
@@ -1,87 +1,579 @@
+import heapq
 import json
+import pickle
 import time
-from typing import Dict, Any, Optional, List
+import uuid
+import zlib
+from collections import OrderedDict, defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, Any, Optional, List
 from datetime import datetime, timedelta
 from threading import Lock
 
-class CacheManager:
-    """Gestionnaire de cache pour optimiser les performances"""
-    
+from config import Config
+from cache_backends import CacheBackend, create_cache_backend
+import logging
+
+logger = logging.getLogger(__name__)
+
+class CacheShard:
+    """Fragment du cache protégé par son propre verrou
+
+    Les entrées sont rangées par namespace dans un OrderedDict (ordre LRU) ;
+    un tas min des dates d'expiration évite de parcourir tout le fragment.
+    """
+
     def __init__(self):
-        self.cache: Dict[str, Dict] = {}
-        self.cache_lock = Lock()
+        self.lock = Lock()
+        self.namespaces: Dict[str, OrderedDict] = defaultdict(OrderedDict)
+        self.key_namespaces: Dict[str, str] = {}
+        self.tag_keys: Dict[str, set] = defaultdict(set)  # Index tag -> clés
+        self.expiry_heap: List = []
+        self.counters: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0}
+        )
+
+    def remove(self, key: str) -> Optional[Dict]:
+        """Retirer une entrée (appelé sous verrou)"""
+        namespace = self.key_namespaces.pop(key, None)
+        if namespace is None:
+            return None
+        entry = self.namespaces[namespace].pop(key)
+        entry['namespace'] = namespace
+        for tag in entry['tags']:
+            keys = self.tag_keys.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.tag_keys[tag]
+        return entry
+
+class CacheManager:
+    """Gestionnaire de cache pour optimiser les performances
+
+    Cache fragmenté (verrou par fragment) avec limites d'entrées et d'octets
+    par namespace, éviction LRU et expiration par tas min. Les octets d'un
+    namespace sont comptés globalement (une grosse valeur n'est pas limitée à
+    la part d'un fragment) ; l'éviction commence par le fragment courant.
+    Ordre des verrous : fragment puis comptabilité, jamais deux fragments.
+
+    Avec un niveau L2 (Redis partagé entre les workers gunicorn), un défaut
+    du L1 est servi par le L2, et les invalidations sont appliquées au L2 puis
+    diffusées par pub/sub aux L1 des autres processus. Une erreur du L2 est
+    journalisée et le cache continue sur le seul L1.
+    """
+
+    def __init__(self, shard_count: Optional[int] = None, l2_backend: Optional[CacheBackend] = None):
+        self.shard_count = shard_count or Config.CACHE_SHARDS
+        self.shards = [CacheShard() for _ in range(self.shard_count)]
+        self.namespace_bytes: Dict[str, int] = defaultdict(int)
+        self.namespace_entries: Dict[str, int] = defaultdict(int)
+        self.accounting_lock = Lock()
         self.default_ttl = 300  # 5 minutes
-        
-    def get(self, key: str) -> Optional[Any]:
-        """Récupérer une valeur du cache"""
-        with self.cache_lock:
-            if key not in self.cache:
-                return None
-            
-            entry = self.cache[key]
+        self.default_limits = {
+            'max_entries': Config.CACHE_MAX_ENTRIES,
+            'max_bytes': Config.CACHE_MAX_BYTES
+        }
+        # Limites spécifiques (grosses listes complètes : peu d'entrées, beaucoup d'octets)
+        self.namespace_limits: Dict[str, Dict[str, int]] = {
+            'threats': {'max_entries': 256, 'max_bytes': 64 * 1024 * 1024},
+            'documents': {'max_entries': 256, 'max_bytes': 64 * 1024 * 1024}
+        }
+
+        # Niveau L2 partagé
+        self.l2 = l2_backend
+        self.instance_id = uuid.uuid4().hex  # Ignorer ses propres messages d'invalidation
+        self.l2_counters = {'hits': 0, 'misses': 0, 'errors': 0, 'invalidations_received': 0}
+        # Numéro de la dernière invalidation, global et par tag (namespaces compris) :
+        # une lecture L2 ou un calcul concurrent d'une invalidation de ses tags ne remplit pas le cache
+        self.invalidation_epoch = 0
+        self.tag_epochs: Dict[str, int] = {}
+        self.cleared_epoch = 0
+        if self.l2 is not None:
+            self._l2_call('subscribe', self._on_invalidation)
+
+        # Calculs en cours (single-flight) et rafraîchissements en arrière-plan
+        self.default_stale_ttl = 60  # Durée pendant laquelle une valeur expirée reste servie
+        self.compute_wait_timeout = 30  # Au-delà, un appelant en attente calcule lui-même
+        self.refresh_workers = 4
+        self.inflight: Dict[str, Future] = {}
+        self.inflight_lock = Lock()
+        self.refresh_executor: Optional[ThreadPoolExecutor] = None
+        self.compute_counters = {'computations': 0, 'coalesced': 0, 'stale_served': 0,
+                                 'background_refreshes': 0, 'errors': 0}
+
+    def _l2_call(self, method: str, *args) -> Any:
+        """Appeler le L2 en absorbant ses erreurs (repli sur le L1)"""
+        try:
+            return getattr(self.l2, method)(*args)
+        except Exception as e:
+            with self.accounting_lock:
+                self.l2_counters['errors'] += 1
+            logger.error(f"Erreur cache L2 ({method}): {e}")
+            return None
+
+    def _broadcast(self, message: Dict) -> None:
+        """Diffuser une invalidation aux L1 des autres processus"""
+        message['origin'] = self.instance_id
+        self._l2_call('publish', message)
+
+    def _on_invalidation(self, message: Dict) -> None:
+        """Appliquer localement une invalidation reçue d'un autre processus"""
+        if message.get('origin') == self.instance_id:
+            return
+        with self.accounting_lock:
+            self.l2_counters['invalidations_received'] += 1
+        operation = message.get('op')
+        if operation == 'tags':
+            self._invalidate_tags_local(message.get('tags', []))
+        elif operation == 'delete':
+            for key in message.get('keys', []):
+                self._delete_local(key)
+        elif operation == 'clear':
+            self._clear_local()
+
+    def _bump_epoch(self, tags: Optional[List[str]] = None) -> None:
+        """Enregistrer une invalidation des tags (de tout le cache si tags est None)"""
+        with self.accounting_lock:
+            self.invalidation_epoch += 1
+            if tags is None:
+                self.cleared_epoch = self.invalidation_epoch
+            for tag in tags or ():
+                self.tag_epochs[tag] = self.invalidation_epoch
+
+    def _current_epoch(self) -> int:
+        with self.accounting_lock:
+            return self.invalidation_epoch
+
+    def _invalidated_since(self, epoch: int, tags) -> bool:
+        """Vrai si l'un des tags (ou tout le cache) a été invalidé après epoch"""
+        with self.accounting_lock:
+            return self.cleared_epoch > epoch or any(self.tag_epochs.get(tag, 0) > epoch for tag in tags)
+
+    def _shard(self, key: str) -> CacheShard:
+        # crc32 plutôt que hash() : stable d'un processus à l'autre
+        return self.shards[zlib.crc32(key.encode('utf-8')) % self.shard_count]
+
+    def namespace_for(self, key: str) -> str:
+        """Namespace par défaut : préfixe de la clé avant ':' ou '_'"""
+        for separator in (':', '_'):
+            if separator in key:
+                return key.split(separator, 1)[0]
+        return key
+
+    def set_namespace_limits(self, namespace: str, max_entries: Optional[int] = None,
+                             max_bytes: Optional[int] = None) -> None:
+        """Configurer les limites d'un namespace"""
+        limits = dict(self.namespace_limits.get(namespace, self.default_limits))
+        if max_entries is not None:
+            limits['max_entries'] = max_entries
+        if max_bytes is not None:
+            limits['max_bytes'] = max_bytes
+        self.namespace_limits[namespace] = limits
+
+    def _limits(self, namespace: str) -> Dict[str, int]:
+        """Limites d'un namespace (entrées et octets, tous fragments confondus)"""
+        return self.namespace_limits.get(namespace, self.default_limits)
+
+    def _discard(self, shard: CacheShard, key: str) -> Optional[Dict]:
+        """Retirer une entrée et mettre à jour les compteurs du namespace (sous verrou du fragment)"""
+        entry = shard.remove(key)
+        if entry is not None:
+            with self.accounting_lock:
+                self.namespace_bytes[entry['namespace']] -= entry['size']
+                self.namespace_entries[entry['namespace']] -= 1
+        return entry
+
+    def _over_budget(self, namespace: str, limits: Dict[str, int]) -> bool:
+        """Namespace au-delà de sa limite d'entrées ou d'octets (total des fragments)"""
+        with self.accounting_lock:
+            return (self.namespace_entries[namespace] > limits['max_entries']
+                    or self.namespace_bytes[namespace] > limits['max_bytes'])
+
+    def _evict_oldest(self, shard: CacheShard, namespace: str, keep: Optional[str] = None) -> bool:
+        """Évincer l'entrée LRU d'un namespace dans un fragment (sous verrou)"""
+        for key in shard.namespaces[namespace]:
+            if key != keep:
+                self._discard(shard, key)
+                shard.counters[namespace]['evictions'] += 1
+                return True
+        return False
+
+    @staticmethod
+    def _estimate_size(value: Any) -> int:
+        """Taille approximative d'une valeur en octets"""
+        try:
+            return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            return len(str(value))
+
+    def get(self, key: str, namespace: Optional[str] = None) -> Optional[Any]:
+        """Récupérer une valeur du cache (L1, puis L2 partagé)"""
+        return self._lookup(key, namespace)[1]
+
+    def _lookup(self, key: str, namespace: Optional[str] = None) -> tuple:
+        """Lecture L1 puis L2 : (trouvé, valeur, date de fin de fraîcheur)"""
+        found, value, fresh_until = self._get_local(key, namespace)
+        if found or self.l2 is None:
+            return found, value, fresh_until
+
+        epoch = self._current_epoch()
+        item = self._l2_call('get', key)
+        with self.accounting_lock:
+            self.l2_counters['hits' if item else 'misses'] += 1
+        if not item:
+            return False, None, 0.0
+
+        payload, remaining_ttl = item
+        fresh_until = payload.get('fresh_until') or time.time() + remaining_ttl
+        # Pas de remplissage du L1 si une invalidation de ses tags est arrivée pendant la lecture
+        invalidated = self._invalidated_since(epoch, {self.namespace_for(key), *payload['tags']})
+        if not invalidated and remaining_ttl > 0:
+            self._set_local(key, payload['value'], remaining_ttl, payload['namespace'],
+                            payload['tags'], fresh_until)
+        return True, payload['value'], fresh_until
+
+    def _get_local(self, key: str, namespace: Optional[str] = None) -> tuple:
+        """Lecture du L1 : (trouvé, valeur, date de fin de fraîcheur)"""
+        shard = self._shard(key)
+        with shard.lock:
+            stored_namespace = shard.key_namespaces.get(key)
+            if stored_namespace is None:
+                shard.counters[namespace or self.namespace_for(key)]['misses'] += 1
+                return False, None, 0.0
+            namespace = stored_namespace
+
+            entries = shard.namespaces[namespace]
+            entry = entries[key]
             if time.time() > entry['expires_at']:
-                del self.cache[key]
-                return None
-            
-            return entry['value']
-    
-    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
-        """Stocker une valeur dans le cache"""
+                self._discard(shard, key)
+                shard.counters[namespace]['expirations'] += 1
+                shard.counters[namespace]['misses'] += 1
+                return False, None, 0.0
+
+            entries.move_to_end(key)
+            shard.counters[namespace]['hits'] += 1
+            return True, entry['value'], entry['fresh_until']
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None,
+            namespace: Optional[str] = None, depends_on: Optional[List[str]] = None,
+            stale_ttl: int = 0) -> None:
+        """Stocker une valeur dans le cache
+        
+        depends_on liste les tags (tables, domaines) dont dépend la valeur ;
+        invalidate_tags(['threats']) supprime toutes les clés qui en dépendent.
+        Le namespace est toujours un tag de l'entrée. La valeur est aussi
+        écrite dans le L2 avec ses tags, pour que les autres processus
+        l'invalident de la même façon.
+
+        stale_ttl prolonge la conservation au-delà de ttl : la valeur reste
+        servie par get_or_compute pendant son rafraîchissement en arrière-plan.
+        """
         if ttl is None:
             ttl = self.default_ttl
-            
-        with self.cache_lock:
-            self.cache[key] = {
+        namespace = namespace or self.namespace_for(key)
+        tags = sorted({namespace, *(depends_on or [])})
+        fresh_until = time.time() + ttl
+        self._set_local(key, value, ttl + stale_ttl, namespace, tags, fresh_until)
+        if self.l2 is not None:
+            payload = {'value': value, 'namespace': namespace, 'tags': tags, 'fresh_until': fresh_until}
+            self._l2_call('set', key, payload, ttl + stale_ttl, tags)
+
+    def _set_local(self, key: str, value: Any, ttl: float, namespace: str, tags: List[str],
+                   fresh_until: Optional[float] = None) -> None:
+        """Écriture dans le L1 avec éviction LRU"""
+        limits = self._limits(namespace)
+        size = self._estimate_size(value)
+
+        if size > limits['max_bytes']:
+            # Valeur plus grosse que tout le namespace : ne pas vider le cache pour rien
+            self._delete_local(key)
+            return
+
+        shard = self._shard(key)
+        with shard.lock:
+            self._discard(shard, key)
+            now = time.time()
+            entry = {
                 'value': value,
-                'created_at': time.time(),
-                'expires_at': time.time() + ttl
+                'created_at': now,
+                'expires_at': now + ttl,
+                'fresh_until': fresh_until or now + ttl,
+                'size': size,
+                'tags': set(tags)
             }
-    
+            shard.namespaces[namespace][key] = entry
+            shard.key_namespaces[key] = namespace
+            for tag in entry['tags']:
+                shard.tag_keys[tag].add(key)
+            with self.accounting_lock:
+                self.namespace_bytes[namespace] += size
+                self.namespace_entries[namespace] += 1
+            heapq.heappush(shard.expiry_heap, (entry['expires_at'], key))
+
+            # Éviction LRU locale tant que le namespace dépasse ses limites (entrées ou octets)
+            while self._over_budget(namespace, limits):
+                if not self._evict_oldest(shard, namespace, keep=key):
+                    break
+
+        # Limites toujours dépassées : évincer dans les autres fragments, un verrou à la fois
+        for other in self.shards:
+            if other is shard or not self._over_budget(namespace, limits):
+                continue
+            with other.lock:
+                while self._over_budget(namespace, limits):
+                    if not self._evict_oldest(other, namespace):
+                        break
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any], ttl: Optional[int] = None,
+                       namespace: Optional[str] = None, depends_on: Optional[List[str]] = None,
+                       stale_ttl: Optional[int] = None, force_refresh: bool = False,
+                       cache_empty: bool = False) -> Any:
+        """Lire une clé ou la calculer, un seul calcul concurrent par clé
+
+        Sur un défaut, le premier appelant exécute compute() et les appelants
+        concurrents attendent son résultat (ou son exception) au lieu de
+        relancer la même requête. Une valeur expirée depuis moins de stale_ttl
+        est renvoyée immédiatement pendant qu'un rafraîchissement tourne en
+        arrière-plan. Les résultats vides ne sont pas mis en cache, sauf
+        cache_empty. Une invalidation retire la valeur : elle n'est pas servie
+        périmée.
+        """
+        if ttl is None:
+            ttl = self.default_ttl
+        if stale_ttl is None:
+            stale_ttl = self.default_stale_ttl
+        store = (key, compute, ttl, namespace, depends_on, stale_ttl, cache_empty)
+
+        if not force_refresh:
+            found, value, fresh_until = self._lookup(key, namespace)
+            if found and (value or cache_empty):
+                if time.time() > fresh_until:
+                    self._count('stale_served')
+                    self._refresh_in_background(store)
+                return value
+
+        future, leader = self._claim(key)
+        if leader:
+            return self._compute_and_store(future, *store)
+
+        self._count('coalesced')
+        try:
+            return future.result(timeout=self.compute_wait_timeout)
+        except FutureTimeoutError:
+            logger.warning(f"Calcul de {key} trop long, calcul direct")
+            return compute()
+
+    def _claim(self, key: str) -> tuple:
+        """Futur du calcul en cours pour la clé : (futur, True si l'appelant doit calculer)"""
+        with self.inflight_lock:
+            future = self.inflight.get(key)
+            if future is not None:
+                return future, False
+            future = Future()
+            self.inflight[key] = future
+            return future, True
+
+    def _compute_and_store(self, future: Future, key: str, compute: Callable[[], Any], ttl: int,
+                           namespace: Optional[str], depends_on: Optional[List[str]],
+                           stale_ttl: int, cache_empty: bool) -> Any:
+        """Exécuter le calcul, le mettre en cache puis réveiller les appelants en attente"""
+        self._count('computations')
+        epoch = self._current_epoch()
+        try:
+            value = compute()
+        except BaseException as e:
+            self._count('errors')
+            with self.inflight_lock:
+                self.inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        # Une invalidation de ses tags pendant le calcul rend le résultat suspect : ne pas le garder
+        tags = {self.namespace_for(key), namespace or self.namespace_for(key), *(depends_on or [])}
+        if (value or cache_empty) and not self._invalidated_since(epoch, tags):
+            self.set(key, value, ttl, namespace, depends_on, stale_ttl)
+        # Retirer le futur après l'écriture : un nouvel appelant trouve la valeur en cache
+        with self.inflight_lock:
+            self.inflight.pop(key, None)
+        future.set_result(value)
+        return value
+
+    def _refresh_in_background(self, store: tuple) -> None:
+        """Lancer le rafraîchissement d'une valeur périmée (sauf calcul déjà en cours)"""
+        future, leader = self._claim(store[0])
+        if not leader:
+            return
+        with self.inflight_lock:
+            if self.refresh_executor is None:
+                self.refresh_executor = ThreadPoolExecutor(
+                    max_workers=self.refresh_workers, thread_name_prefix='cache-refresh'
+                )
+        self._count('background_refreshes')
+        self.refresh_executor.submit(self._background_refresh, future, store)
+
+    def _background_refresh(self, future: Future, store: tuple) -> None:
+        try:
+            self._compute_and_store(future, *store)
+        except Exception as e:
+            logger.error(f"Erreur rafraîchissement du cache {store[0]}: {e}")
+
+    def _count(self, name: str) -> None:
+        with self.accounting_lock:
+            self.compute_counters[name] += 1
+
     def delete(self, key: str) -> None:
-        """Supprimer une clé du cache"""
-        with self.cache_lock:
-            if key in self.cache:
-                del self.cache[key]
-    
+        """Supprimer une clé du cache (tous les niveaux)"""
+        self._delete_local(key)
+        if self.l2 is not None:
+            self._l2_call('delete', key)
+            self._broadcast({'op': 'delete', 'keys': [key]})
+
+    def _delete_local(self, key: str) -> None:
+        shard = self._shard(key)
+        with shard.lock:
+            # Namespace par défaut toujours compris : les lectures en cours le vérifient
+            tags = {self.namespace_for(key), shard.key_namespaces.get(key) or self.namespace_for(key)}
+            self._bump_epoch(sorted(tags))
+            self._discard(shard, key)
+
     def clear(self) -> None:
-        """Vider le cache"""
-        with self.cache_lock:
-            self.cache.clear()
-    
+        """Vider le cache (tous les niveaux)"""
+        self._clear_local()
+        if self.l2 is not None:
+            self._l2_call('clear')
+            self._broadcast({'op': 'clear'})
+
+    def _clear_local(self) -> None:
+        self._bump_epoch()
+        for shard in self.shards:
+            with shard.lock:
+                for key in list(shard.key_namespaces):
+                    self._discard(shard, key)
+                shard.expiry_heap = []
+
+    def invalidate_tags(self, tags: List[str]) -> int:
+        """Invalider toutes les clés portant l'un des tags (coût proportionnel aux clés concernées)
+
+        Renvoie le nombre de clés retirées du L1 local ; le L2 et les L1 des
+        autres processus sont invalidés aussi.
+        """
+        removed = self._invalidate_tags_local(tags)
+        if self.l2 is not None:
+            self._l2_call('invalidate_tags', list(tags))
+            self._broadcast({'op': 'tags', 'tags': list(tags)})
+        return removed
+
+    def _invalidate_tags_local(self, tags: List[str]) -> int:
+        self._bump_epoch(list(tags))
+        removed = 0
+        for shard in self.shards:
+            with shard.lock:
+                for tag in tags:
+                    for key in list(shard.tag_keys.get(tag, ())):
+                        if self._discard(shard, key) is not None:
+                            removed += 1
+        return removed
+
     def invalidate_pattern(self, pattern: str) -> None:
-        """Invalider toutes les clés qui correspondent à un pattern"""
-        with self.cache_lock:
-            keys_to_delete = [key for key in self.cache.keys() if pattern in key]
-            for key in keys_to_delete:
-                del self.cache[key]
-    
+        """Invalider les clés d'un tag (compatibilité avec les anciens patterns)
+        
+        'threats', 'threats*' ou 'documents_*' désignent le tag 'threats' /
+        'documents' ; '*' vide tout le cache. Aucun parcours des clés.
+        """
+        tag = pattern.rstrip('*?').rstrip('_:')
+        if not tag:
+            self.clear()
+            return
+        self.invalidate_tags([tag])
+
     def cleanup_expired(self) -> None:
-        """Nettoyer les entrées expirées"""
+        """Nettoyer les entrées expirées (dépile le tas, sans parcours complet)"""
         current_time = time.time()
-        with self.cache_lock:
-            expired_keys = [
-                key for key, entry in self.cache.items()
-                if current_time > entry['expires_at']
-            ]
-            for key in expired_keys:
-                del self.cache[key]
-    
+        for shard in self.shards:
+            with shard.lock:
+                heap = shard.expiry_heap
+                while heap and heap[0][0] <= current_time:
+                    expires_at, key = heapq.heappop(heap)
+                    namespace = shard.key_namespaces.get(key)
+                    if namespace is None:
+                        continue
+                    entry = shard.namespaces[namespace][key]
+                    # Entrée remplacée depuis : l'élément du tas est périmé
+                    if entry['expires_at'] != expires_at or current_time <= entry['expires_at']:
+                        continue
+                    self._discard(shard, key)
+                    shard.counters[namespace]['expirations'] += 1
+
+                # Le tas garde des éléments périmés (clés remplacées) : le compacter si besoin
+                if len(heap) > 2 * len(shard.key_namespaces) + 64:
+                    shard.expiry_heap = [
+                        (entries[key]['expires_at'], key)
+                        for entries in shard.namespaces.values() for key in entries
+                    ]
+                    heapq.heapify(shard.expiry_heap)
+
     def get_stats(self) -> Dict[str, Any]:
         """Obtenir les statistiques du cache"""
-        with self.cache_lock:
-            total_entries = len(self.cache)
-            current_time = time.time()
-            expired_entries = sum(
-                1 for entry in self.cache.values()
-                if current_time > entry['expires_at']
-            )
-            
-            return {
-                'total_entries': total_entries,
-                'expired_entries': expired_entries,
-                'valid_entries': total_entries - expired_entries,
-                'memory_usage': len(str(self.cache))
-            }
+        current_time = time.time()
+        total_entries = 0
+        expired_entries = 0
+        namespaces: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {'entries': 0, 'bytes': 0, 'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0}
+        )
+
+        for shard in self.shards:
+            with shard.lock:
+                for namespace, entries in shard.namespaces.items():
+                    stats = namespaces[namespace]
+                    stats['entries'] += len(entries)
+                    total_entries += len(entries)
+                    expired_entries += sum(1 for entry in entries.values() if current_time > entry['expires_at'])
+                for namespace, counters in shard.counters.items():
+                    for name, value in counters.items():
+                        namespaces[namespace][name] += value
+
+        with self.accounting_lock:
+            for namespace, used_bytes in self.namespace_bytes.items():
+                namespaces[namespace]['bytes'] = used_bytes
+            memory_usage = sum(self.namespace_bytes.values())
+
+        for namespace, stats in namespaces.items():
+            limits = self.namespace_limits.get(namespace, self.default_limits)
+            requests = stats['hits'] + stats['misses']
+            stats['hit_rate'] = round(stats['hits'] / requests * 100, 2) if requests else 0
+            stats['max_entries'] = limits['max_entries']
+            stats['max_bytes'] = limits['max_bytes']
+
+        return {
+            'total_entries': total_entries,
+            'expired_entries': expired_entries,
+            'valid_entries': total_entries - expired_entries,
+            'memory_usage': memory_usage,
+            'shards': self.shard_count,
+            'hits': sum(stats['hits'] for stats in namespaces.values()),
+            'misses': sum(stats['misses'] for stats in namespaces.values()),
+            'evictions': sum(stats['evictions'] for stats in namespaces.values()),
+            'namespaces': dict(namespaces),
+            'l2': self._l2_stats(),
+            'single_flight': self._compute_stats()
+        }
+
+    def _compute_stats(self) -> Dict[str, Any]:
+        with self.accounting_lock:
+            counters = dict(self.compute_counters)
+        with self.inflight_lock:
+            counters['in_flight'] = len(self.inflight)
+        return counters
+
+    def _l2_stats(self) -> Dict[str, Any]:
+        with self.accounting_lock:
+            counters = dict(self.l2_counters)
+        requests = counters['hits'] + counters['misses']
+        counters['hit_rate'] = round(counters['hits'] / requests * 100, 2) if requests else 0
+        counters['enabled'] = self.l2 is not None
+        counters['backend'] = type(self.l2).__name__ if self.l2 is not None else None
+        return counters
 
-# Instance globale du cache
-cache_manager = CacheManager()
\ No newline at end of file
+# Instance globale du cache (L2 selon Config.CACHE_L2_BACKEND)
+cache_manager = CacheManager(l2_backend=create_cache_backend(Config.CACHE_L2_BACKEND, Config.CACHE_L2_URL))
@@ -13,8 +13,49 @@ class Config:
     # Redis
     REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379')
     
+    # Pool de connexions PostgreSQL (secondes)
+    DB_POOL_MIN = int(os.getenv('DB_POOL_MIN', '2'))
+    DB_POOL_MAX = int(os.getenv('DB_POOL_MAX', '10'))
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '10'))
+    DB_POOL_MAX_LIFETIME = float(os.getenv('DB_POOL_MAX_LIFETIME', '1800'))
+    DB_POOL_MAX_IDLE = float(os.getenv('DB_POOL_MAX_IDLE', '300'))
+    DB_RETRY_BACKOFF = float(os.getenv('DB_RETRY_BACKOFF', '0.1'))
+    # Pool asyncpg (lectures parallèles), en plus du pool psycopg2 : chaque worker
+    # ouvre jusqu'à DB_POOL_MAX + ASYNC_DB_POOL_MAX connexions
+    ASYNC_DB_POOL_MIN = int(os.getenv('ASYNC_DB_POOL_MIN', '1'))
+    ASYNC_DB_POOL_MAX = int(os.getenv('ASYNC_DB_POOL_MAX', '4'))
+    
+    # Cache en mémoire (limites par namespace, tous fragments confondus)
+    CACHE_SHARDS = int(os.getenv('CACHE_SHARDS', '16'))
+    CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', '1024'))
+    CACHE_MAX_BYTES = int(os.getenv('CACHE_MAX_BYTES', str(32 * 1024 * 1024)))
+    # Cache L2 partagé entre workers : 'redis', 'memory' (tests) ou 'none'
+    CACHE_L2_BACKEND = os.getenv('CACHE_L2_BACKEND', 'redis')
+    CACHE_L2_URL = os.getenv('CACHE_L2_URL', REDIS_URL)
+    
     # ML Models
     ML_MODEL_PATH = os.getenv('ML_MODEL_PATH', './models')
+    # Encodeur de texte partagé (registre des modèles) : copie locale pour fonctionner sans réseau
+    ML_ENCODER_MODEL = os.getenv('ML_ENCODER_MODEL', 'bert-base-multilingual-cased')
+    ML_ENCODER_DIR = os.getenv('ML_ENCODER_DIR', os.path.join(ML_MODEL_PATH, 'encoders'))
+    ML_OFFLINE = os.getenv('ML_OFFLINE', 'false').lower() in ('1', 'true', 'yes')
+    ML_WARMUP = os.getenv('ML_WARMUP', 'false').lower() in ('1', 'true', 'yes')
+    # Inférence de l'encodeur par micro-lots ; 0 thread = un par cœur physique / workers du serveur
+    ML_ENCODER_BATCH_SIZE = int(os.getenv('ML_ENCODER_BATCH_SIZE', '16'))
+    ML_ENCODER_MAX_LENGTH = int(os.getenv('ML_ENCODER_MAX_LENGTH', '512'))
+    ML_TORCH_THREADS = int(os.getenv('ML_TORCH_THREADS', '0'))
+    WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', '1'))
+    # Embeddings persistés par (modèle, empreinte sha256 du contenu)
+    ML_EMBEDDING_CACHE = os.getenv('ML_EMBEDDING_CACHE', 'true').lower() in ('1', 'true', 'yes')
+    ML_EMBEDDING_DIR = os.getenv('ML_EMBEDDING_DIR', os.path.join(ML_MODEL_PATH, 'embeddings'))
+    # Ordonnanceur d'inférence : requêtes regroupées jusqu'à MAX_BATCH ou MAX_LATENCY_MS d'attente
+    ML_INFERENCE_BATCHING = os.getenv('ML_INFERENCE_BATCHING', 'true').lower() in ('1', 'true', 'yes')
+    ML_INFERENCE_MAX_BATCH = int(os.getenv('ML_INFERENCE_MAX_BATCH', '32'))
+    ML_INFERENCE_MAX_LATENCY_MS = float(os.getenv('ML_INFERENCE_MAX_LATENCY_MS', '5'))
+    ML_INFERENCE_TIMEOUT = float(os.getenv('ML_INFERENCE_TIMEOUT', '30'))
+    # Graphes exportés par save_models et runtime de service : eager, torchscript ou onnx
+    ML_EXPORT_FORMATS = [fmt.strip() for fmt in os.getenv('ML_EXPORT_FORMATS', 'torchscript,onnx').split(',') if fmt.strip()]
+    ML_RUNTIME = os.getenv('ML_RUNTIME', 'eager')
     
     # Threat Scoring Parameters
     THREAT_SCORE_WEIGHTS = {
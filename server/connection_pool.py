@@ -0,0 +1,224 @@
+"""
+Pool de connexions PostgreSQL thread-safe avec vérification de santé
+Remplace SimpleConnectionPool (non thread-safe) : emprunt bloquant avec délai,
+recyclage par durée de vie et inactivité, métriques pour le monitoring
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.pool import PoolError
+import logging
+
+logger = logging.getLogger(__name__)
+
+class PoolTimeoutError(PoolError):
+    """Aucune connexion libérée avant la fin du délai d'attente"""
+
+class HealthCheckedConnectionPool:
+    """Pool de connexions partagé entre threads
+
+    - getconn() bloque jusqu'à timeout quand les max_connections sont prêtées ;
+    - à l'emprunt, une connexion fermée, trop ancienne (max_lifetime) ou
+      inactive trop longtemps (max_idle) est remplacée, sans aller-retour ;
+      health_check_after (désactivé par défaut) ajoute un SELECT 1 au-delà
+      de ce délai d'inactivité, sinon une connexion n'est validée qu'en cas
+      d'erreur (putconn(close=True)) ;
+    - putconn() annule toute transaction ouverte avant de remettre la
+      connexion à disposition (close=True pour la jeter).
+    """
+
+    def __init__(self, connect: Callable[[], Any], min_connections: int = 2, max_connections: int = 10,
+                 timeout: float = 10.0, max_lifetime: float = 1800.0, max_idle: float = 300.0,
+                 health_check_after: Optional[float] = None):
+        self.connect = connect
+        self.min_connections = min_connections
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.max_idle = max_idle
+        self.health_check_after = health_check_after
+
+        self.condition = threading.Condition(threading.Lock())
+        self.idle: deque = deque()  # (connexion, dernier retour), LIFO : connexions chaudes d'abord
+        self.created_at: Dict[int, float] = {}  # id(connexion) -> date de création (prêtées et libres)
+        self.in_use = 0
+        self.opening = 0  # Connexions en cours d'ouverture (places réservées)
+        self.waiting = 0
+        self.closed = False
+        self.counters = {
+            'borrows': 0, 'timeouts': 0, 'created': 0, 'closed': 0,
+            'recycled_lifetime': 0, 'recycled_idle': 0, 'health_check_failures': 0,
+            'total_wait_time': 0.0, 'max_wait_time': 0.0
+        }
+
+        for _ in range(min_connections):
+            self.idle.append((self._open(), time.time()))
+        register_pool(self)
+
+    def _open(self):
+        conn = self.connect()
+        with self.condition:
+            self.created_at[id(conn)] = time.time()
+            self.counters['created'] += 1
+        return conn
+
+    def _close(self, conn, reason: Optional[str] = None) -> None:
+        """Fermer une connexion (hors verrou) et libérer sa place"""
+        try:
+            if not conn.closed:
+                conn.close()
+        except Exception:
+            pass
+        with self.condition:
+            self.created_at.pop(id(conn), None)
+            self.counters['closed'] += 1
+            if reason:
+                self.counters[reason] += 1
+            self.condition.notify()
+
+    def _is_healthy(self, conn, last_used: float, now: float) -> Optional[str]:
+        """None si la connexion est utilisable, sinon le motif de recyclage"""
+        if conn.closed:
+            return 'health_check_failures'
+        if now - self.created_at.get(id(conn), now) > self.max_lifetime:
+            return 'recycled_lifetime'
+        if now - last_used > self.max_idle:
+            return 'recycled_idle'
+        if self.health_check_after is not None and now - last_used > self.health_check_after:
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                conn.rollback()
+            except Exception:
+                return 'health_check_failures'
+        return None
+
+    def getconn(self, timeout: Optional[float] = None):
+        """Emprunter une connexion saine (PoolTimeoutError après timeout secondes)"""
+        timeout = self.timeout if timeout is None else timeout
+        started = time.time()
+        deadline = started + timeout
+
+        while True:
+            candidate = None
+            with self.condition:
+                if self.closed:
+                    raise PoolError("Pool de connexions fermé")
+                while not self.idle and self.in_use + self.opening + len(self.idle) >= self.max_connections:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        self.counters['timeouts'] += 1
+                        raise PoolTimeoutError(
+                            f"Aucune connexion disponible après {timeout}s ({self.max_connections} prêtées)"
+                        )
+                    self.waiting += 1
+                    try:
+                        self.condition.wait(remaining)
+                    finally:
+                        self.waiting -= 1
+                if self.idle:
+                    candidate = self.idle.pop()
+                else:
+                    self.opening += 1
+
+            if candidate is None:
+                try:
+                    conn = self._open()
+                except Exception:
+                    with self.condition:
+                        self.opening -= 1
+                        self.condition.notify()
+                    raise
+                with self.condition:
+                    self.opening -= 1
+                    self._borrowed(started)
+                return conn
+
+            conn, last_used = candidate
+            # Vérification hors verrou : un SELECT 1 ne bloque pas les autres threads
+            with self.condition:
+                self.opening += 1
+            reason = self._is_healthy(conn, last_used, time.time())
+            with self.condition:
+                self.opening -= 1
+                if reason is None:
+                    self._borrowed(started)
+                    return conn
+            self._close(conn, reason)
+
+    def _borrowed(self, started: float) -> None:
+        """Comptabiliser un emprunt (sous verrou)"""
+        wait = time.time() - started
+        self.in_use += 1
+        self.counters['borrows'] += 1
+        self.counters['total_wait_time'] += wait
+        self.counters['max_wait_time'] = max(self.counters['max_wait_time'], wait)
+
+    def putconn(self, conn, close: bool = False) -> None:
+        """Rendre une connexion empruntée (close=True : connexion suspecte, la jeter)"""
+        with self.condition:
+            if id(conn) not in self.created_at:
+                raise PoolError("Connexion inconnue du pool")
+            self.in_use -= 1
+
+        if not close and not conn.closed:
+            try:
+                # Une transaction laissée ouverte ne doit pas suivre la connexion
+                if conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except Exception:
+                close = True
+
+        if close or conn.closed or self.closed:
+            self._close(conn)
+            return
+
+        with self.condition:
+            self.idle.append((conn, time.time()))
+            self.condition.notify()
+
+    def closeall(self) -> None:
+        """Fermer les connexions libres ; les connexions prêtées sont fermées à leur retour"""
+        with self.condition:
+            self.closed = True
+            idle, self.idle = list(self.idle), deque()
+            self.condition.notify_all()
+        for conn, _ in idle:
+            self._close(conn)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Métriques du pool (connexions prêtées, libres, threads en attente, temps d'attente)"""
+        with self.condition:
+            stats = dict(self.counters)
+            stats.update({
+                'in_use': self.in_use,
+                'idle': len(self.idle),
+                'waiting': self.waiting,
+                'total': len(self.created_at),
+                'min_connections': self.min_connections,
+                'max_connections': self.max_connections
+            })
+        stats['avg_wait_time'] = round(stats['total_wait_time'] / stats['borrows'], 6) if stats['borrows'] else 0
+        stats['total_wait_time'] = round(stats['total_wait_time'], 6)
+        stats['max_wait_time'] = round(stats['max_wait_time'], 6)
+        return stats
+
+# Pools ouverts dans le processus (lus par performance_monitor)
+_pools: List[HealthCheckedConnectionPool] = []
+_pools_lock = threading.Lock()
+
+def register_pool(pool: HealthCheckedConnectionPool) -> None:
+    with _pools_lock:
+        _pools.append(pool)
+
+def get_pool_stats() -> List[Dict[str, Any]]:
+    """Métriques de tous les pools encore ouverts"""
+    with _pools_lock:
+        _pools[:] = [pool for pool in _pools if not pool.closed]
+        pools = list(_pools)
+    return [pool.get_stats() for pool in pools]
@@ -10,6 +10,7 @@ import threading
 import time
 from datetime import datetime
 from simple_flask_app import app
+from config import Config
 from optimized_database import optimized_db
 from cache_manager import cache_manager
 from performance_monitor import performance_monitor
@@ -23,7 +24,7 @@ def initialize_system():
     print("📊 Monitoring des performances activé")
     
     # Initialiser la base de données optimisée
-    optimized_db.init_tables()
+    optimized_db.ensure_schema()
     print("🗄️  Base de données optimisée configurée")
     
     # Initialiser le cache manager
@@ -39,6 +40,12 @@ def initialize_system():
     cache_thread = threading.Thread(target=cleanup_cache_periodically, daemon=True)
     cache_thread.start()
     
+    # Précharger l'encodeur partagé hors du chemin des requêtes
+    if Config.ML_WARMUP:
+        from models.model_registry import model_registry
+        threading.Thread(target=model_registry.warm_up, daemon=True).start()
+        print("🧠 Préchauffage des modèles lancé")
+    
     print("✅ Système initialisé avec succès")
 
 def main():
@@ -7,6 +7,12 @@ from typing import Dict, List, Tuple
 import logging
 import os
 
+from config import Config
+from models.embedding_store import embedding_store
+from models.inference_scheduler import InferenceScheduler
+from models.model_export import export_models, load_runner
+from models.model_registry import model_registry
+
 logger = logging.getLogger(__name__)
 
 class ThreatLSTM(nn.Module):
@@ -75,29 +81,44 @@ class AttentionThreatClassifier(nn.Module):
             nn.Linear(hidden_dim // 2, num_classes)
         )
         
-    def forward(self, x):
-        # x shape: (seq_len, batch, input_dim)
-        attn_output, _ = self.attention(x, x, x)
+    def forward(self, x, key_padding_mask=None):
+        # x shape: (seq_len, batch, input_dim) ; key_padding_mask (batch, seq_len), True = padding
+        attn_output, _ = self.attention(x, x, x, key_padding_mask=key_padding_mask)
         x = self.norm1(x + attn_output)
         
-        # Global average pooling
-        x = torch.mean(x, dim=0)
+        # Global average pooling (positions de padding exclues)
+        if key_padding_mask is None:
+            x = torch.mean(x, dim=0)
+        else:
+            weights = (~key_padding_mask).transpose(0, 1).unsqueeze(-1).to(x.dtype)
+            x = (x * weights).sum(dim=0) / weights.sum(dim=0).clamp(min=1.0)
         return self.classifier(x)
 
 class DeepLearningThreatEngine:
     """Moteur principal pour les modèles deep learning"""
     
-    def __init__(self, model_path: str = "./models/deep_learning/"):
+    def __init__(self, model_path: str = "./models/deep_learning/", runtime: str = None):
         self.model_path = model_path
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        # 'eager', 'torchscript' (gelé) ou 'onnx' (onnxruntime CPU)
+        self.runtime = runtime or Config.ML_RUNTIME
         
         # Initialiser les modèles
         self.lstm_model = ThreatLSTM()
         self.autoencoder = ThreatAutoencoder()
         self.attention_classifier = AttentionThreatClassifier()
         
-        # Charger les modèles pré-entraînés s'ils existent
+        # Charger les modèles pré-entraînés s'ils existent (les autres gardent des poids aléatoires)
+        self.trained_models = set()
         self._load_models()
+        self.runners = self._load_runners()
+        
+        # Une file de micro-lots par modèle, partagée par toutes les requêtes
+        self.schedulers = {
+            'lstm': InferenceScheduler('threat_lstm', self._lstm_batch),
+            'autoencoder': InferenceScheduler('threat_autoencoder', self._autoencoder_batch),
+            'attention': InferenceScheduler('attention_classifier', self._attention_batch)
+        }
         
     def _load_models(self):
         """Charger les modèles pré-entraînés"""
@@ -105,37 +126,95 @@ class DeepLearningThreatEngine:
             lstm_path = f"{self.model_path}/threat_lstm.pth"
             if os.path.exists(lstm_path):
                 self.lstm_model.load_state_dict(torch.load(lstm_path, map_location=self.device))
+                self.trained_models.add('lstm')
                 logger.info("Modèle LSTM chargé avec succès")
                 
             autoencoder_path = f"{self.model_path}/threat_autoencoder.pth"
             if os.path.exists(autoencoder_path):
                 self.autoencoder.load_state_dict(torch.load(autoencoder_path, map_location=self.device))
+                self.trained_models.add('autoencoder')
                 logger.info("Autoencoder chargé avec succès")
                 
             attention_path = f"{self.model_path}/attention_classifier.pth"
             if os.path.exists(attention_path):
                 self.attention_classifier.load_state_dict(torch.load(attention_path, map_location=self.device))
+                self.trained_models.add('attention')
                 logger.info("Classifieur attention chargé avec succès")
                 
         except Exception as e:
             logger.error(f"Erreur lors du chargement des modèles: {str(e)}")
     
+    def _eager_modules(self) -> Dict[str, nn.Module]:
+        return {'lstm': self.lstm_model, 'autoencoder': self.autoencoder, 'attention': self.attention_classifier}
+    
+    def _load_runners(self) -> Dict:
+        """Exécuteurs du runtime configuré (module eager si le graphe exporté manque)"""
+        for module in self._eager_modules().values():
+            module.eval()
+        return {
+            name: load_runner(name, self.runtime, self.model_path, module)
+            for name, module in self._eager_modules().items()
+        }
+    
+    def _infer(self, model: str, item):
+        """Sortie d'un modèle pour une entrée, via sa file de micro-lots (ou directement)"""
+        scheduler = self.schedulers[model]
+        if Config.ML_INFERENCE_BATCHING:
+            return scheduler.infer(item, timeout=Config.ML_INFERENCE_TIMEOUT)
+        return scheduler.batch_fn([item])[0]
+    
+    def _lstm_batch(self, sequences: List[List[List[float]]]) -> List[float]:
+        """Passe LSTM par lot ; les séquences sont regroupées par longueur (pas de padding)"""
+        outputs = [None] * len(sequences)
+        by_length = {}
+        for i, sequence in enumerate(sequences):
+            by_length.setdefault(len(sequence), []).append(i)
+        
+        with torch.inference_mode():
+            for indices in by_length.values():
+                X = torch.FloatTensor([sequences[i] for i in indices])
+                for i, prediction in zip(indices, self.runners['lstm'](X).squeeze(-1).tolist()):
+                    outputs[i] = prediction
+        return outputs
+    
+    def _autoencoder_batch(self, feature_rows: List[List[float]]) -> List[Tuple[float, np.ndarray]]:
+        """Reconstruction par lot : (erreur quadratique moyenne, reconstruction) par entrée"""
+        X = torch.FloatTensor(feature_rows)
+        with torch.inference_mode():
+            reconstructed = self.runners['autoencoder'](X)
+        errors = torch.mean((X - reconstructed) ** 2, dim=1)
+        return list(zip(errors.tolist(), reconstructed.numpy()))
+    
+    def _attention_batch(self, sequences: List[torch.Tensor]) -> List[torch.Tensor]:
+        """Classification par lot : séquences d'embeddings paddées, masque de padding
+
+        Le masque est toujours transmis (graphes exportés à deux entrées) ; sans
+        padding il est entièrement faux et le résultat est celui du module sans masque.
+        """
+        lengths = [sequence.shape[0] for sequence in sequences]
+        max_length = max(lengths)
+        X = torch.zeros(max_length, len(sequences), sequences[0].shape[1])
+        padding_mask = torch.ones(len(sequences), max_length, dtype=torch.bool)
+        for i, sequence in enumerate(sequences):
+            X[:lengths[i], i] = sequence
+            padding_mask[i, :lengths[i]] = False
+        
+        with torch.inference_mode():
+            logits = self.runners['attention'](X, padding_mask)
+            probabilities = torch.softmax(logits, dim=-1)
+        return list(probabilities)
+    
     def predict_threat_evolution(self, threat_history: List[Dict]) -> Dict:
         """Prédiction avancée d'évolution des menaces avec LSTM"""
         try:
             # Préparation des données
             features = self._extract_features_from_history(threat_history)
             
-            # Conversion en tenseur
-            X = torch.FloatTensor(features).unsqueeze(0)  # Add batch dimension
-            
-            # Prédiction
-            self.lstm_model.eval()
-            with torch.no_grad():
-                prediction = self.lstm_model(X)
+            # Prédiction (regroupée avec les requêtes concurrentes)
+            prediction = self._infer('lstm', features)
                 
             return {
-                'next_score': float(prediction.item()),
+                'next_score': float(prediction),
                 'confidence': self._calculate_lstm_confidence(features),
                 'trend_analysis': self._analyze_deep_trend(features),
                 'risk_factors': self._identify_risk_factors(features)
@@ -151,16 +230,8 @@ class DeepLearningThreatEngine:
             # Extraction des caractéristiques
             features = self._extract_threat_features(threat_data)
             
-            # Conversion en tenseur
-            X = torch.FloatTensor(features).unsqueeze(0)
-            
-            # Reconstruction
-            self.autoencoder.eval()
-            with torch.no_grad():
-                reconstructed = self.autoencoder(X)
-                
-            # Calcul de l'erreur de reconstruction
-            reconstruction_error = torch.mean((X - reconstructed) ** 2).item()
+            # Reconstruction (regroupée avec les requêtes concurrentes)
+            reconstruction_error, reconstructed = self._infer('autoencoder', features)
             
             # Seuil d'anomalie (à ajuster selon les données)
             anomaly_threshold = 0.1
@@ -170,37 +241,22 @@ class DeepLearningThreatEngine:
                 'is_anomaly': bool(is_anomaly),
                 'reconstruction_error': float(reconstruction_error),
                 'anomaly_score': min(reconstruction_error / anomaly_threshold, 1.0),
-                'explanation': self._explain_anomaly(features, reconstructed.squeeze().numpy())
+                'explanation': self._explain_anomaly(features, reconstructed)
             }
             
         except Exception as e:
             logger.error(f"Erreur détection anomalies: {str(e)}")
             return {'is_anomaly': False, 'reconstruction_error': 0.0}
     
-    def classify_with_attention(self, threat_documents: List[str]) -> Dict:
+    def classify_with_attention(self, threat_documents: List[str], batch_size: int = None,
+                                hashes: List[str] = None) -> Dict:
         """Classification avancée avec mécanisme d'attention"""
         try:
-            # Preprocessing des documents (utiliser BERT embeddings)
-            from transformers import AutoTokenizer, AutoModel
-            
-            tokenizer = AutoTokenizer.from_pretrained('bert-base-multilingual-cased')
-            model = AutoModel.from_pretrained('bert-base-multilingual-cased')
+            # Embeddings BERT relus du stockage ; seuls les textes inconnus passent dans l'encodeur
+            X = torch.from_numpy(embedding_store.encode(threat_documents, batch_size=batch_size, hashes=hashes))
             
-            embeddings = []
-            for doc in threat_documents:
-                inputs = tokenizer(doc, return_tensors='pt', max_length=512, truncation=True)
-                with torch.no_grad():
-                    outputs = model(**inputs)
-                    embeddings.append(outputs.last_hidden_state.mean(dim=1).squeeze())
-            
-            # Stack embeddings
-            X = torch.stack(embeddings)
-            
-            # Classification avec attention
-            self.attention_classifier.eval()
-            with torch.no_grad():
-                logits = self.attention_classifier(X)
-                probabilities = torch.softmax(logits, dim=-1)
+            # Classification avec attention (regroupée avec les requêtes concurrentes)
+            probabilities = self._infer('attention', X)
                 
             # Mapping des classes
             classes = ['low', 'medium', 'high', 'critical']
@@ -322,6 +378,10 @@ class DeepLearningThreatEngine:
         # pour retourner les poids d'attention
         return [0.1, 0.3, 0.4, 0.2]  # Exemple
     
+    def get_scheduler_stats(self) -> Dict:
+        """État des files d'inférence (taille des lots, latence max, requêtes en attente)"""
+        return {name: scheduler.get_stats() for name, scheduler in self.schedulers.items()}
+    
     def save_models(self):
         """Sauvegarder tous les modèles"""
         try:
@@ -331,7 +391,19 @@ class DeepLearningThreatEngine:
             torch.save(self.autoencoder.state_dict(), f"{self.model_path}/threat_autoencoder.pth")
             torch.save(self.attention_classifier.state_dict(), f"{self.model_path}/attention_classifier.pth")
             
+            # Graphes optimisés à côté des .pth, puis exécuteurs rechargés sur les nouveaux poids
+            for module in self._eager_modules().values():
+                module.eval()
+            export_models(self._eager_modules(), self.model_path, Config.ML_EXPORT_FORMATS)
+            self.runners = self._load_runners()
+            
             logger.info("Modèles deep learning sauvegardés avec succès")
             
         except Exception as e:
             logger.error(f"Erreur sauvegarde modèles: {str(e)}")
+
+def get_threat_engine() -> DeepLearningThreatEngine:
+    """Moteur deep learning partagé du processus (chargé une fois via le registre)"""
+    return model_registry.get('threat_engine')
+
+model_registry.register('threat_engine', lambda: DeepLearningThreatEngine(Config.ML_MODEL_PATH))
@@ -0,0 +1,359 @@
+"""
+Stockage persistant des embeddings de texte
+Chaque vecteur est indexé par (modèle, empreinte sha256 du contenu) : un texte
+déjà encodé (reclustering, reclassification) n'est plus repassé dans
+l'encodeur. Les empreintes sont celles de l'ingestion (metadata['hash']).
+
+Un espace par modèle (et longueur de troncature) contient :
+- meta.json : dimension, génération courante, modèle ;
+- vectors.<génération>.f16 : vecteurs float16 bruts, lus par memory-map ;
+- index.<génération>.tsv : lignes "empreinte<TAB>ligne", en ajout seul.
+
+Les écritures sont des ajouts sous verrou de fichier (plusieurs workers) ;
+une entrée d'index n'est écrite qu'après son vecteur. La compaction réécrit
+une nouvelle génération sans doublons ni lignes orphelines, puis bascule
+meta.json atomiquement.
+
+Usage: python -m models.embedding_store compact [--model ID] [--keep-hashes FICHIER]
+"""
+
+import argparse
+import fcntl
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Sequence
+import logging
+
+import numpy as np
+
+from config import Config
+from models.model_registry import get_text_encoder
+
+logger = logging.getLogger(__name__)
+
+DTYPE = np.float16
+
+def content_hash(text: str) -> str:
+    """Empreinte du contenu, identique à celle calculée à l'ingestion"""
+    return hashlib.sha256(str(text).encode()).hexdigest()
+
+class EmbeddingNamespace:
+    """Vecteurs d'un modèle : index en mémoire et fichier de vecteurs mappé"""
+
+    def __init__(self, directory: str, model_id: str):
+        self.directory = directory
+        self.model_id = model_id
+        self.dim = None
+        self.generation = None
+        self.index: Dict[str, int] = {}
+        self.index_offset = 0  # Octets de l'index déjà lus
+        self.vectors = None  # np.memmap (lignes x dim), remappé quand le fichier grandit
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.lock = threading.RLock()
+
+    # ------------------------------------------------------------------
+    # Fichiers
+    # ------------------------------------------------------------------
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _vectors_path(self, generation: int) -> str:
+        return self._path(f"vectors.{generation}.f16")
+
+    def _index_path(self, generation: int) -> str:
+        return self._path(f"index.{generation}.tsv")
+
+    @contextmanager
+    def _file_lock(self):
+        """Verrou exclusif inter-processus (écritures et compaction)"""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path('.lock'), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_meta(self) -> Optional[Dict]:
+        try:
+            with open(self._path('meta.json')) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, generation: int, dim: int) -> None:
+        tmp_path = self._path('meta.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({'model_id': self.model_id, 'dim': dim, 'dtype': 'float16', 'generation': generation}, f)
+        os.replace(tmp_path, self._path('meta.json'))
+
+    def _row_count(self) -> int:
+        try:
+            return os.path.getsize(self._vectors_path(self.generation)) // (self.dim * DTYPE().itemsize)
+        except OSError:
+            return 0
+
+    def refresh(self) -> None:
+        """Relire les entrées ajoutées par d'autres processus (ou une nouvelle génération)"""
+        with self.lock:
+            meta = self._read_meta()
+            if meta is None:
+                return
+            if meta['generation'] != self.generation:
+                self.generation, self.dim = meta['generation'], meta['dim']
+                self.index, self.index_offset, self.vectors = {}, 0, None
+
+            try:
+                with open(self._index_path(self.generation), 'rb') as f:
+                    f.seek(self.index_offset)
+                    data = f.read()
+            except OSError:
+                return
+            # Une ligne incomplète (écriture en cours) sera relue au prochain passage
+            complete = data[:data.rfind(b'\n') + 1]
+            self.index_offset += len(complete)
+            for line in complete.decode().splitlines():
+                digest, _, row = line.partition('\t')
+                if row.isdigit():
+                    self.index[digest] = int(row)
+
+    def _mapped_vectors(self, row: int):
+        """Vue mappée couvrant au moins la ligne row"""
+        if self.vectors is None or row >= self.vectors.shape[0]:
+            rows = self._row_count()
+            if rows == 0:
+                return None
+            self.vectors = np.memmap(self._vectors_path(self.generation), dtype=DTYPE, mode='r',
+                                     shape=(rows, self.dim))
+        return self.vectors
+
+    # ------------------------------------------------------------------
+    # Lecture / écriture
+    # ------------------------------------------------------------------
+
+    def lookup(self, digests: Sequence[str]) -> Dict[str, np.ndarray]:
+        """Vecteurs (float32) déjà stockés pour ces empreintes"""
+        with self.lock:
+            if any(digest not in self.index for digest in digests):
+                self.refresh()
+
+            found = {}
+            for digest in digests:
+                row = self.index.get(digest)
+                vectors = self._mapped_vectors(row) if row is not None else None
+                if vectors is not None and row < vectors.shape[0]:
+                    found[digest] = np.asarray(vectors[row], dtype=np.float32)
+            self.hits += sum(1 for digest in digests if digest in found)
+            self.misses += sum(1 for digest in digests if digest not in found)
+            return found
+
+    def add(self, digests: Sequence[str], vectors: np.ndarray) -> None:
+        """Ajouter des vecteurs (vecteur d'abord, entrée d'index ensuite)"""
+        vectors = np.ascontiguousarray(vectors, dtype=DTYPE)
+        with self.lock, self._file_lock():
+            self.refresh()
+            if self.generation is None:
+                self.generation, self.dim = 0, vectors.shape[1]
+                self._write_meta(self.generation, self.dim)
+            if vectors.shape[1] != self.dim:
+                raise ValueError(f"Dimension {vectors.shape[1]} incompatible avec le stockage ({self.dim})")
+
+            new = [i for i, digest in enumerate(digests) if digest not in self.index]
+            if not new:
+                return
+            first_row = self._row_count()
+            with open(self._vectors_path(self.generation), 'ab') as f:
+                # Ligne partielle laissée par une écriture interrompue : écrasée
+                f.truncate(first_row * self.dim * DTYPE().itemsize)
+                f.write(vectors[new].tobytes())
+            with open(self._index_path(self.generation), 'a') as f:
+                f.write(''.join(f"{digests[i]}\t{first_row + offset}\n" for offset, i in enumerate(new)))
+            self.writes += len(new)
+            self.refresh()
+
+    def compact(self, keep_hashes: Optional[Iterable[str]] = None) -> Dict:
+        """Réécrire une génération sans doublons ni lignes orphelines
+
+        Avec keep_hashes, seules ces empreintes sont conservées (documents encore en base).
+        """
+        keep = set(keep_hashes) if keep_hashes is not None else None
+        with self.lock, self._file_lock():
+            self.refresh()
+            if self.generation is None:
+                return {'model_id': self.model_id, 'entries': 0, 'removed_rows': 0}
+
+            rows_before = self._row_count()
+            live = sorted(
+                (row, digest) for digest, row in self.index.items()
+                if row < rows_before and (keep is None or digest in keep)
+            )
+            source = self._mapped_vectors(rows_before - 1) if rows_before else None
+            generation = self.generation + 1
+
+            with open(self._vectors_path(generation), 'wb') as f:
+                for start in range(0, len(live), 4096):
+                    f.write(np.ascontiguousarray(source[[row for row, _ in live[start:start + 4096]]]).tobytes())
+            with open(self._index_path(generation), 'w') as f:
+                f.write(''.join(f"{digest}\t{new_row}\n" for new_row, (_, digest) in enumerate(live)))
+
+            old_generation = self.generation
+            self._write_meta(generation, self.dim)
+            self.refresh()
+            for path in (self._vectors_path(old_generation), self._index_path(old_generation)):
+                if os.path.exists(path):
+                    os.remove(path)
+
+        logger.info(f"Embeddings {self.model_id} compactés: {rows_before} -> {len(live)} lignes")
+        return {'model_id': self.model_id, 'entries': len(live), 'removed_rows': rows_before - len(live)}
+
+    def get_stats(self) -> Dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'model_id': self.model_id,
+                'entries': len(self.index),
+                'dim': self.dim,
+                'generation': self.generation,
+                'hits': self.hits,
+                'misses': self.misses,
+                'writes': self.writes,
+                'hit_rate': round(self.hits / lookups * 100, 2) if lookups else 0,
+                'disk_bytes': self._row_count() * self.dim * DTYPE().itemsize if self.dim else 0
+            }
+
+class EmbeddingStore:
+    """Embeddings persistants par (modèle, empreinte du contenu), un espace par modèle"""
+
+    def __init__(self, directory: Optional[str] = None, enabled: Optional[bool] = None):
+        self.directory = directory or Config.ML_EMBEDDING_DIR
+        self.enabled = Config.ML_EMBEDDING_CACHE if enabled is None else enabled
+        self.namespaces: Dict[str, EmbeddingNamespace] = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def namespace_key(model_id: str, max_length: int) -> str:
+        # La troncature change l'embedding : elle fait partie de la clé
+        return f"{model_id.replace('/', '--')}--L{max_length}"
+
+    def namespace(self, model_id: Optional[str] = None, max_length: Optional[int] = None) -> EmbeddingNamespace:
+        model_id = model_id or Config.ML_ENCODER_MODEL
+        key = self.namespace_key(model_id, max_length or Config.ML_ENCODER_MAX_LENGTH)
+        with self.lock:
+            if key not in self.namespaces:
+                namespace = EmbeddingNamespace(os.path.join(self.directory, key), model_id)
+                namespace.refresh()
+                self.namespaces[key] = namespace
+            return self.namespaces[key]
+
+    def encode(self, texts: List[str], model_id: Optional[str] = None, batch_size: Optional[int] = None,
+               hashes: Optional[Sequence[Optional[str]]] = None) -> np.ndarray:
+        """Embeddings (len(texts), dim) en float32, l'encodeur ne traitant que les textes inconnus
+
+        hashes : empreintes déjà connues (metadata['hash'] de l'ingestion), None
+        pour les calculer.
+        """
+        texts = [str(text) for text in texts]
+        if not self.enabled:
+            return get_text_encoder(model_id).encode(texts, batch_size=batch_size).numpy()
+
+        digests = [
+            (hashes[i] if hashes is not None and hashes[i] else None) or content_hash(text)
+            for i, text in enumerate(texts)
+        ]
+        namespace = self.namespace(model_id)
+        found = namespace.lookup(digests)
+
+        # Textes inconnus, chacun encodé une seule fois même s'il est répété
+        missing = {}
+        for digest, text in zip(digests, texts):
+            if digest not in found:
+                missing.setdefault(digest, text)
+        if missing:
+            encoded = get_text_encoder(model_id).encode(list(missing.values()), batch_size=batch_size).numpy()
+            try:
+                namespace.add(list(missing), encoded)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Embeddings non persistés: {e}")
+            found.update(zip(missing, encoded))
+
+        if not texts:
+            return np.empty((0, namespace.dim or 0), dtype=np.float32)
+        return np.stack([found[digest] for digest in digests]).astype(np.float32)
+
+    def _disk_namespaces(self) -> List[EmbeddingNamespace]:
+        """Espaces présents sur disque (créés par ce processus ou un autre)"""
+        if not os.path.isdir(self.directory):
+            return []
+        namespaces = []
+        for key in sorted(os.listdir(self.directory)):
+            path = os.path.join(self.directory, key)
+            try:
+                with open(os.path.join(path, 'meta.json')) as f:
+                    model_id = json.load(f)['model_id']
+            except (OSError, ValueError, KeyError):
+                continue
+            with self.lock:
+                if key not in self.namespaces:
+                    self.namespaces[key] = EmbeddingNamespace(path, model_id)
+                namespaces.append(self.namespaces[key])
+        return namespaces
+
+    def compact(self, model_id: Optional[str] = None, keep_hashes: Optional[Iterable[str]] = None) -> List[Dict]:
+        """Compacter les espaces d'un modèle (toutes troncatures), ou tous ceux présents sur disque"""
+        keep = set(keep_hashes) if keep_hashes is not None else None
+        return [
+            namespace.compact(keep) for namespace in self._disk_namespaces()
+            if model_id is None or namespace.model_id == model_id
+        ]
+
+    def get_stats(self) -> Dict:
+        """Entrées, hits/misses et taille disque par espace chargé"""
+        with self.lock:
+            namespaces = dict(self.namespaces)
+        stats = {key: namespace.get_stats() for key, namespace in namespaces.items()}
+        hits = sum(item['hits'] for item in stats.values())
+        misses = sum(item['misses'] for item in stats.values())
+        return {
+            'enabled': self.enabled,
+            'directory': self.directory,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / (hits + misses) * 100, 2) if hits + misses else 0,
+            'namespaces': stats
+        }
+
+# Instance globale du stockage d'embeddings
+embedding_store = EmbeddingStore()
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintenance du stockage d'embeddings")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    compact_parser = subparsers.add_parser('compact', help="Supprimer doublons et lignes orphelines")
+    compact_parser.add_argument('--model', default=None, help="Identifiant du modèle (tous par défaut)")
+    compact_parser.add_argument('--keep-hashes', default=None,
+                                help="Fichier d'empreintes à conserver (une par ligne) ; les autres sont supprimées")
+    subparsers.add_parser('stats', help="Entrées et taille par modèle")
+    args = parser.parse_args()
+
+    if args.command == 'compact':
+        keep_hashes = None
+        if args.keep_hashes:
+            with open(args.keep_hashes) as f:
+                keep_hashes = [line.strip() for line in f if line.strip()]
+        for result in embedding_store.compact(args.model, keep_hashes):
+            print(f"✓ {result['model_id']}: {result['entries']} entrées, {result['removed_rows']} lignes supprimées")
+    else:
+        for namespace in embedding_store._disk_namespaces():
+            namespace.refresh()
+            stats = namespace.get_stats()
+            print(f"{stats['model_id']}: {stats['entries']} entrées, dim {stats['dim']}, "
+                  f"{stats['disk_bytes'] / 1024 / 1024:.1f} Mo")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Ordonnanceur d'inférence par micro-lots, partagé entre les requêtes
+Chaque modèle a sa file : un thread worker attend la première requête, en
+regroupe d'autres pendant au plus max_latency_ms (ou jusqu'à max_batch_size),
+exécute une seule passe avant sur le lot puis résout les futures des appelants.
+Débit, taille des lots et latences (p99) sont transmis à performance_monitor.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, List, Optional
+import logging
+
+from config import Config
+from performance_monitor import performance_monitor
+
+logger = logging.getLogger(__name__)
+
+class InferenceScheduler:
+    """File d'un modèle et son worker de micro-lots
+
+    batch_fn reçoit la liste des entrées du lot et renvoie une sortie par entrée,
+    dans le même ordre.
+    """
+
+    def __init__(self, name: str, batch_fn: Callable[[List[Any]], List[Any]],
+                 max_batch_size: Optional[int] = None, max_latency_ms: Optional[float] = None):
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size or Config.ML_INFERENCE_MAX_BATCH
+        self.max_latency = (Config.ML_INFERENCE_MAX_LATENCY_MS if max_latency_ms is None else max_latency_ms) / 1000
+        self.requests = queue.Queue()
+        self.worker = None
+        self.lock = threading.Lock()
+
+    def _ensure_worker(self) -> None:
+        with self.lock:
+            if self.worker is None or not self.worker.is_alive():
+                self.worker = threading.Thread(target=self._run, name=f"inference-{self.name}", daemon=True)
+                self.worker.start()
+
+    def submit(self, item) -> Future:
+        """Placer une entrée dans la file ; le résultat arrive par la future"""
+        future = Future()
+        self._ensure_worker()
+        self.requests.put((item, future, time.perf_counter()))
+        return future
+
+    def infer(self, item, timeout: Optional[float] = None):
+        """Appel bloquant : sortie du modèle pour une entrée, calculée dans un lot"""
+        future = self.submit(item)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            future.cancel()  # Retirée du prochain lot si elle n'a pas encore démarré
+            raise
+
+    def _collect_batch(self) -> List:
+        """Première requête (attente bloquante) puis regroupement jusqu'à l'échéance"""
+        batch = [self.requests.get()]
+        deadline = batch[0][2] + self.max_latency
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self.requests.get(timeout=remaining) if remaining > 0 else self.requests.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            # Futures annulées par l'appelant (délai dépassé) : entrées ignorées
+            batch = [entry for entry in self._collect_batch() if entry[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            items = [item for item, _, _ in batch]
+            started = time.perf_counter()
+            try:
+                outputs = self.batch_fn(items)
+                if len(outputs) != len(items):
+                    raise RuntimeError(f"{self.name}: {len(outputs)} sorties pour {len(items)} entrées")
+            except Exception as e:
+                logger.error(f"Erreur d'inférence par lot ({self.name}): {e}")
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            finished = time.perf_counter()
+            for (_, future, _), output in zip(batch, outputs):
+                future.set_result(output)
+            performance_monitor.record_inference_batch(
+                self.name, len(batch), finished - started,
+                [finished - enqueued for _, _, enqueued in batch]
+            )
+
+    def get_stats(self) -> Dict:
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_latency_ms': self.max_latency * 1000,
+            'queued': self.requests.qsize(),
+            'worker_alive': self.worker is not None and self.worker.is_alive()
+        }
@@ -0,0 +1,147 @@
+"""
+Export des modèles deep learning vers des graphes optimisés pour le CPU
+save_models écrit, à côté de chaque .pth, une version TorchScript (.pt,
+tracée) et ONNX (.onnx) ; DeepLearningThreatEngine peut ensuite servir depuis
+TorchScript gelé (freeze + optimize_for_inference) ou onnxruntime.
+
+Chaque exécuteur prend et renvoie des tenseurs torch : les fonctions de lot
+du moteur ne dépendent pas du runtime choisi.
+"""
+
+import os
+from typing import Callable, Dict, List, Tuple
+import logging
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+RUNTIMES = ('eager', 'torchscript', 'onnx')
+ONNX_OPSET = 17
+
+try:
+    import onnxruntime
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+
+# Fichier de base, noms des entrées/sorties et axes dynamiques de chaque modèle
+MODEL_SPECS = {
+    'lstm': {
+        'file': 'threat_lstm',
+        'inputs': ['sequences'],
+        'outputs': ['score'],
+        'dynamic_axes': {'sequences': {0: 'batch', 1: 'steps'}, 'score': {0: 'batch'}}
+    },
+    'autoencoder': {
+        'file': 'threat_autoencoder',
+        'inputs': ['features'],
+        'outputs': ['reconstructed'],
+        'dynamic_axes': {'features': {0: 'batch'}, 'reconstructed': {0: 'batch'}}
+    },
+    'attention': {
+        'file': 'attention_classifier',
+        'inputs': ['embeddings', 'padding_mask'],
+        'outputs': ['logits'],
+        'dynamic_axes': {'embeddings': {0: 'steps', 1: 'batch'}, 'padding_mask': {0: 'batch', 1: 'steps'},
+                         'logits': {0: 'batch'}}
+    }
+}
+
+def model_paths(model_path: str, name: str) -> Dict[str, str]:
+    base = os.path.join(model_path, MODEL_SPECS[name]['file'])
+    return {'eager': f"{base}.pth", 'torchscript': f"{base}.pt", 'onnx': f"{base}.onnx"}
+
+def example_inputs(name: str, module: torch.nn.Module, batch: int = 2, steps: int = 5) -> Tuple[torch.Tensor, ...]:
+    """Entrées d'exemple pour le traçage et l'export (la longueur varie pour exercer le masque)"""
+    generator = torch.Generator().manual_seed(0)
+    if name == 'lstm':
+        return (torch.rand(batch, steps, module.lstm.input_size, generator=generator),)
+    if name == 'autoencoder':
+        return (torch.rand(batch, module.encoder[0].in_features, generator=generator),)
+
+    embeddings = torch.randn(steps, batch, module.norm1.normalized_shape[0], generator=generator)
+    padding_mask = torch.zeros(batch, steps, dtype=torch.bool)
+    padding_mask[1:, steps - 2:] = True  # Séquences plus courtes que la plus longue du lot
+    return embeddings, padding_mask
+
+def export_model(name: str, module: torch.nn.Module, model_path: str, formats: List[str]) -> List[str]:
+    """Exporter un modèle (en mode eval) ; renvoie les fichiers écrits"""
+    spec = MODEL_SPECS[name]
+    paths = model_paths(model_path, name)
+    inputs = example_inputs(name, module)
+    written = []
+    module.eval()
+
+    with torch.no_grad():
+        if 'torchscript' in formats:
+            traced = torch.jit.trace(module, inputs)
+            traced.save(paths['torchscript'])
+            written.append(paths['torchscript'])
+
+        if 'onnx' in formats:
+            torch.onnx.export(
+                module, inputs, paths['onnx'],
+                input_names=spec['inputs'],
+                output_names=spec['outputs'],
+                dynamic_axes=spec['dynamic_axes'],
+                opset_version=ONNX_OPSET
+            )
+            written.append(paths['onnx'])
+    return written
+
+def export_models(modules: Dict[str, torch.nn.Module], model_path: str, formats: List[str]) -> List[str]:
+    """Exporter tous les modèles ; un échec n'empêche pas les autres exports"""
+    written = []
+    for name, module in modules.items():
+        try:
+            written.extend(export_model(name, module, model_path, formats))
+        except Exception as e:
+            logger.error(f"Export du modèle {name} impossible: {e}")
+    return written
+
+class OnnxRunner:
+    """Session onnxruntime CPU appelée comme un module (tenseurs torch en entrée et en sortie)"""
+
+    def __init__(self, path: str):
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = torch.get_num_threads()
+        self.session = onnxruntime.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+        self.input_names = [node.name for node in self.session.get_inputs()]
+
+    def __call__(self, *inputs: torch.Tensor) -> torch.Tensor:
+        feeds = {name: tensor.numpy() for name, tensor in zip(self.input_names, inputs)}
+        return torch.from_numpy(self.session.run(None, feeds)[0])
+
+def load_runner(name: str, runtime: str, model_path: str, eager_module: torch.nn.Module) -> Callable:
+    """Exécuteur d'un modèle pour le runtime demandé, module eager en repli
+
+    Le graphe exporté doit être au moins aussi récent que le .pth : sinon il
+    ne reflète pas les poids chargés et le module eager est utilisé.
+    """
+    if runtime not in RUNTIMES:
+        raise ValueError(f"Runtime inconnu: {runtime} (attendu: {', '.join(RUNTIMES)})")
+    if runtime == 'eager':
+        return eager_module
+
+    paths = model_paths(model_path, name)
+    path = paths[runtime]
+    if not os.path.exists(path):
+        logger.warning(f"{path} introuvable, {name} servi en eager")
+        return eager_module
+    if os.path.exists(paths['eager']) and os.path.getmtime(path) < os.path.getmtime(paths['eager']):
+        logger.warning(f"{path} plus ancien que {paths['eager']}, {name} servi en eager")
+        return eager_module
+
+    try:
+        if runtime == 'torchscript':
+            module = torch.jit.load(path, map_location='cpu').eval()
+            return torch.jit.optimize_for_inference(torch.jit.freeze(module))
+        if not ONNXRUNTIME_AVAILABLE:
+            logger.warning(f"onnxruntime n'est pas installé, {name} servi en eager")
+            return eager_module
+        return OnnxRunner(path)
+    except Exception as e:
+        logger.error(f"Chargement du graphe {path} impossible, {name} servi en eager: {e}")
+        return eager_module
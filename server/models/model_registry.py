@@ -0,0 +1,222 @@
+"""
+Registre des modèles partagés par le processus
+Chaque encodeur (tokenizer + modèle transformers) est chargé une seule fois,
+à la première utilisation ou au préchauffage, puis partagé en lecture seule
+entre les threads. Le registre mesure la durée de chargement et la mémoire
+résidente consommée par chaque modèle.
+"""
+
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+import logging
+
+import psutil
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+class TextEncoder:
+    """Encodeur de texte partagé (modèle en eval, sans gradient)
+
+    Le modèle est sûr en lecture concurrente ; le tokenizer rapide ne l'est
+    pas (sa configuration de troncature est mutée à chaque appel), d'où le
+    verrou autour de la tokenisation.
+    """
+
+    def __init__(self, model_id: str, tokenizer, model, source: str):
+        self.model_id = model_id
+        self.tokenizer = tokenizer
+        self.model = model
+        self.source = source  # Répertoire local ou identifiant du hub
+        self.tokenizer_lock = threading.Lock()
+
+    def tokenize(self, texts, **kwargs):
+        with self.tokenizer_lock:
+            return self.tokenizer(texts, **kwargs)
+
+    def parameter_bytes(self) -> int:
+        return sum(p.numel() * p.element_size() for p in self.model.parameters())
+
+    def encode(self, texts: List[str], batch_size: Optional[int] = None, max_length: Optional[int] = None):
+        """Embeddings (len(texts), hidden) par micro-lots, dans l'ordre des textes
+
+        Les textes sont tokenisés sans padding, triés par longueur puis
+        découpés en micro-lots : chaque lot n'est paddé qu'à sa plus longue
+        séquence. Le mean pooling ignore les positions de padding.
+        """
+        import torch
+
+        batch_size = batch_size or Config.ML_ENCODER_BATCH_SIZE
+        max_length = max_length or Config.ML_ENCODER_MAX_LENGTH
+        hidden_size = self.model.config.hidden_size
+        if not texts:
+            return torch.empty(0, hidden_size)
+
+        encoded = self.tokenize(list(texts), max_length=max_length, truncation=True, padding=False)
+        # Tri par longueur : les lots regroupent des séquences de taille voisine
+        order = sorted(range(len(texts)), key=lambda i: len(encoded['input_ids'][i]))
+        embeddings = torch.empty(len(texts), hidden_size)
+
+        with torch.inference_mode():
+            for start in range(0, len(order), batch_size):
+                indices = order[start:start + batch_size]
+                features = [{key: encoded[key][i] for key in encoded.keys()} for i in indices]
+                with self.tokenizer_lock:
+                    batch = self.tokenizer.pad(features, padding='longest', return_tensors='pt')
+
+                hidden = self.model(**batch).last_hidden_state
+                mask = batch['attention_mask'].unsqueeze(-1).to(hidden.dtype)
+                pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1.0)
+                embeddings[torch.tensor(indices)] = pooled.float()
+
+        return embeddings
+
+class ModelRegistry:
+    """Modèles chargés une fois par processus, à la demande (get) ou au préchauffage (warm_up)"""
+
+    def __init__(self):
+        self.loaders: Dict[str, Callable[[], Any]] = {}
+        self.models: Dict[str, Any] = {}
+        self.load_locks: Dict[str, threading.Lock] = {}
+        self.stats: Dict[str, Dict] = {}
+        self.lock = threading.Lock()
+
+    def register(self, name: str, loader: Callable[[], Any]) -> None:
+        """Déclarer un modèle ; loader() n'est appelé qu'au premier get()"""
+        with self.lock:
+            self.loaders[name] = loader
+            self.load_locks.setdefault(name, threading.Lock())
+
+    def get(self, name: str):
+        """Modèle chargé (chargement unique même en cas d'appels concurrents)"""
+        model = self.models.get(name)
+        if model is not None:
+            return model
+
+        with self.lock:
+            if name not in self.loaders:
+                raise KeyError(f"Modèle non enregistré: {name}")
+            load_lock = self.load_locks[name]
+
+        with load_lock:
+            model = self.models.get(name)
+            if model is None:
+                model = self._load(name)
+        return model
+
+    def _load(self, name: str):
+        process = psutil.Process(os.getpid())
+        rss_before = process.memory_info().rss
+        started = time.perf_counter()
+
+        model = self.loaders[name]()
+
+        load_time = time.perf_counter() - started
+        rss_after = process.memory_info().rss
+        self.stats[name] = {
+            'load_time': round(load_time, 3),
+            'rss_delta_bytes': max(rss_after - rss_before, 0),
+            'rss_after_bytes': rss_after,
+            'parameter_bytes': model.parameter_bytes() if hasattr(model, 'parameter_bytes') else None,
+            'source': getattr(model, 'source', None),
+            'loaded_at': time.time()
+        }
+        self.models[name] = model
+        logger.info(f"Modèle {name} chargé en {load_time:.1f}s "
+                    f"(+{self.stats[name]['rss_delta_bytes'] / 1024 / 1024:.0f} Mo résidents)")
+        return model
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self.models
+
+    def warm_up(self, names: Optional[List[str]] = None) -> Dict[str, bool]:
+        """Charger les modèles demandés (tous par défaut) ; retourne le succès par modèle"""
+        results = {}
+        for name in names or list(self.loaders):
+            try:
+                self.get(name)
+                results[name] = True
+            except Exception as e:
+                logger.error(f"Préchauffage du modèle {name} impossible: {e}")
+                results[name] = False
+        return results
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """Modèles enregistrés, chargés ou non, avec durée de chargement et mémoire"""
+        with self.lock:
+            names = list(self.loaders)
+        return {
+            name: dict(self.stats.get(name, {}), loaded=name in self.models)
+            for name in names
+        }
+
+def configure_torch_threads() -> int:
+    """Fixer le nombre de threads intra-op de torch (nœuds CPU uniquement)
+
+    ML_TORCH_THREADS > 0 est appliqué tel quel ; 0 répartit les cœurs
+    physiques entre les WEB_CONCURRENCY workers du serveur, pour éviter que
+    chaque processus ne lance autant de threads qu'il y a de cœurs.
+    """
+    import torch
+
+    threads = Config.ML_TORCH_THREADS
+    if threads <= 0:
+        cores = psutil.cpu_count(logical=False) or os.cpu_count() or 1
+        threads = max(cores // max(Config.WEB_CONCURRENCY, 1), 1)
+    if torch.get_num_threads() != threads:
+        torch.set_num_threads(threads)
+    return threads
+
+def local_model_dir(model_id: str) -> str:
+    """Répertoire local d'un modèle (ML_ENCODER_DIR/<identifiant avec / remplacés>)"""
+    return os.path.join(Config.ML_ENCODER_DIR, model_id.replace('/', '--'))
+
+def load_text_encoder(model_id: str) -> TextEncoder:
+    """Charger tokenizer et modèle, en priorité depuis le répertoire local
+
+    Sans copie locale : ML_OFFLINE limite la recherche au cache transformers,
+    sinon le modèle est téléchargé puis enregistré dans le répertoire local
+    pour les démarrages suivants sans réseau.
+    """
+    from transformers import AutoModel, AutoTokenizer
+
+    configure_torch_threads()
+    local_dir = local_model_dir(model_id)
+    if os.path.exists(os.path.join(local_dir, 'config.json')):
+        tokenizer = AutoTokenizer.from_pretrained(local_dir, local_files_only=True)
+        model = AutoModel.from_pretrained(local_dir, local_files_only=True)
+        source = local_dir
+    else:
+        tokenizer = AutoTokenizer.from_pretrained(model_id, local_files_only=Config.ML_OFFLINE)
+        model = AutoModel.from_pretrained(model_id, local_files_only=Config.ML_OFFLINE)
+        source = model_id
+        try:
+            os.makedirs(local_dir, exist_ok=True)
+            tokenizer.save_pretrained(local_dir)
+            model.save_pretrained(local_dir)
+            source = local_dir
+        except Exception as e:
+            logger.warning(f"Copie locale du modèle {model_id} impossible: {e}")
+
+    # Partagé en lecture seule entre threads
+    model.eval()
+    model.requires_grad_(False)
+    return TextEncoder(model_id, tokenizer, model, source)
+
+def encoder_key(model_id: str) -> str:
+    return f"encoder:{model_id}"
+
+def get_text_encoder(model_id: Optional[str] = None) -> TextEncoder:
+    """Encodeur partagé du processus (ML_ENCODER_MODEL par défaut)"""
+    model_id = model_id or Config.ML_ENCODER_MODEL
+    name = encoder_key(model_id)
+    if name not in model_registry.loaders:
+        model_registry.register(name, lambda: load_text_encoder(model_id))
+    return model_registry.get(name)
+
+# Instance globale du registre ; l'encodeur par défaut est déclaré sans être chargé
+model_registry = ModelRegistry()
+model_registry.register(encoder_key(Config.ML_ENCODER_MODEL), lambda: load_text_encoder(Config.ML_ENCODER_MODEL))
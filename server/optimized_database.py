@@ -1,288 +1,428 @@
+import base64
+import hashlib
 import os
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
 import psycopg2
-from psycopg2.extras import Json, RealDictCursor
-from psycopg2.pool import SimpleConnectionPool
+from psycopg2.extras import Json, NamedTupleCursor, RealDictCursor, execute_values
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional
 import json
 from cache_manager import cache_manager
+from config import Config
+from connection_pool import HealthCheckedConnectionPool
+from performance_monitor import performance_monitor
+from prepared_statements import PreparedStatementConnection, execute_prepared
+from schema_migrations import SCHEMA_MIGRATIONS, SCHEMA_MIGRATIONS_LOCK, SCHEMA_TABLES
+
+# Listes paginées : champ de réponse -> expression SQL (liste blanche de la projection fields=)
+PAGE_COLUMNS = {
+    'threats': {
+        'id': 'id', 'name': 'name', 'description': 'description', 'score': 'score',
+        'severity': 'severity', 'status': 'status', 'source_id': 'source_id',
+        'metadata': 'metadata', 'timestamp': 'created_at'
+    },
+    'actions': {
+        'id': 'id', 'type': 'type', 'description': 'description', 'priority': 'priority',
+        'status': 'status', 'related_threat_id': 'related_threat_id',
+        'created_at': 'created_at', 'metadata': 'metadata'
+    },
+    # Documents du clustering (table threats) : seuls content et metadata demandent une colonne en plus
+    'documents': {
+        'id': None, 'content': 'description', 'source': None, 'type': None,
+        'created_at': None, 'entities': None, 'threat_score': None, 'metadata': 'metadata'
+    }
+}
+
+# Colonnes de threats et mise à jour communes au stockage unitaire et groupé des documents
+DOCUMENT_COLUMNS = "id, name, description, score, severity, status, metadata"
+DOCUMENT_UPSERT = """
+    ON CONFLICT (id) DO UPDATE SET
+        name = EXCLUDED.name,
+        description = EXCLUDED.description,
+        score = EXCLUDED.score,
+        severity = EXCLUDED.severity,
+        metadata = EXCLUDED.metadata,
+        updated_at = NOW()
+"""
 
 class OptimizedDatabase:
-    """Version optimisée de la base de données avec pool de connexions et cache"""
+    """Version optimisée de la base de données avec pool de connexions et cache
 
-    def __init__(self, min_connections=2, max_connections=10):
+    Moteur unique du processus (instance globale optimized_db) : le pool est
+    ouvert et le schéma (DDL + migrations) créé à la première connexion
+    demandée, une seule fois. Les connexions empruntées ne sont pas testées
+    par un aller-retour : une erreur de connexion les fait jeter et rejouer.
+    """
+
+    def __init__(self, min_connections=None, max_connections=None):
         self.connection_pool = None
-        self.init_connection_pool(min_connections, max_connections)
-        self.init_tables()
+        self.pool_lock = threading.Lock()
+        self.min_connections = min_connections or Config.DB_POOL_MIN
+        self.max_connections = max_connections or Config.DB_POOL_MAX
+        self.max_retries = 3
+        self.retry_backoff = Config.DB_RETRY_BACKOFF  # Délai de base, doublé à chaque tentative
+        self.document_listeners = []  # Appelés après chaque document stocké
+        self.schema_lock = threading.RLock()  # Réentrant : le DDL emprunte lui-même des connexions
+        self.schema_ready = False
+        self.schema_initializing = False
+
+    def _connection_params(self) -> Dict:
+        """Paramètres de connexion psycopg2"""
+        # Utiliser DATABASE_URL si disponible, sinon utiliser les variables individuelles
+        database_url = os.getenv('DATABASE_URL')
+
+        if database_url:
+            # Parser DATABASE_URL pour extraire les paramètres
+            from urllib.parse import urlparse
+            parsed = urlparse(database_url)
+
+            return {
+                'host': parsed.hostname,
+                'database': parsed.path[1:],  # Enlever le slash initial
+                'user': parsed.username,
+                'password': parsed.password,
+                'port': parsed.port or 5432,
+                'sslmode': 'require'  # Forcer SSL comme dans l'URL
+            }
+
+        # Fallback sur les variables individuelles
+        return {
+            'host': os.getenv('PGHOST', 'localhost'),
+            'database': os.getenv('PGDATABASE', 'postgres'),
+            'user': os.getenv('PGUSER', 'postgres'),
+            'password': os.getenv('PGPASSWORD', ''),
+            'port': int(os.getenv('PGPORT', '5432'))
+        }
 
     def init_connection_pool(self, min_connections, max_connections):
-        """Initialiser le pool de connexions"""
+        """Initialiser le pool de connexions (l'ancien pool éventuel est fermé)"""
+        with self.pool_lock:
+            old_pool, self.connection_pool = self.connection_pool, None
+            if old_pool is not None:
+                old_pool.closeall()
+
+            self.connection_pool = self._create_pool(min_connections, max_connections)
+
+    def _open_pool(self):
+        """Créer le pool s'il n'existe pas encore (premier emprunt ou base injoignable jusqu'ici)"""
+        if self.connection_pool is None:
+            with self.pool_lock:
+                if self.connection_pool is None:
+                    self.connection_pool = self._create_pool(self.min_connections, self.max_connections)
+        return self.connection_pool
+
+    def _create_pool(self, min_connections, max_connections):
+        """Nouveau pool de connexions (None si la base est injoignable)"""
         try:
-            # Utiliser DATABASE_URL si disponible, sinon utiliser les variables individuelles
-            database_url = os.getenv('DATABASE_URL')
-            
-            if database_url:
-                # Parser DATABASE_URL pour extraire les paramètres
-                from urllib.parse import urlparse
-                parsed = urlparse(database_url)
-                
-                self.connection_pool = SimpleConnectionPool(
-                    min_connections,
-                    max_connections,
-                    host=parsed.hostname,
-                    database=parsed.path[1:],  # Enlever le slash initial
-                    user=parsed.username,
-                    password=parsed.password,
-                    port=parsed.port or 5432,
-                    sslmode='require'  # Forcer SSL comme dans l'URL
-                )
-            else:
-                # Fallback sur les variables individuelles
-                self.connection_pool = SimpleConnectionPool(
-                    min_connections,
-                    max_connections,
-                    host=os.getenv('PGHOST', 'localhost'),
-                    database=os.getenv('PGDATABASE', 'postgres'),
-                    user=os.getenv('PGUSER', 'postgres'),
-                    password=os.getenv('PGPASSWORD', ''),
-                    port=int(os.getenv('PGPORT', '5432'))
-                )
-            
+            params = self._connection_params()
+            pool = HealthCheckedConnectionPool(
+                lambda: psycopg2.connect(connection_factory=PreparedStatementConnection, **params),
+                min_connections,
+                max_connections,
+                timeout=Config.DB_POOL_TIMEOUT,
+                max_lifetime=Config.DB_POOL_MAX_LIFETIME,
+                max_idle=Config.DB_POOL_MAX_IDLE
+            )
             print("Pool de connexions initialisé avec succès")
+            return pool
         except Exception as e:
             print(f"Erreur lors de l'initialisation du pool: {e}")
+            return None
 
-    def get_connection(self):
-        """Obtenir une connexion du pool"""
+    def get_connection(self, timeout: Optional[float] = None):
+        """Obtenir une connexion saine du pool (attente bornée si le pool est épuisé)"""
+        if not self.schema_ready:
+            self.ensure_schema()
+        if self._open_pool() is None:
+            return None
         try:
-            return self.connection_pool.getconn()
+            return self.connection_pool.getconn(timeout)
         except Exception as e:
             print(f"Erreur lors de l'obtention de la connexion: {e}")
             return None
 
-    def return_connection(self, conn):
-        """Retourner une connexion au pool"""
+    @contextmanager
+    def transaction(self):
+        """Curseur (RealDictCursor) sur une connexion du pool : commit en sortie, rollback sur erreur"""
+        conn = self.get_connection()
+        if conn is None:
+            raise psycopg2.OperationalError("Aucune connexion disponible")
+
+        broken = False
+        try:
+            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                yield cursor
+            conn.commit()
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        except Exception:
+            try:
+                conn.rollback()
+            except:
+                broken = True
+            raise
+        finally:
+            self.return_connection(conn, close=broken)
+
+    def ensure_schema(self) -> bool:
+        """Créer tables et migrations une fois par processus (au premier emprunt de connexion)"""
+        if self.schema_ready:
+            return True
+        with self.schema_lock:
+            if self.schema_ready or self.schema_initializing:
+                return self.schema_ready
+            # Base injoignable : schema_ready reste faux, nouvel essai au prochain emprunt
+            if self._open_pool() is None:
+                return False
+            self.schema_initializing = True
+            try:
+                self.schema_ready = self.init_tables()
+            finally:
+                self.schema_initializing = False
+        return self.schema_ready
+
+    def return_connection(self, conn, close: bool = False):
+        """Retourner une connexion au pool (close=True : connexion en erreur, la jeter)"""
         try:
-            self.connection_pool.putconn(conn)
+            self.connection_pool.putconn(conn, close=close)
         except Exception as e:
             print(f"Erreur lors du retour de la connexion: {e}")
 
+    def get_pool_stats(self) -> Dict:
+        """Métriques du pool de connexions"""
+        return self.connection_pool.get_stats() if self.connection_pool else {}
+
+    def _backoff(self, attempt: int) -> None:
+        """Attente exponentielle avec gigue avant une nouvelle tentative"""
+        delay = min(self.retry_backoff * (2 ** attempt), 2.0)
+        time.sleep(delay * random.uniform(0.5, 1.0))
+
     def execute_query(self, query: str, params: tuple = None, fetch_one: bool = False, fetch_all: bool = False):
         """Exécuter une requête avec gestion optimisée des connexions"""
-        conn = None
-        retries = 3
-        
+        return self._execute(query, lambda cursor: cursor.execute(query, params), fetch_one, fetch_all)
+
+    def execute_prepared(self, name: str, params: tuple = (), fetch_one: bool = False, fetch_all: bool = False):
+        """Exécuter une requête du registre PREPARED_QUERIES (préparée une fois par connexion)"""
+        return self._execute(f"EXECUTE {name}", lambda cursor: execute_prepared(cursor, name, params),
+                             fetch_one, fetch_all)
+
+    def _execute(self, label: str, run, fetch_one: bool, fetch_all: bool):
+        """Exécuter run(cursor) avec nouvelles tentatives ; durée transmise à performance_monitor"""
+        retries = self.max_retries
+
         for attempt in range(retries):
-            try:
-                conn = self.get_connection()
-                if conn is None:
-                    # Essayer de recréer le pool de connexions
-                    self.init_connection_pool(2, 10)
-                    conn = self.get_connection()
-                    if conn is None:
-                        return None
-
-                # Tester la connexion
-                if conn.closed:
-                    print(f"Connexion fermée, tentative {attempt + 1}/{retries}")
-                    if conn:
-                        self.return_connection(conn)
+            conn = self.get_connection()
+            if conn is None:
+                if attempt < retries - 1:
+                    self._backoff(attempt)
                     continue
-                
+                return None
+
+            broken = False
+            success = False
+            start_time = time.perf_counter()
+            try:
                 with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-                    cursor.execute(query, params)
+                    run(cursor)
 
                     if fetch_one:
                         result = cursor.fetchone()
-                        return dict(result) if result else None
+                        result = dict(result) if result else None
                     elif fetch_all:
-                        results = cursor.fetchall()
-                        return [dict(row) for row in results]
+                        result = [dict(row) for row in cursor.fetchall()]
                     else:
-                        conn.commit()
-                        return cursor.rowcount
-                        
+                        result = cursor.rowcount
+                    # Aussi après une lecture : INSERT/UPDATE ... RETURNING doivent être
+                    # validés, putconn annule toute transaction encore ouverte
+                    conn.commit()
+                    success = True
+                    return result
+
             except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+                # Connexion cassée : elle est jetée, le pool en ouvrira une neuve
                 print(f"Erreur de connexion (tentative {attempt + 1}/{retries}): {e}")
-                if conn:
-                    try:
-                        self.return_connection(conn)
-                    except:
-                        pass
-                    conn = None
-                
-                if attempt < retries - 1:
-                    # Recréer le pool de connexions
-                    self.init_connection_pool(2, 10)
-                    continue
-                else:
-                    return None
-                    
+                broken = True
+
             except Exception as e:
                 print(f"Erreur lors de l'exécution de la requête: {e}")
-                if conn:
-                    try:
-                        conn.rollback()
-                    except:
-                        pass
+                try:
+                    conn.rollback()
+                except:
+                    broken = True
                 return None
             finally:
-                if conn:
-                    try:
-                        self.return_connection(conn)
-                    except:
-                        pass
-            
-            # Si on arrive ici, la requête a réussi
-            break
-        
+                performance_monitor.record_database_query(label, time.perf_counter() - start_time, success)
+                self.return_connection(conn, close=broken)
+
+            if attempt < retries - 1:
+                self._backoff(attempt)
+
         return None
 
-    def init_tables(self):
-        """Initialiser les tables avec requêtes optimisées"""
+    def iter_query(self, query: str, params: tuple = None, batch_size: int = 2000,
+                   as_dict: bool = False) -> Iterator:
+        """Parcourir le résultat d'une requête par lots (curseur serveur nommé)
+
+        Seules batch_size lignes sont en mémoire à la fois. Les lignes sont des
+        namedtuples (dicts si as_dict). La connexion reste empruntée jusqu'à
+        l'épuisement ou la fermeture du générateur ; une erreur en cours de
+        lecture est propagée (pas de nouvelle tentative, le flux est entamé).
+        """
+        conn = self.get_connection()
+        if conn is None:
+            print("Aucune connexion disponible pour la lecture en flux")
+            return
+
+        broken = False
         try:
-            # Créer les tables avec index optimisés
-            queries = [
-                """
-                CREATE TABLE IF NOT EXISTS users (
-                    id SERIAL PRIMARY KEY,
-                    username VARCHAR(50) UNIQUE NOT NULL,
-                    password VARCHAR(255) NOT NULL,
-                    clearance_level INTEGER DEFAULT 1,
-                    name VARCHAR(100),
-                    email VARCHAR(100),
-                    is_active BOOLEAN DEFAULT TRUE,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                );
-                CREATE INDEX IF NOT EXISTS idx_users_username ON users(username);
-                CREATE INDEX IF NOT EXISTS idx_users_active ON users(is_active);
-                """,
-                """
-                CREATE TABLE IF NOT EXISTS threats (
-                    id SERIAL PRIMARY KEY,
-                    name VARCHAR(200) NOT NULL,
-                    description TEXT,
-                    score REAL NOT NULL,
-                    severity VARCHAR(20) NOT NULL,
-                    status VARCHAR(20) DEFAULT 'active',
-                    source_id INTEGER,
-                    metadata JSONB,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                );
-                CREATE INDEX IF NOT EXISTS idx_threats_score ON threats(score);
-                CREATE INDEX IF NOT EXISTS idx_threats_status ON threats(status);
-                CREATE INDEX IF NOT EXISTS idx_threats_created ON threats(created_at);
-                CREATE INDEX IF NOT EXISTS idx_threats_severity ON threats(severity);
-                """,
-                """
-                CREATE TABLE IF NOT EXISTS scenarios (
-                    id SERIAL PRIMARY KEY,
-                    name VARCHAR(200) NOT NULL,
-                    description TEXT,
-                    conditions JSONB NOT NULL,
-                    actions JSONB NOT NULL,
-                    status VARCHAR(20) DEFAULT 'active',
-                    priority INTEGER DEFAULT 3,
-                    validity_window VARCHAR(20) DEFAULT 'P7D',
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                );
-                CREATE INDEX IF NOT EXISTS idx_scenarios_status ON scenarios(status);
-                CREATE INDEX IF NOT EXISTS idx_scenarios_priority ON scenarios(priority);
-                """,
-                """
-                CREATE TABLE IF NOT EXISTS actions (
-                    id SERIAL PRIMARY KEY,
-                    type VARCHAR(50) NOT NULL,
-                    description TEXT,
-                    priority VARCHAR(10) DEFAULT 'P3',
-                    status VARCHAR(20) DEFAULT 'pending',
-                    related_threat_id INTEGER,
-                    related_scenario_id INTEGER,
-                    metadata JSONB,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                );
-                CREATE INDEX IF NOT EXISTS idx_actions_status ON actions(status);
-                CREATE INDEX IF NOT EXISTS idx_actions_priority ON actions(priority);
-                CREATE INDEX IF NOT EXISTS idx_actions_threat ON actions(related_threat_id);
-                """,
-                """
-                CREATE TABLE IF NOT EXISTS alerts (
-                    id SERIAL PRIMARY KEY,
-                    type VARCHAR(50) NOT NULL,
-                    severity VARCHAR(20) NOT NULL,
-                    title VARCHAR(200) NOT NULL,
-                    message TEXT,
-                    is_read BOOLEAN DEFAULT FALSE,
-                    related_threat_id INTEGER,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                );
-                CREATE INDEX IF NOT EXISTS idx_alerts_read ON alerts(is_read);
-                CREATE INDEX IF NOT EXISTS idx_alerts_severity ON alerts(severity);
-                CREATE INDEX IF NOT EXISTS idx_alerts_created ON alerts(created_at);
-                """,
-                """
-                CREATE TABLE IF NOT EXISTS prescriptions (
-                    id SERIAL PRIMARY KEY,
-                    threat_id VARCHAR(100) NOT NULL,
-                    priority VARCHAR(10) NOT NULL,
-                    category VARCHAR(50) NOT NULL,
-                    time_estimate VARCHAR(50),
-                    confidence REAL NOT NULL,
-                    actions JSONB NOT NULL,
-                    resources JSONB,
-                    status VARCHAR(20) DEFAULT 'active',
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                );
-                CREATE INDEX IF NOT EXISTS idx_prescriptions_status ON prescriptions(status);
-                CREATE INDEX IF NOT EXISTS idx_prescriptions_priority ON prescriptions(priority);
-                CREATE INDEX IF NOT EXISTS idx_prescriptions_threat ON prescriptions(threat_id);
-                """,
-                """
-                CREATE TABLE IF NOT EXISTS data_sources (
-                    id SERIAL PRIMARY KEY,
-                    name VARCHAR(100) NOT NULL,
-                    type VARCHAR(50) NOT NULL,
-                    url VARCHAR(255),
-                    status VARCHAR(20) DEFAULT 'active',
-                    last_ingested TIMESTAMP,
-                    throughput REAL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                );
-                CREATE INDEX IF NOT EXISTS idx_data_sources_status ON data_sources(status);
-                CREATE INDEX IF NOT EXISTS idx_data_sources_type ON data_sources(type);
-                """,
-                """
-                CREATE TABLE IF NOT EXISTS document_analysis (
-                    id SERIAL PRIMARY KEY,
-                    document_id VARCHAR(100) NOT NULL,
-                    analysis_type VARCHAR(50) NOT NULL,
-                    analysis_result JSONB,
-                    confidence_score REAL DEFAULT 0.0,
-                    processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    metadata JSONB
-                );
-                CREATE INDEX IF NOT EXISTS idx_document_analysis_doc ON document_analysis(document_id);
-                CREATE INDEX IF NOT EXISTS idx_document_analysis_type ON document_analysis(analysis_type);
-                CREATE INDEX IF NOT EXISTS idx_document_analysis_processed ON document_analysis(processed_at);
-                """
-            ]
+            cursor_factory = RealDictCursor if as_dict else NamedTupleCursor
+            with conn.cursor(name=f"stream_{uuid.uuid4().hex}", cursor_factory=cursor_factory) as cursor:
+                cursor.itersize = batch_size
+                cursor.execute(query, params)
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    for row in rows:
+                        yield dict(row) if as_dict else row
+        except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+            print(f"Erreur de connexion pendant la lecture en flux: {e}")
+            broken = True
+            raise
+        except Exception as e:
+            print(f"Erreur lors de la lecture en flux: {e}")
+            raise
+        finally:
+            # Le pool annule la transaction du curseur nommé
+            self.return_connection(conn, close=broken)
+
+    def allocate_ids(self, table: str, count: int) -> Optional[List[int]]:
+        """Réserver count ids de la séquence SERIAL de table (None en cas d'échec)
+
+        Les lignes insérées ensuite avec ces ids explicites sont identifiées
+        sans dépendre de l'ordre des lignes de RETURNING.
+        """
+        if count <= 0:
+            return []
+        rows = self.execute_query(
+            "SELECT nextval(pg_get_serial_sequence(%s, 'id')) AS id FROM generate_series(1, %s)",
+            (table, count), fetch_all=True
+        )
+        if rows is None or len(rows) != count:
+            return None
+        return [row['id'] for row in rows]
+
+    def execute_values_query(self, query: str, rows: List[tuple], template: str = None, fetch_all: bool = False):
+        """Exécuter une requête multi-lignes (VALUES %s) en un seul aller-retour"""
+        if not rows:
+            return [] if fetch_all else 0
 
-            for query in queries:
-                self.execute_query(query)
+        conn = self.get_connection()
+        if conn is None:
+            return None
+
+        broken = False
+        try:
+            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                # page_size = nombre de lignes : une seule instruction SQL
+                results = execute_values(cursor, query, rows, template=template,
+                                         page_size=len(rows), fetch=fetch_all)
+                conn.commit()
+                return [dict(row) for row in results] if fetch_all else cursor.rowcount
+        except Exception as e:
+            print(f"Erreur lors de l'exécution de la requête groupée: {e}")
+            broken = isinstance(e, (psycopg2.OperationalError, psycopg2.InterfaceError))
+            try:
+                conn.rollback()
+            except:
+                broken = True
+            return None
+        finally:
+            self.return_connection(conn, close=broken)
+
+    def init_tables(self) -> bool:
+        """Initialiser les tables avec requêtes optimisées (préférer ensure_schema)"""
+        try:
+            # Tables de base (schema_migrations.SCHEMA_TABLES), puis migrations versionnées
+            created = True
+            for query in SCHEMA_TABLES:
+                created = self.execute_query(query) is not None and created
+
+            self.apply_migrations()
 
             # Créer les utilisateurs par défaut si nécessaire
             user_count = self.execute_query("SELECT COUNT(*) FROM users", fetch_one=True)
             if user_count and user_count['count'] == 0:
                 self._create_default_users()
 
+            return created and user_count is not None
+
         except Exception as e:
             print(f"Erreur lors de l'initialisation des tables: {e}")
+            return False
+
+    def apply_migrations(self) -> List[int]:
+        """Appliquer les migrations de SCHEMA_MIGRATIONS pas encore enregistrées
+
+        Chaque migration s'exécute dans sa propre transaction, sous verrou
+        consultatif, et n'est inscrite dans schema_migrations qu'une fois
+        réussie. Retourne les versions appliquées par cet appel.
+        """
+        conn = self.get_connection()
+        if conn is None:
+            print("Aucune connexion disponible pour les migrations")
+            return []
+
+        applied = []
+        broken = False
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS schema_migrations (
+                        version INTEGER PRIMARY KEY,
+                        description VARCHAR(200),
+                        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                """)
+                conn.commit()
+
+                for version, description, sql in SCHEMA_MIGRATIONS:
+                    cursor.execute("SELECT pg_advisory_xact_lock(%s)", (SCHEMA_MIGRATIONS_LOCK,))
+                    cursor.execute("SELECT 1 FROM schema_migrations WHERE version = %s", (version,))
+                    if cursor.fetchone():
+                        conn.rollback()
+                        continue
+                    cursor.execute(sql)
+                    cursor.execute(
+                        "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                        (version, description)
+                    )
+                    conn.commit()
+                    applied.append(version)
+                    print(f"Migration {version} appliquée: {description}")
+        except Exception as e:
+            print(f"Erreur lors de l'application des migrations: {e}")
+            broken = isinstance(e, (psycopg2.OperationalError, psycopg2.InterfaceError))
+            try:
+                conn.rollback()
+            except:
+                broken = True
+        finally:
+            self.return_connection(conn, close=broken)
+
+        return applied
+
+    def get_schema_version(self) -> int:
+        """Dernière version de migration appliquée (0 si aucune)"""
+        row = self.execute_query("SELECT COALESCE(MAX(version), 0) AS version FROM schema_migrations",
+                                 fetch_one=True)
+        return row['version'] if row else 0
 
     def _create_default_users(self):
         """Créer les utilisateurs par défaut"""
@@ -299,52 +439,165 @@ class OptimizedDatabase:
                 (username, hashed_password, clearance, name, email)
             )
 
-    def get_all_threats_cached(self, force_refresh: bool = False):
-        """Récupérer toutes les menaces avec mise en cache"""
-        cache_key = "all_threats"
+    def get_all_threats_cached(self, force_refresh: bool = False, fields=None):
+        """Récupérer toutes les menaces avec mise en cache (un seul calcul concurrent)
 
-        if not force_refresh:
-            cached_result = cache_manager.get(cache_key)
-            if cached_result:
-                return cached_result
+        fields restreint les colonnes lues (voir PAGE_COLUMNS['threats']) ;
+        get_threats_page pagine au lieu de tout renvoyer.
+        """
+        fields = self._normalize_fields('threats', fields)
+        columns = PAGE_COLUMNS['threats']
+        select = ', '.join(f"{columns[field]} AS {field}" for field in fields)
+
+        # Lecture en flux : une seule copie de la table en mémoire (la liste mise en cache)
+        threats = cache_manager.get_or_compute(
+            "all_threats" if len(fields) == len(columns) else f"all_threats:{','.join(fields)}",
+            lambda: list(self.iter_query(f"""
+                SELECT {select}
+                FROM threats 
+                ORDER BY created_at DESC
+            """, as_dict=True)),
+            180,  # Cache pour 3 minutes
+            namespace='threats', depends_on=['threats'], force_refresh=force_refresh
+        )
 
-        threats = self.execute_query("""
-            SELECT id, name, description, score, severity, status, 
-                   source_id, metadata, created_at as timestamp
-            FROM threats 
-            ORDER BY created_at DESC
-        """, fetch_all=True)
+        return threats or []
 
-        if threats:
-            cache_manager.set(cache_key, threats, 180)  # Cache pour 3 minutes
+    def get_threats_page(self, fields=None, cursor: Optional[str] = None, limit: int = 50) -> Dict:
+        """Page de menaces, de la plus récente à la plus ancienne"""
+        return self._get_page('threats', fields, cursor, limit, ttl=180, depends_on=['threats'])
 
-        return threats or []
+    def get_actions_page(self, fields=None, cursor: Optional[str] = None, limit: int = 50) -> Dict:
+        """Page d'actions, de la plus récente à la plus ancienne"""
+        return self._get_page('actions', fields, cursor, limit, ttl=120, depends_on=['actions'])
+
+    def get_documents_page(self, fields=None, cursor: Optional[str] = None, limit: int = 50) -> Dict:
+        """Page de documents du clustering, du plus récent au plus ancien"""
+        return self._get_page('documents', fields, cursor, limit, ttl=300, depends_on=['threats'])
+
+    def _get_page(self, kind: str, fields, cursor: Optional[str], limit: int,
+                  ttl: int, depends_on: List[str]) -> Dict:
+        """Page keyset (created_at, id) décroissante, projetée sur fields, mise en cache
+
+        La clé de cache couvre la requête SQL et ses paramètres, donc la
+        projection, le curseur et la taille de page. Lève ValueError si un
+        champ ou le curseur est invalide.
+        """
+        fields = self._normalize_fields(kind, fields)
+        table = 'threats' if kind == 'documents' else kind
+        if kind == 'documents':
+            # Colonnes nécessaires au formatage des champs demandés
+            needed = {'id', 'created_at'} | {PAGE_COLUMNS[kind][field] for field in fields} - {None}
+            selects = [f"{column} AS {column}" for column in ('id', 'description', 'metadata', 'created_at') if column in needed]
+        else:
+            selects = [f"{PAGE_COLUMNS[kind][field]} AS {field}" for field in fields]
+
+        conditions, params = [], []
+        if cursor:
+            condition, cursor_params = self.keyset_condition(cursor)
+            conditions.append(condition)
+            params.extend(cursor_params)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        # Une ligne de plus que la page : indique s'il reste une page suivante
+        params.append(limit + 1)
+        query = f"""
+            SELECT {', '.join(selects)}, created_at AS _keyset_created_at, id AS _keyset_id
+            FROM {table}
+            {where}
+            ORDER BY created_at DESC, id DESC
+            LIMIT %s
+        """
+
+        digest = hashlib.sha1(f"{query}|{params}".encode('utf-8')).hexdigest()
+        return cache_manager.get_or_compute(
+            f"{kind}_page:{digest}",
+            lambda: self._fetch_page(kind, fields, query, tuple(params), limit),
+            ttl, namespace=kind, depends_on=depends_on
+        )
+
+    def _fetch_page(self, kind: str, fields: List[str], query: str, params: tuple, limit: int) -> Dict:
+        rows = self.execute_query(query, params, fetch_all=True) or []
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = self.encode_cursor(rows[-1]['_keyset_created_at'], rows[-1]['_keyset_id'])
+
+        items = []
+        for row in rows:
+            if kind == 'documents':
+                document = self._format_document(row)
+                items.append({field: document[field] for field in fields})
+            else:
+                items.append({field: row[field] for field in fields})
+
+        return {'items': items, 'next_cursor': next_cursor, 'limit': limit, 'fields': fields}
+
+    @staticmethod
+    def _normalize_fields(kind: str, fields) -> List[str]:
+        """Champs demandés ('a,b' ou liste), dans l'ordre de PAGE_COLUMNS ; id toujours inclus"""
+        columns = PAGE_COLUMNS[kind]
+        if not fields:
+            return list(columns)
+        if isinstance(fields, str):
+            fields = fields.split(',')
+        requested = {field.strip() for field in fields if field.strip()}
+        unknown = requested - set(columns)
+        if unknown:
+            raise ValueError(f"Champs inconnus: {', '.join(sorted(unknown))} (disponibles: {', '.join(columns)})")
+        requested.add('id')
+        return [field for field in columns if field in requested]
+
+    @classmethod
+    def keyset_condition(cls, cursor: str) -> tuple:
+        """Filtre SQL des lignes après le curseur, pour ORDER BY created_at DESC, id DESC"""
+        created_at, row_id = cls.decode_cursor(cursor)
+        if created_at is None:
+            # NULL en tête de l'ordre décroissant : reste des NULL, puis toutes les dates
+            return "((created_at IS NULL AND id < %s) OR created_at IS NOT NULL)", [row_id]
+        # Comparaison de lignes NULL (donc fausse) pour created_at NULL : lignes déjà parcourues
+        return "(created_at, id) < (%s, %s)", [created_at, row_id]
+
+    @staticmethod
+    def encode_cursor(created_at, row_id) -> str:
+        """Curseur opaque (base64 url) de la dernière ligne d'une page"""
+        raw = json.dumps([created_at.isoformat() if created_at else None, row_id])
+        return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> tuple:
+        """(created_at, id) d'un curseur de pagination (ValueError si invalide)
+
+        created_at vaut None pour une ligne sans date (triée en tête, NULLS FIRST).
+        """
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            created_at, row_id = json.loads(raw)
+            return (datetime.fromisoformat(created_at) if created_at is not None else None), int(row_id)
+        except Exception:
+            raise ValueError("Curseur de pagination invalide")
 
     def get_dashboard_stats_cached(self, force_refresh: bool = False):
         """Récupérer les statistiques du dashboard avec cache"""
-        cache_key = "dashboard_stats"
-
-        # Toujours forcer refresh pour éviter les problèmes de cache
-        # if not force_refresh:
-        #     cached_result = cache_manager.get(cache_key)
-        #     if cached_result:
-        #         return cached_result
-
-        # Requête optimisée pour les statistiques
-        stats_query = """
-            SELECT 
-                COUNT(*) as total_threats,
-                COUNT(CASE WHEN status = 'active' THEN 1 END) as active_threats,
-                AVG(score) as avg_score,
-                COUNT(CASE WHEN severity = 'high' THEN 1 END) as high_severity,
-                COUNT(CASE WHEN severity = 'critical' THEN 1 END) as critical_severity
-            FROM threats
-        """
+        # Les écritures sur threats invalident le tag 'threats' : pas de valeur périmée servie
+        result = cache_manager.get_or_compute(
+            "dashboard_stats", self._compute_dashboard_stats, 120,  # Cache pour 2 minutes
+            depends_on=['threats'], stale_ttl=0, force_refresh=force_refresh
+        )
 
-        stats = self.execute_query(stats_query, fetch_one=True)
+        return result or {
+            'active_threats': 0,
+            'avg_score': 0.0,
+            'high_severity': 0,
+            'critical_severity': 0,
+            'total_threats': 0
+        }
+
+    def _compute_dashboard_stats(self) -> Optional[Dict]:
+        """Statistiques du dashboard lues dans threat_stats (tenue à jour par triggers)"""
+        stats = self.execute_prepared('dashboard_stats', fetch_one=True)
 
         if stats:
-            result = {
+            return {
                 'active_threats': int(stats['active_threats']) if stats['active_threats'] else 0,
                 'avg_score': float(stats['avg_score']) if stats['avg_score'] else 0.0,
                 'high_severity': int(stats['high_severity']) if stats['high_severity'] else 0,
@@ -352,55 +605,84 @@ class OptimizedDatabase:
                 'total_threats': int(stats['total_threats']) if stats['total_threats'] else 0
             }
 
-            cache_manager.set(cache_key, result, 120)  # Cache pour 2 minutes
-            return result
-
-        return {
-            'active_threats': 0,
-            'avg_score': 0.0,
-            'high_severity': 0,
-            'critical_severity': 0,
-            'total_threats': 0
-        }
+        return None
 
     def get_all_documents_cached(self, force_refresh: bool = False):
-        """Récupérer tous les documents avec mise en cache"""
-        cache_key = "all_documents"
+        """Récupérer tous les documents avec mise en cache (un seul calcul concurrent)"""
+        documents = cache_manager.get_or_compute(
+            "all_documents", lambda: list(self.iter_documents()), 300,  # Cache pour 5 minutes
+            namespace='documents', depends_on=['threats'], force_refresh=force_refresh
+        )
 
-        if not force_refresh:
-            cached_result = cache_manager.get(cache_key)
-            if cached_result:
-                return cached_result
+        return documents or []
 
-        documents = self.execute_query("""
+    def iter_documents(self, batch_size: int = 2000) -> Iterator[Dict]:
+        """Parcourir tous les documents en flux, sans cache ni liste intermédiaire"""
+        rows = self.iter_query("""
             SELECT id, name, description, metadata, created_at
             FROM threats 
             ORDER BY created_at DESC
-        """, fetch_all=True)
-
-        if documents:
-            formatted_docs = []
-            for doc in documents:
-                formatted_docs.append({
-                    'id': str(doc['id']),
-                    'content': doc['description'] or '',
-                    'source': 'Database - Threats',
-                    'type': 'THREAT',
-                    'created_at': doc['created_at'].isoformat() if doc['created_at'] else None,
-                    'entities': [],
-                    'threat_score': 0.5,
-                    'metadata': doc['metadata'] if doc['metadata'] else {}
-                })
-
-            cache_manager.set(cache_key, formatted_docs, 300)  # Cache pour 5 minutes
-            return formatted_docs
-
-        return []
-
-    def invalidate_cache(self, patterns: List[str]):
-        """Invalider le cache pour des patterns spécifiques"""
-        for pattern in patterns:
-            cache_manager.invalidate_pattern(pattern)
+        """, batch_size=batch_size, as_dict=True)
+
+        for row in rows:
+            yield self._format_document(row)
+
+    def iter_documents_paged(self, batch_size: int = 500) -> Iterator[Dict]:
+        """Parcourir tous les documents par pages keyset, connexion rendue entre deux pages
+
+        Pour les consommateurs au rythme imprévisible (réponse HTTP en flux) :
+        aucune connexion du pool n'est retenue pendant l'envoi au client. Les
+        pages sont lues à des instants différents (pas d'instantané unique).
+        Lève RuntimeError si une page ne peut pas être lue.
+        """
+        cursor = None
+        while True:
+            condition, params = self.keyset_condition(cursor) if cursor else ("TRUE", [])
+            rows = self.execute_query(f"""
+                SELECT id, name, description, metadata, created_at
+                FROM threats
+                WHERE {condition}
+                ORDER BY created_at DESC, id DESC
+                LIMIT %s
+            """, tuple(params) + (batch_size,), fetch_all=True)
+            if rows is None:
+                raise RuntimeError("Lecture des documents impossible")
+
+            for row in rows:
+                yield self._format_document(row)
+            if len(rows) < batch_size:
+                return
+            cursor = self.encode_cursor(rows[-1]['created_at'], rows[-1]['id'])
+
+    def get_documents_by_ids(self, document_ids: List) -> List[Dict]:
+        """Récupérer uniquement les documents demandés (recherche par clé primaire)"""
+        ids = [int(doc_id) for doc_id in document_ids if str(doc_id).isdigit()]
+        if not ids:
+            return []
+
+        documents = self.execute_prepared('documents_by_ids', (ids,), fetch_all=True)
+
+        return [self._format_document(doc) for doc in documents or []]
+
+    def _format_document(self, doc: Dict) -> Dict:
+        """Convertir une ligne de la table threats au format document du clustering"""
+        return {
+            'id': str(doc['id']),
+            'content': doc.get('description') or '',
+            'source': 'Database - Threats',
+            'type': 'THREAT',
+            'created_at': doc['created_at'].isoformat() if doc['created_at'] else None,
+            'entities': [],
+            'threat_score': 0.5,
+            'metadata': doc.get('metadata') or {}
+        }
+
+    def invalidate_cache(self, tags: List[str]):
+        """Invalider le cache des tags donnés ('*' vide tout le cache)"""
+        if '*' in tags:
+            cache_manager.clear()
+        else:
+            cache_manager.invalidate_tags(tags)
 
     def cleanup_cache(self):
         """Nettoyer le cache expiré"""
@@ -640,83 +922,98 @@ class OptimizedDatabase:
             print(f"Erreur suppression données de test: {str(e)}")
             raise e
 
+    def add_document_listener(self, listener) -> None:
+        """Enregistrer un callback appelé avec chaque document stocké"""
+        self.document_listeners.append(listener)
+    
+    def _notify_document_listeners(self, document: Dict) -> None:
+        """Prévenir les abonnés (index ANN, ...) sans faire échouer le stockage"""
+        for listener in self.document_listeners:
+            try:
+                listener(document)
+            except Exception as e:
+                print(f"Erreur notification document stocké: {e}")
+    
+    def _prepare_document(self, document_data: Dict) -> Dict:
+        """Valeurs d'insertion d'un document (sans l'id) et sa représentation renvoyée à l'appelant
+
+        Les attributs du document sans colonne dans threats (source,
+        classification, catégorie, confiance) sont rangés dans metadata.
+        """
+        # Préparer les données du document
+        doc_id = document_data.get('id', int(time.time()))
+        name = document_data.get('name', 'Document sans nom')
+        content = document_data.get('content', '')
+        doc_type = document_data.get('type', 'text')
+        threat_score = document_data.get('threat_score', 0.0)
+
+        # Déterminer la sévérité basée sur le score
+        if threat_score >= 0.8:
+            severity = 'critical'
+        elif threat_score >= 0.6:
+            severity = 'high'
+        elif threat_score >= 0.4:
+            severity = 'medium'
+        else:
+            severity = 'low'
+
+        # Métadonnées du document
+        metadata = {
+            'document_type': doc_type,
+            'ingestion_time': datetime.now().isoformat(),
+            'processing_type': 'unified_ingestion',
+            'cluster_analysis': 'pending',
+            'source': 'document_ingestion',
+            'classification': 'UNCLASSIFIED',
+            'category': 'document',
+            'confidence': min(threat_score + 0.1, 1.0)  # Confidence légèrement supérieure au score
+        }
+
+        values = (
+            name,
+            content,
+            threat_score,
+            severity,
+            'active',
+            json.dumps(metadata)
+        )
+
+        stored_document = {
+            'id': doc_id,
+            'name': name,
+            'content': content,
+            'type': doc_type,
+            'threat_score': threat_score,
+            'severity': severity,
+            'status': 'stored',
+            'timestamp': datetime.now().isoformat(),
+            'metadata': metadata
+        }
+        return {'values': values, 'document': stored_document}
+
     def store_document(self, document_data: Dict) -> Dict:
         """Stocker un nouveau document dans la base de données"""
         try:
-            import time
-            # Préparer les données du document
-            doc_id = document_data.get('id', int(time.time()))
-            name = document_data.get('name', 'Document sans nom')
-            content = document_data.get('content', '')
-            doc_type = document_data.get('type', 'text')
-            threat_score = document_data.get('threat_score', 0.0)
-            
+            prepared = self._prepare_document(document_data)
+            stored_document = prepared['document']
+
             # Stocker le document comme une menace
-            insert_query = """
-                INSERT INTO threats (id, name, description, threat_score, severity, status, source, timestamp, classification, category, confidence, metadata)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT (id) DO UPDATE SET
-                    name = EXCLUDED.name,
-                    description = EXCLUDED.description,
-                    threat_score = EXCLUDED.threat_score,
-                    severity = EXCLUDED.severity,
-                    timestamp = EXCLUDED.timestamp,
-                    metadata = EXCLUDED.metadata
+            insert_query = f"""
+                INSERT INTO threats ({DOCUMENT_COLUMNS})
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                {DOCUMENT_UPSERT}
                 RETURNING *
             """
-            
-            # Déterminer la sévérité basée sur le score
-            if threat_score >= 0.8:
-                severity = 'critical'
-            elif threat_score >= 0.6:
-                severity = 'high'
-            elif threat_score >= 0.4:
-                severity = 'medium'
-            else:
-                severity = 'low'
-            
-            # Métadonnées du document
-            metadata = {
-                'document_type': doc_type,
-                'ingestion_time': datetime.now().isoformat(),
-                'processing_type': 'unified_ingestion',
-                'cluster_analysis': 'pending'
-            }
-            
+
             # Exécuter l'insertion
-            result = self.execute_query(
-                insert_query,
-                (
-                    doc_id,
-                    name,
-                    content,
-                    threat_score,
-                    severity,
-                    'active',
-                    'document_ingestion',
-                    datetime.now().isoformat(),
-                    'UNCLASSIFIED',
-                    'document',
-                    min(threat_score + 0.1, 1.0),  # Confidence légèrement supérieure au score
-                    json.dumps(metadata)
-                ),
-                fetch_one=True
-            )
-            
+            self.execute_query(insert_query, (stored_document['id'],) + prepared['values'], fetch_one=True)
+
             # Invalider les caches pertinents
-            self.invalidate_cache(['threats*', 'documents*', 'dashboard*'])
+            self.invalidate_cache(['threats', 'documents'])
+
+            self._notify_document_listeners({**document_data, **stored_document})
             
-            return {
-                'id': doc_id,
-                'name': name,
-                'content': content,
-                'type': doc_type,
-                'threat_score': threat_score,
-                'severity': severity,
-                'status': 'stored',
-                'timestamp': datetime.now().isoformat(),
-                'metadata': metadata
-            }
+            return stored_document
             
         except Exception as e:
             print(f"Erreur lors du stockage du document: {e}")
@@ -725,5 +1022,86 @@ class OptimizedDatabase:
                 'status': 'failed'
             }
 
+    def store_documents_bulk(self, documents: Iterable[Dict], batch_size: int = 1000) -> Dict:
+        """Stocker un flux de documents par lots (un INSERT multi-lignes par lot)
+
+        Chaque lot est écrit avec execute_values et validé séparément : un lot
+        en échec n'annule pas les précédents. Les documents sans id reçoivent
+        l'id de la séquence ; pour un même id dans un lot, le dernier l'emporte.
+        Le cache est invalidé une seule fois, à la fin.
+        """
+        summary = {'stored': 0, 'failed': 0, 'batches': 0, 'ids': [], 'errors': []}
+        batch = []
+
+        for document_data in documents:
+            batch.append(document_data)
+            if len(batch) >= batch_size:
+                self._store_documents_batch(batch, summary)
+                batch = []
+        if batch:
+            self._store_documents_batch(batch, summary)
+
+        if summary['stored']:
+            self.invalidate_cache(['threats', 'documents'])
+        summary['errors'] = summary['errors'][:20]
+        return summary
+
+    def _store_documents_batch(self, batch: List[Dict], summary: Dict) -> None:
+        """Écrire un lot en un seul upsert multi-lignes
+
+        Les documents sans id reçoivent d'abord un id de la séquence de
+        threats : chaque ligne est insérée avec un id connu, sans avoir à
+        rapprocher les lignes de RETURNING de celles de VALUES.
+        """
+        summary['batches'] += 1
+        by_id: Dict = {}
+        without_id = []
+        for document_data in batch:
+            try:
+                # id explicite (None si absent) : pas d'id horodaté, la séquence attribuera l'id
+                prepared = self._prepare_document({**document_data, 'id': document_data.get('id')})
+                if document_data.get('id') is not None:
+                    prepared['document']['id'] = int(document_data['id'])
+            except Exception as e:
+                summary['failed'] += 1
+                summary['errors'].append(f"Document invalide: {e}")
+                continue
+            prepared['source'] = document_data
+            if document_data.get('id') is None:
+                without_id.append(prepared)
+            else:
+                # ON CONFLICT ne peut pas toucher deux fois la même ligne dans une instruction
+                by_id[prepared['document']['id']] = prepared
+
+        if without_id:
+            allocated = self.allocate_ids('threats', len(without_id))
+            if allocated is None:
+                summary['failed'] += len(without_id)
+                summary['errors'].append(f"Lot {summary['batches']}: allocation de {len(without_id)} ids impossible")
+            else:
+                for prepared, row_id in zip(without_id, allocated):
+                    prepared['document']['id'] = row_id
+                    by_id[row_id] = prepared
+
+        prepared_documents = list(by_id.values())
+        if not prepared_documents:
+            return
+        returned = self.execute_values_query(f"""
+            INSERT INTO threats ({DOCUMENT_COLUMNS}) VALUES %s
+            {DOCUMENT_UPSERT}
+            RETURNING id
+        """, [(prepared['document']['id'],) + prepared['values'] for prepared in prepared_documents],
+            fetch_all=True)
+        if returned is None or len(returned) != len(prepared_documents):
+            summary['failed'] += len(prepared_documents)
+            summary['errors'].append(f"Lot {summary['batches']}: échec de l'écriture de {len(prepared_documents)} documents")
+            return
+
+        for prepared in prepared_documents:
+            stored_document = prepared['document']
+            summary['stored'] += 1
+            summary['ids'].append(stored_document['id'])
+            self._notify_document_listeners({**prepared['source'], **stored_document})
+
 # Instance globale optimisée
 optimized_db = OptimizedDatabase()
\ No newline at end of file
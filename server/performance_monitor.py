@@ -5,6 +5,8 @@ import json
 from datetime import datetime
 from typing import Dict, List
 from cache_manager import cache_manager
+from connection_pool import get_pool_stats
+from models.embedding_store import embedding_store
 
 class PerformanceMonitor:
     """Moniteur de performance pour le système"""
@@ -16,7 +18,8 @@ class PerformanceMonitor:
             'cpu_usage': [],
             'database_queries': [],
             'cache_hits': 0,
-            'cache_misses': 0
+            'cache_misses': 0,
+            'inference_batches': {}  # Par modèle : lots traités par l'ordonnanceur d'inférence
         }
         self.monitoring = False
         self.monitor_thread = None
@@ -90,6 +93,43 @@ class PerformanceMonitor:
         if len(self.metrics['database_queries']) > 500:
             self.metrics['database_queries'].pop(0)
             
+    def record_inference_batch(self, model: str, batch_size: int, duration: float, latencies: List[float]):
+        """Enregistrer un lot d'inférence (durée de la passe, latences file + calcul par requête)"""
+        batches = self.metrics['inference_batches'].setdefault(model, [])
+        batches.append({
+            'batch_size': batch_size,
+            'duration': duration,
+            'latencies': latencies,
+            'finished_at': time.time()
+        })
+        
+        # Maintenir seulement les 500 derniers lots par modèle
+        if len(batches) > 500:
+            batches.pop(0)
+            
+    def get_inference_summary(self) -> Dict:
+        """Débit et latences (p50/p99) par modèle sur les derniers lots enregistrés"""
+        summary = {}
+        for model, batches in list(self.metrics['inference_batches'].items()):
+            batches = list(batches)
+            if not batches:
+                continue
+            latencies = sorted(latency for batch in batches for latency in batch['latencies'])
+            requests = len(latencies)
+            # Fenêtre : du début du premier lot à la fin du dernier
+            window = batches[-1]['finished_at'] - (batches[0]['finished_at'] - batches[0]['duration'])
+            summary[model] = {
+                'requests': requests,
+                'batches': len(batches),
+                'avg_batch_size': round(requests / len(batches), 2),
+                'throughput_per_second': round(requests / window, 2) if window > 0 else None,
+                'avg_batch_duration': round(sum(batch['duration'] for batch in batches) / len(batches), 6),
+                'p50_latency': round(latencies[int(0.50 * (requests - 1))], 6),
+                'p99_latency': round(latencies[int(0.99 * (requests - 1))], 6),
+                'max_latency': round(latencies[-1], 6)
+            }
+        return summary
+        
     def record_cache_hit(self):
         """Enregistrer un hit de cache"""
         self.metrics['cache_hits'] += 1
@@ -114,10 +154,33 @@ class PerformanceMonitor:
             if self.metrics['cpu_usage']:
                 avg_cpu = sum(c['value'] for c in self.metrics['cpu_usage']) / len(self.metrics['cpu_usage'])
             
-            # Calculer le taux de hit du cache
-            total_cache_requests = self.metrics['cache_hits'] + self.metrics['cache_misses']
-            cache_hit_rate = (self.metrics['cache_hits'] / total_cache_requests * 100) if total_cache_requests > 0 else 0
+            # Calculer le taux de hit du cache (compteurs enregistrés + compteurs du cache)
+            cache_stats = cache_manager.get_stats()
+            cache_hits = self.metrics['cache_hits'] + cache_stats['hits']
+            cache_misses = self.metrics['cache_misses'] + cache_stats['misses']
+            total_cache_requests = cache_hits + cache_misses
+            cache_hit_rate = (cache_hits / total_cache_requests * 100) if total_cache_requests > 0 else 0
             
+            # Pools de connexions du processus (prêtées, en attente, temps d'attente)
+            pool_stats = get_pool_stats()
+
+            # Requêtes par instruction (EXECUTE <nom> pour les requêtes préparées)
+            statement_times = {}
+            for query in list(self.metrics['database_queries']):
+                statement_times.setdefault(query['query'], []).append(query['duration'])
+            slowest_statements = sorted(
+                (
+                    {
+                        'statement': statement,
+                        'avg_duration': round(sum(times) / len(times), 6),
+                        'max_duration': round(max(times), 6),
+                        'call_count': len(times)
+                    }
+                    for statement, times in statement_times.items()
+                ),
+                key=lambda x: x['avg_duration'] * x['call_count'], reverse=True
+            )[:10]
+
             # Endpoints les plus lents
             slowest_endpoints = []
             if self.metrics['response_times']:
@@ -153,14 +216,30 @@ class PerformanceMonitor:
                 },
                 'cache_performance': {
                     'hit_rate': round(cache_hit_rate, 2),
-                    'total_hits': self.metrics['cache_hits'],
-                    'total_misses': self.metrics['cache_misses'],
-                    'total_requests': total_cache_requests
+                    'total_hits': cache_hits,
+                    'total_misses': cache_misses,
+                    'total_requests': total_cache_requests,
+                    'evictions': cache_stats['evictions'],
+                    'namespaces': cache_stats['namespaces']
                 },
+                'embedding_cache': embedding_store.get_stats(),
+                'inference': self.get_inference_summary(),
                 'database_queries': {
                     'total_queries': len(self.metrics['database_queries']),
                     'avg_duration': round(sum(q['duration'] for q in self.metrics['database_queries']) / len(self.metrics['database_queries']), 2) if self.metrics['database_queries'] else 0,
-                    'success_rate': round(sum(1 for q in self.metrics['database_queries'] if q['success']) / len(self.metrics['database_queries']) * 100, 2) if self.metrics['database_queries'] else 100
+                    'success_rate': round(sum(1 for q in self.metrics['database_queries'] if q['success']) / len(self.metrics['database_queries']) * 100, 2) if self.metrics['database_queries'] else 100,
+                    'by_statement': slowest_statements
+                },
+                'connection_pool': {
+                    'in_use': sum(pool['in_use'] for pool in pool_stats),
+                    'idle': sum(pool['idle'] for pool in pool_stats),
+                    'waiting': sum(pool['waiting'] for pool in pool_stats),
+                    'created': sum(pool['created'] for pool in pool_stats),
+                    'closed': sum(pool['closed'] for pool in pool_stats),
+                    'timeouts': sum(pool['timeouts'] for pool in pool_stats),
+                    'total_wait_time': round(sum(pool['total_wait_time'] for pool in pool_stats), 6),
+                    'max_wait_time': max((pool['max_wait_time'] for pool in pool_stats), default=0),
+                    'pools': pool_stats
                 },
                 'timestamp': datetime.now().isoformat()
             }
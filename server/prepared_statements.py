@@ -0,0 +1,111 @@
+"""
+Registre des requêtes préparées (requêtes de lecture les plus fréquentes)
+Chaque connexion du pool PREPARE une requête à sa première utilisation puis
+l'EXECUTE : PostgreSQL ne ré-analyse et ne re-planifie plus le SQL
+"""
+
+from typing import Dict, Sequence
+
+import psycopg2
+import psycopg2.errors
+from psycopg2 import extensions
+
+# Nom -> SQL paramétré ($1, $2, ...) ; lectures uniquement (voir execute_prepared)
+PREPARED_QUERIES: Dict[str, str] = {
+    'user_by_username': """
+        SELECT * FROM users WHERE username = $1 AND is_active = TRUE
+    """,
+    # Compteurs maintenus par triggers (migration 2) : quatre lectures par clé primaire
+    'dashboard_stats': """
+        SELECT
+            COALESCE(MAX(threat_count) FILTER (WHERE dimension = 'all'), 0) as total_threats,
+            COALESCE(MAX(threat_count) FILTER (WHERE dimension = 'status' AND value = 'active'), 0) as active_threats,
+            MAX(score_sum / NULLIF(threat_count, 0)) FILTER (WHERE dimension = 'all') as avg_score,
+            COALESCE(MAX(threat_count) FILTER (WHERE dimension = 'severity' AND value = 'high'), 0) as high_severity,
+            COALESCE(MAX(threat_count) FILTER (WHERE dimension = 'severity' AND value = 'critical'), 0) as critical_severity
+        FROM threat_stats
+        WHERE (dimension, value) IN (('all', '*'), ('status', 'active'), ('severity', 'high'), ('severity', 'critical'))
+    """,
+    'realtime_threats': """
+        SELECT id, name, description, score, severity, status,
+               created_at as timestamp, metadata
+        FROM threats
+        WHERE status = 'active'
+        ORDER BY score DESC, created_at DESC
+        LIMIT $1
+    """,
+    'threat_evolution_24h': """
+        SELECT score, created_at
+        FROM threats
+        WHERE created_at >= NOW() - INTERVAL '1 day'
+        ORDER BY created_at
+    """,
+    'threats_by_document_ids': """
+        SELECT * FROM threats WHERE metadata->>'document_id' = ANY($1::text[])
+    """,
+    'prediction_by_pattern': """
+        SELECT * FROM predictions WHERE pattern = $1 LIMIT 1
+    """,
+    'prescription_by_category': """
+        SELECT * FROM prescriptions WHERE category = $1 LIMIT 1
+    """,
+    'documents_by_ids': """
+        SELECT id, name, description, metadata, created_at
+        FROM threats
+        WHERE id = ANY($1::int[])
+        ORDER BY created_at DESC
+    """,
+    'active_scenarios': """
+        SELECT id, name, description, conditions, actions,
+               status, priority, validity_window, created_at
+        FROM scenarios
+        WHERE status = 'active'
+        ORDER BY priority ASC
+    """,
+    'active_alerts': """
+        SELECT id, type, severity, title, message, is_read,
+               related_threat_id, created_at
+        FROM alerts
+        WHERE is_read = FALSE
+        ORDER BY created_at DESC
+        LIMIT 20
+    """
+}
+
+class PreparedStatementConnection(extensions.connection):
+    """Connexion psycopg2 qui mémorise les requêtes déjà préparées dans sa session"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared_statements = set()
+
+def execute_prepared(cursor, name: str, params: Sequence = ()) -> None:
+    """EXECUTE une requête du registre, en la préparant si la session ne la connaît pas
+
+    Une requête que la session a perdue (ou déjà préparée à notre insu) est
+    corrigée par un rollback : réservé aux lectures, rien n'est perdu.
+    """
+    if name not in PREPARED_QUERIES:
+        raise KeyError(f"Requête préparée inconnue: {name}")
+
+    conn = cursor.connection
+    prepared = getattr(conn, 'prepared_statements', None)
+    if prepared is None:
+        raise TypeError("La connexion doit être créée avec PreparedStatementConnection")
+
+    prepare_sql = f"PREPARE {name} AS {PREPARED_QUERIES[name]}"
+    execute_sql = f"EXECUTE {name} ({', '.join(['%s'] * len(params))})" if params else f"EXECUTE {name}"
+
+    if name not in prepared:
+        try:
+            cursor.execute(prepare_sql)
+        except psycopg2.errors.DuplicatePreparedStatement:
+            conn.rollback()
+        prepared.add(name)
+
+    try:
+        cursor.execute(execute_sql, tuple(params))
+    except psycopg2.errors.InvalidSqlStatementName:
+        conn.rollback()
+        cursor.execute(prepare_sql)
+        cursor.execute(execute_sql, tuple(params))
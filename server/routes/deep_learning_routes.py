@@ -68,11 +68,14 @@ class ThreatSeverityClassificationResource(Resource):
         try:
             data = request.get_json()
             documents = data.get('documents', [])
+            batch_size = data.get('batch_size')
             
             if not documents:
                 return {'error': 'Documents requis'}, 400
+            if batch_size is not None and (not isinstance(batch_size, int) or batch_size < 1):
+                return {'error': 'batch_size doit être un entier positif'}, 400
             
-            result = deep_learning_service.classify_threat_severity(documents)
+            result = deep_learning_service.classify_threat_severity(documents, batch_size=batch_size)
             return result
             
         except Exception as e:
@@ -172,7 +175,8 @@ class DeepLearningHealthResource(Resource):
 api.add_resource(DeepLearningInitResource, '/api/deep-learning/init')
 api.add_resource(ThreatEvolutionPredictionResource, '/api/deep-learning/predict-evolution')
 api.add_resource(ThreatAnomalyDetectionResource, '/api/deep-learning/detect-anomalies')
-api.add_resource(ThreatSeverityClassificationResource, '/api/deep-learning/classify-severity')
+api.add_resource(ThreatSeverityClassificationResource, '/api/deep-learning/classify-severity',
+                 '/api/deep-learning/classify')
 api.add_resource(ModelStatisticsResource, '/api/deep-learning/model-stats')
 api.add_resource(ModelRetrainingResource, '/api/deep-learning/retrain')
 api.add_resource(ComprehensiveThreatAnalysisResource, '/api/deep-learning/comprehensive-analysis')
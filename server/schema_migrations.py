@@ -0,0 +1,300 @@
+"""
+Schéma de la base : tables de base et migrations versionnées
+SCHEMA_TABLES est créé par OptimizedDatabase.init_tables (CREATE ... IF NOT
+EXISTS), puis apply_migrations applique SCHEMA_MIGRATIONS. Chaque migration est
+(version, description, SQL) ; elle n'est exécutée qu'une fois par base et
+inscrite dans la table schema_migrations
+"""
+
+from typing import List, Tuple
+
+# Tables de base et leurs index, dans l'ordre de création
+SCHEMA_TABLES: List[str] = [
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        id SERIAL PRIMARY KEY,
+        username VARCHAR(50) UNIQUE NOT NULL,
+        password VARCHAR(255) NOT NULL,
+        clearance_level INTEGER DEFAULT 1,
+        name VARCHAR(100),
+        email VARCHAR(100),
+        is_active BOOLEAN DEFAULT TRUE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_users_username ON users(username);
+    CREATE INDEX IF NOT EXISTS idx_users_active ON users(is_active);
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS threats (
+        id SERIAL PRIMARY KEY,
+        name VARCHAR(200) NOT NULL,
+        description TEXT,
+        score REAL NOT NULL,
+        severity VARCHAR(20) NOT NULL,
+        status VARCHAR(20) DEFAULT 'active',
+        source_id INTEGER,
+        metadata JSONB,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_threats_score ON threats(score);
+    CREATE INDEX IF NOT EXISTS idx_threats_status ON threats(status);
+    CREATE INDEX IF NOT EXISTS idx_threats_created ON threats(created_at);
+    CREATE INDEX IF NOT EXISTS idx_threats_severity ON threats(severity);
+    CREATE INDEX IF NOT EXISTS idx_threats_created_id ON threats(created_at DESC, id DESC);
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS scenarios (
+        id SERIAL PRIMARY KEY,
+        name VARCHAR(200) NOT NULL,
+        description TEXT,
+        conditions JSONB NOT NULL,
+        actions JSONB NOT NULL,
+        status VARCHAR(20) DEFAULT 'active',
+        priority INTEGER DEFAULT 3,
+        validity_window VARCHAR(20) DEFAULT 'P7D',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_scenarios_status ON scenarios(status);
+    CREATE INDEX IF NOT EXISTS idx_scenarios_priority ON scenarios(priority);
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS actions (
+        id SERIAL PRIMARY KEY,
+        type VARCHAR(50) NOT NULL,
+        description TEXT,
+        priority VARCHAR(10) DEFAULT 'P3',
+        status VARCHAR(20) DEFAULT 'pending',
+        related_threat_id INTEGER,
+        related_scenario_id INTEGER,
+        metadata JSONB,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_actions_status ON actions(status);
+    CREATE INDEX IF NOT EXISTS idx_actions_priority ON actions(priority);
+    CREATE INDEX IF NOT EXISTS idx_actions_threat ON actions(related_threat_id);
+    CREATE INDEX IF NOT EXISTS idx_actions_created_id ON actions(created_at DESC, id DESC);
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS alerts (
+        id SERIAL PRIMARY KEY,
+        type VARCHAR(50) NOT NULL,
+        severity VARCHAR(20) NOT NULL,
+        title VARCHAR(200) NOT NULL,
+        message TEXT,
+        is_read BOOLEAN DEFAULT FALSE,
+        related_threat_id INTEGER,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_alerts_read ON alerts(is_read);
+    CREATE INDEX IF NOT EXISTS idx_alerts_severity ON alerts(severity);
+    CREATE INDEX IF NOT EXISTS idx_alerts_created ON alerts(created_at);
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS prescriptions (
+        id SERIAL PRIMARY KEY,
+        threat_id VARCHAR(100) NOT NULL,
+        priority VARCHAR(10) NOT NULL,
+        category VARCHAR(50) NOT NULL,
+        time_estimate VARCHAR(50),
+        confidence REAL NOT NULL,
+        actions JSONB NOT NULL,
+        resources JSONB,
+        status VARCHAR(20) DEFAULT 'active',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_prescriptions_status ON prescriptions(status);
+    CREATE INDEX IF NOT EXISTS idx_prescriptions_priority ON prescriptions(priority);
+    CREATE INDEX IF NOT EXISTS idx_prescriptions_threat ON prescriptions(threat_id);
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS data_sources (
+        id SERIAL PRIMARY KEY,
+        name VARCHAR(100) NOT NULL,
+        type VARCHAR(50) NOT NULL,
+        url VARCHAR(255),
+        status VARCHAR(20) DEFAULT 'active',
+        last_ingested TIMESTAMP,
+        throughput REAL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_data_sources_status ON data_sources(status);
+    CREATE INDEX IF NOT EXISTS idx_data_sources_type ON data_sources(type);
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS document_analysis (
+        id SERIAL PRIMARY KEY,
+        document_id VARCHAR(100) NOT NULL,
+        analysis_type VARCHAR(50) NOT NULL,
+        analysis_result JSONB,
+        confidence_score REAL DEFAULT 0.0,
+        processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        metadata JSONB
+    );
+    CREATE INDEX IF NOT EXISTS idx_document_analysis_doc ON document_analysis(document_id);
+    CREATE INDEX IF NOT EXISTS idx_document_analysis_type ON document_analysis(analysis_type);
+    CREATE INDEX IF NOT EXISTS idx_document_analysis_processed ON document_analysis(processed_at);
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS threat_scores (
+        id SERIAL PRIMARY KEY,
+        threat_id INTEGER,
+        score REAL NOT NULL,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        metadata JSONB
+    );
+    CREATE INDEX IF NOT EXISTS idx_threat_scores_threat ON threat_scores(threat_id);
+    """
+]
+
+# Ordre croissant des versions. Ne jamais modifier une migration publiée : en ajouter une.
+SCHEMA_MIGRATIONS: List[Tuple[int, str, str]] = [
+    (
+        1,
+        "Index des chemins d'accès de l'évaluation des menaces",
+        """
+        -- _get_existing_threats : metadata->>'document_id' = ANY(...)
+        CREATE INDEX IF NOT EXISTS idx_threats_document_id ON threats ((metadata->>'document_id'));
+        -- Filtres par contenu des métadonnées (metadata @> '{...}')
+        CREATE INDEX IF NOT EXISTS idx_threats_metadata_gin ON threats USING GIN (metadata jsonb_path_ops);
+        -- predictions et prescriptions.type ne sont pas créés par init_tables : index posés s'ils existent
+        DO $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM information_schema.columns
+                       WHERE table_schema = current_schema() AND table_name = 'predictions'
+                         AND column_name = 'pattern') THEN
+                CREATE INDEX IF NOT EXISTS idx_predictions_pattern ON predictions(pattern);
+            END IF;
+            IF EXISTS (SELECT 1 FROM information_schema.columns
+                       WHERE table_schema = current_schema() AND table_name = 'prescriptions'
+                         AND column_name = 'type') THEN
+                CREATE INDEX IF NOT EXISTS idx_prescriptions_type ON prescriptions(type);
+            END IF;
+        END $$;
+        """
+    ),
+    (
+        2,
+        "Agrégats du dashboard maintenus par triggers (threat_stats)",
+        """
+        -- Une ligne par (dimension, valeur) : ('all', '*'), ('status', <statut>), ('severity', <sévérité>)
+        CREATE TABLE IF NOT EXISTS threat_stats (
+            dimension VARCHAR(20) NOT NULL,
+            value VARCHAR(50) NOT NULL,
+            threat_count BIGINT NOT NULL DEFAULT 0,
+            score_sum NUMERIC NOT NULL DEFAULT 0,
+            PRIMARY KEY (dimension, value)
+        );
+
+        -- Aucune écriture entre l'amorçage et la pose des triggers
+        LOCK TABLE threats IN SHARE ROW EXCLUSIVE MODE;
+
+        DELETE FROM threat_stats;
+        INSERT INTO threat_stats (dimension, value, threat_count, score_sum)
+        SELECT d.dimension, d.value, COUNT(*), COALESCE(SUM(t.score::numeric), 0)
+        FROM threats t
+        CROSS JOIN LATERAL (VALUES ('all', '*'), ('status', COALESCE(t.status, 'unknown')),
+                                   ('severity', t.severity)) AS d(dimension, value)
+        GROUP BY d.dimension, d.value;
+        INSERT INTO threat_stats (dimension, value) VALUES ('all', '*') ON CONFLICT DO NOTHING;
+
+        -- Triggers par instruction : un lot execute_values ne met à jour chaque compteur qu'une fois.
+        -- Les deltas sont appliqués dans l'ordre de la clé pour éviter les interblocages.
+        CREATE OR REPLACE FUNCTION threat_stats_apply() RETURNS trigger AS $fn$
+        BEGIN
+            IF TG_OP = 'TRUNCATE' THEN
+                UPDATE threat_stats SET threat_count = 0, score_sum = 0;
+                RETURN NULL;
+            END IF;
+
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO threat_stats (dimension, value, threat_count, score_sum)
+                SELECT d.dimension, d.value, SUM(r.sign), SUM(r.sign * r.score::numeric)
+                FROM (SELECT 1 AS sign, score, status, severity FROM new_rows) r
+                CROSS JOIN LATERAL (VALUES ('all', '*'), ('status', COALESCE(r.status, 'unknown')),
+                                           ('severity', r.severity)) AS d(dimension, value)
+                GROUP BY d.dimension, d.value
+                HAVING SUM(r.sign) <> 0 OR SUM(r.sign * r.score::numeric) <> 0
+                ORDER BY d.dimension, d.value
+                ON CONFLICT (dimension, value) DO UPDATE SET
+                    threat_count = threat_stats.threat_count + EXCLUDED.threat_count,
+                    score_sum = threat_stats.score_sum + EXCLUDED.score_sum;
+            ELSIF TG_OP = 'DELETE' THEN
+                INSERT INTO threat_stats (dimension, value, threat_count, score_sum)
+                SELECT d.dimension, d.value, SUM(r.sign), SUM(r.sign * r.score::numeric)
+                FROM (SELECT -1 AS sign, score, status, severity FROM old_rows) r
+                CROSS JOIN LATERAL (VALUES ('all', '*'), ('status', COALESCE(r.status, 'unknown')),
+                                           ('severity', r.severity)) AS d(dimension, value)
+                GROUP BY d.dimension, d.value
+                HAVING SUM(r.sign) <> 0 OR SUM(r.sign * r.score::numeric) <> 0
+                ORDER BY d.dimension, d.value
+                ON CONFLICT (dimension, value) DO UPDATE SET
+                    threat_count = threat_stats.threat_count + EXCLUDED.threat_count,
+                    score_sum = threat_stats.score_sum + EXCLUDED.score_sum;
+            ELSIF TG_OP = 'UPDATE' THEN
+                INSERT INTO threat_stats (dimension, value, threat_count, score_sum)
+                SELECT d.dimension, d.value, SUM(r.sign), SUM(r.sign * r.score::numeric)
+                FROM (SELECT 1 AS sign, score, status, severity FROM new_rows
+                      UNION ALL
+                      SELECT -1, score, status, severity FROM old_rows) r
+                CROSS JOIN LATERAL (VALUES ('all', '*'), ('status', COALESCE(r.status, 'unknown')),
+                                           ('severity', r.severity)) AS d(dimension, value)
+                GROUP BY d.dimension, d.value
+                HAVING SUM(r.sign) <> 0 OR SUM(r.sign * r.score::numeric) <> 0
+                ORDER BY d.dimension, d.value
+                ON CONFLICT (dimension, value) DO UPDATE SET
+                    threat_count = threat_stats.threat_count + EXCLUDED.threat_count,
+                    score_sum = threat_stats.score_sum + EXCLUDED.score_sum;
+            END IF;
+            RETURN NULL;
+        END
+        $fn$ LANGUAGE plpgsql;
+
+        -- Une table de transition n'est permise que pour un trigger à événement unique
+        DROP TRIGGER IF EXISTS threat_stats_insert ON threats;
+        CREATE TRIGGER threat_stats_insert AFTER INSERT ON threats
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE PROCEDURE threat_stats_apply();
+        DROP TRIGGER IF EXISTS threat_stats_update ON threats;
+        CREATE TRIGGER threat_stats_update AFTER UPDATE ON threats
+            REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE PROCEDURE threat_stats_apply();
+        DROP TRIGGER IF EXISTS threat_stats_delete ON threats;
+        CREATE TRIGGER threat_stats_delete AFTER DELETE ON threats
+            REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE PROCEDURE threat_stats_apply();
+        DROP TRIGGER IF EXISTS threat_stats_truncate ON threats;
+        CREATE TRIGGER threat_stats_truncate AFTER TRUNCATE ON threats
+            FOR EACH STATEMENT EXECUTE PROCEDURE threat_stats_apply();
+        """
+    ),
+    (
+        3,
+        "Table des prédictions de l'évaluation, index par pattern et par catégorie de prescription",
+        """
+        -- Colonnes lues et écrites par ThreatEvaluationService (_create_new_prediction)
+        CREATE TABLE IF NOT EXISTS predictions (
+            id SERIAL PRIMARY KEY,
+            pattern TEXT NOT NULL,
+            confidence REAL,
+            frequency INTEGER,
+            type VARCHAR(50),
+            cluster_size INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        -- La migration 1 ne le posait que si la table existait déjà
+        CREATE INDEX IF NOT EXISTS idx_predictions_pattern ON predictions(pattern);
+        -- _get_existing_prescriptions : une prescription par catégorie de besoin
+        CREATE INDEX IF NOT EXISTS idx_prescriptions_category ON prescriptions(category);
+        """
+    )
+]
+
+# Verrou consultatif : un seul worker applique les migrations à la fois
+SCHEMA_MIGRATIONS_LOCK = 7204111
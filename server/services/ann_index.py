@@ -0,0 +1,238 @@
+"""
+Index de plus proches voisins approximatifs (ANN) pour la similarité des documents
+Recherche top-k sur des vecteurs TF-IDF ou d'embeddings, sans dépendance externe
+"""
+
+import os
+import pickle
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ANNIndex(ABC):
+    """Interface commune des index de plus proches voisins"""
+
+    @abstractmethod
+    def add(self, ids: List[str], vectors) -> None:
+        """Ajouter (ou remplacer) des documents dans l'index"""
+
+    @abstractmethod
+    def query(self, vector, k: int = 10, exclude_id: Optional[str] = None) -> List[Tuple[str, float]]:
+        """Top-k documents les plus proches d'un vecteur"""
+
+    @abstractmethod
+    def get_vector(self, document_id: str):
+        """Vecteur indexé d'un document (None si absent)"""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Nombre de documents indexés"""
+
+    def save(self, path: str) -> None:
+        """Sauvegarder l'index sur disque (écriture atomique)"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(self, f)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def load(path: str) -> Optional['ANNIndex']:
+        """Charger un index sauvegardé"""
+        try:
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    return pickle.load(f)
+        except Exception as e:
+            logger.error(f"Erreur chargement index ANN: {e}")
+        return None
+
+    def query_id(self, document_id: str, k: int = 10) -> Optional[List[Tuple[str, float]]]:
+        """Voisins d'un document déjà indexé (le document lui-même est exclu)"""
+        vector = self.get_vector(document_id)
+        if vector is None:
+            return None
+        return self.query(vector, k, exclude_id=document_id)
+
+    @abstractmethod
+    def knn_graph(self, k: int = 10) -> sparse.csr_matrix:
+        """Graphe creux des k plus proches voisins de chaque document indexé"""
+
+class RandomProjectionLSHIndex(ANNIndex):
+    """LSH par projections aléatoires (signatures de signe) avec reclassement cosinus
+
+    Chaque table hache un vecteur sur n_bits hyperplans ; les candidats sont les
+    documents partageant un seau dans au moins une table, puis reclassés par
+    produit scalaire exact (vecteurs normalisés L2). Un document ré-indexé
+    laisse une position morte ; l'index est compacté quand elles dépassent
+    compact_ratio des positions.
+    """
+
+    compact_ratio = 0.25
+
+    def __init__(self, dimension: int, n_tables: int = 16, n_bits: int = 10, seed: int = 42):
+        self.dimension = dimension
+        self.n_tables = n_tables
+        self.n_bits = n_bits
+        rng = np.random.default_rng(seed)
+        self.planes = rng.standard_normal((dimension, n_tables * n_bits)).astype(np.float32)
+        self.bit_weights = (1 << np.arange(n_bits, dtype=np.int64))
+        self.tables: List[Dict[int, List[int]]] = [{} for _ in range(n_tables)]
+        self.ids: List[str] = []
+        self.positions: Dict[str, int] = {}
+        self.vectors = sparse.csr_matrix((0, dimension), dtype=np.float32)
+        self.pending: List[sparse.csr_matrix] = []
+        self.consolidate_every = 1024
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def _normalize(self, vectors) -> sparse.csr_matrix:
+        """Convertir en CSR float32 normalisé L2"""
+        vectors = sparse.csr_matrix(vectors, dtype=np.float32)
+        norms = np.sqrt(np.asarray(vectors.multiply(vectors).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        return sparse.diags(1.0 / norms).dot(vectors).tocsr().astype(np.float32)
+
+    def _signatures(self, vectors: sparse.csr_matrix) -> np.ndarray:
+        """Signatures binaires (n_vecteurs x n_tables)"""
+        projections = np.asarray(vectors @ self.planes) > 0
+        projections = projections.reshape(vectors.shape[0], self.n_tables, self.n_bits)
+        return projections.astype(np.int64) @ self.bit_weights
+
+    def _consolidate(self) -> None:
+        """Regrouper les vecteurs ajoutés un par un dans la matrice principale"""
+        if self.pending:
+            self.vectors = sparse.vstack([self.vectors] + self.pending, format='csr')
+            self.pending = []
+
+    def add(self, ids: List[str], vectors) -> None:
+        """Ajouter (ou remplacer) des documents dans l'index"""
+        vectors = self._normalize(vectors)
+        signatures = self._signatures(vectors)
+
+        new_rows = []
+        for row, document_id in enumerate(ids):
+            document_id = str(document_id)
+            if document_id in self.positions:
+                # Document ré-indexé : l'ancienne position n'est plus servie
+                self.ids[self.positions[document_id]] = None
+            position = len(self.ids)
+            self.ids.append(document_id)
+            self.positions[document_id] = position
+            for table, signature in zip(self.tables, signatures[row]):
+                table.setdefault(int(signature), []).append(position)
+            new_rows.append(row)
+
+        self.pending.append(vectors[new_rows])
+        if len(self.ids) - len(self.positions) > self.compact_ratio * len(self.ids):
+            self.compact()
+        elif sum(block.shape[0] for block in self.pending) >= self.consolidate_every:
+            self._consolidate()
+
+    def compact(self) -> None:
+        """Retirer les positions mortes et reconstruire les tables de hachage"""
+        self._consolidate()
+        alive = [position for position, document_id in enumerate(self.ids) if document_id is not None]
+        self.vectors = self.vectors[alive]
+        self.ids = [self.ids[position] for position in alive]
+        self.positions = {document_id: position for position, document_id in enumerate(self.ids)}
+        self.tables = [{} for _ in range(self.n_tables)]
+        for position, signature in enumerate(self._signatures(self.vectors)):
+            for table, value in zip(self.tables, signature):
+                table.setdefault(int(value), []).append(position)
+
+    def get_vector(self, document_id: str):
+        position = self.positions.get(str(document_id))
+        if position is None:
+            return None
+        self._consolidate()
+        return self.vectors[position]
+
+    def _candidates(self, signature: np.ndarray) -> np.ndarray:
+        """Positions partageant au moins un seau avec la signature"""
+        buckets = [table.get(int(value), []) for table, value in zip(self.tables, signature)]
+        if not any(buckets):
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate([np.asarray(bucket, dtype=np.int64) for bucket in buckets]))
+
+    def query(self, vector, k: int = 10, exclude_id: Optional[str] = None) -> List[Tuple[str, float]]:
+        """Top-k documents les plus proches (cosinus) parmi les candidats LSH"""
+        if not self.ids:
+            return []
+
+        self._consolidate()
+        vector = self._normalize(vector)
+        candidates = self._candidates(self._signatures(vector)[0])
+        if candidates.size == 0:
+            return []
+
+        scores = np.asarray((self.vectors[candidates] @ vector.T).todense()).ravel()
+        order = np.argsort(-scores, kind='stable')
+
+        results = []
+        for position in order:
+            document_id = self.ids[candidates[position]]
+            if document_id is None or document_id == exclude_id:
+                continue
+            results.append((document_id, float(scores[position])))
+            if len(results) >= k:
+                break
+        return results
+
+    def knn_graph(self, k: int = 10, block_size: int = 256) -> sparse.csr_matrix:
+        """Graphe creux des k plus proches voisins (positions de l'index)
+
+        Les candidats d'un bloc de lignes sont reclassés par un seul produit
+        matriciel creux, puis filtrés ligne par ligne.
+        """
+        self._consolidate()
+        n_items = len(self.ids)
+        signatures = self._signatures(self.vectors)
+        alive = np.array([document_id is not None for document_id in self.ids], dtype=bool)
+        rows, cols, values = [], [], []
+
+        for start in range(0, n_items, block_size):
+            block = [
+                (position, self._candidates(signatures[position]))
+                for position in range(start, min(start + block_size, n_items))
+                if alive[position]
+            ]
+            block = [
+                (position, candidates[(candidates != position) & alive[candidates]])
+                for position, candidates in block
+            ]
+            block = [(position, candidates) for position, candidates in block if candidates.size]
+            if not block:
+                continue
+
+            union = np.unique(np.concatenate([candidates for _, candidates in block]))
+            block_rows = [position for position, _ in block]
+            scores = (self.vectors[block_rows] @ self.vectors[union].T).toarray()
+
+            for row, (position, candidates) in enumerate(block):
+                candidate_scores = scores[row, np.searchsorted(union, candidates)]
+                top = np.argsort(-candidate_scores, kind='stable')[:k]
+                rows.extend([position] * len(top))
+                cols.extend(candidates[top].tolist())
+                values.extend(candidate_scores[top].tolist())
+
+        graph = sparse.csr_matrix((values, (rows, cols)), shape=(n_items, n_items), dtype=np.float32)
+        # Symétriser : une arête trouvée dans un seul sens est conservée
+        return graph.maximum(graph.T).tocsr()
+
+# Registre des implémentations disponibles (extensible : HNSW, embeddings, ...)
+INDEX_TYPES = {
+    'lsh': RandomProjectionLSHIndex
+}
+
+def create_index(kind: str, dimension: int, **params) -> ANNIndex:
+    """Créer un index ANN du type demandé"""
+    if kind not in INDEX_TYPES:
+        raise ValueError(f"Type d'index ANN inconnu: {kind}")
+    return INDEX_TYPES[kind](dimension, **params)
@@ -28,8 +28,9 @@ class ClusteringReevaluationService:
             self.clustering_service = DocumentClusteringService()
             
         if not self.database:
-            from ..optimized_database import OptimizedDatabase
-            self.database = OptimizedDatabase()
+            # Moteur partagé du processus : pas de second pool ni de DDL rejoué
+            from optimized_database import optimized_db
+            self.database = optimized_db
     
     def process_new_document_insertion(self, new_document: Dict) -> Dict:
         """Traiter l'insertion d'un nouveau document et réévaluer les éléments concernés"""
@@ -5,7 +5,9 @@ import os
 import json
 from datetime import datetime
 from config import Config
-from database import Database
+from database import db
+from models.model_registry import model_registry
+from models.embedding_store import embedding_store
 
 # Try to import deep learning libraries
 try:
@@ -24,13 +26,20 @@ except ImportError:
     except ImportError:
         ML_AVAILABLE = False
 
+# PyTorch : moteur deep learning (encodeur BERT + classifieur attention)
+try:
+    import torch
+    TORCH_AVAILABLE = True
+except ImportError:
+    TORCH_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
 class DeepLearningService:
     """Service principal pour l'intégration des modèles deep learning"""
     
     def __init__(self):
-        self.db = Database()
+        self.db = db  # API historique sur le pool partagé du processus
         self.model_path = Config.ML_MODEL_PATH
         self.is_training = False
         self.simulation_mode = not ML_AVAILABLE
@@ -538,15 +547,22 @@ class DeepLearningService:
     def detect_threat_anomalies(self, threat_data: Dict) -> Dict:
         """Détecter des anomalies dans une menace"""
         try:
-            if self.simulation_mode:
+            engine = None
+            if not self.simulation_mode and TORCH_AVAILABLE:
+                from models.deep_learning_models import get_threat_engine
+                engine = get_threat_engine()
+            # Pas de poids entraînés : un autoencoder aléatoire ne vaut pas mieux que la simulation
+            simulated = engine is None or 'autoencoder' not in engine.trained_models
+            if simulated:
                 result = self._simulate_anomaly_detection(threat_data)
             else:
-                result = self.engine.detect_anomalies(threat_data)
+                # Autoencoder du moteur partagé (requêtes concurrentes regroupées par micro-lots)
+                result = engine.detect_anomalies(threat_data)
                 
             result['threat_id'] = threat_data.get('id', 'unknown')
             result['timestamp'] = datetime.now().isoformat()
             result['model_type'] = 'autoencoder'
-            result['simulation_mode'] = self.simulation_mode
+            result['simulation_mode'] = simulated
             
             return result
             
@@ -557,8 +573,8 @@ class DeepLearningService:
                 'is_anomaly': False
             }
     
-    def classify_threat_severity(self, threat_documents: List[str]) -> Dict:
-        """Classifier la sévérité d'une menace avec attention"""
+    def classify_threat_severity(self, threat_documents: List[str], batch_size: Optional[int] = None) -> Dict:
+        """Classifier la sévérité d'une menace avec attention (embeddings calculés par micro-lots)"""
         try:
             if not threat_documents:
                 return {
@@ -566,15 +582,17 @@ class DeepLearningService:
                     'predicted_class': 'medium'
                 }
             
-            if self.simulation_mode:
+            simulated = self.simulation_mode or not TORCH_AVAILABLE
+            if simulated:
                 result = self._simulate_severity_classification(threat_documents)
             else:
-                result = self.engine.classify_with_attention(threat_documents)
+                from models.deep_learning_models import get_threat_engine
+                result = get_threat_engine().classify_with_attention(threat_documents, batch_size=batch_size)
                 
             result['timestamp'] = datetime.now().isoformat()
             result['model_type'] = 'attention'
             result['document_count'] = len(threat_documents)
-            result['simulation_mode'] = self.simulation_mode
+            result['simulation_mode'] = simulated
             
             return result
             
@@ -617,6 +635,12 @@ class DeepLearningService:
             logger.error(f"Erreur récupération historique: {str(e)}")
             return []
     
+    def _get_scheduler_stats(self) -> Dict:
+        """Files d'inférence du moteur partagé (vide tant qu'il n'est pas chargé)"""
+        if not model_registry.is_loaded('threat_engine'):
+            return {}
+        return model_registry.get('threat_engine').get_scheduler_stats()
+    
     def get_model_statistics(self) -> Dict:
         """Obtenir les statistiques des modèles"""
         try:
@@ -627,6 +651,10 @@ class DeepLearningService:
                 'is_training': self.is_training,
                 'simulation_mode': self.simulation_mode,
                 'ml_available': ML_AVAILABLE,
+                'encoders': model_registry.get_stats(),
+                'embedding_store': embedding_store.get_stats(),
+                'inference_schedulers': self._get_scheduler_stats(),
+                'runtime': Config.ML_RUNTIME,
                 'last_update': datetime.now().isoformat()
             }
             
@@ -1,5 +1,7 @@
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 import numpy as np
+from scipy import sparse
+from sklearn.base import clone
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.cluster import KMeans, DBSCAN
 from sklearn.metrics.pairwise import cosine_similarity
@@ -26,6 +28,26 @@ class DocumentClusteringService:
         self.cluster_models = {}
         self.similarity_threshold = 0.7
         self.min_cluster_size = 2
+        # 'corpus' : un seul fit TF-IDF sur tout le corpus + produit matriciel
+        # 'pairwise' : ancien calcul paire par paire (O(n²) fits)
+        self.similarity_mode = 'corpus'
+        # Représentation du texte : 'tfidf' (vocabulaire du corpus) ou 'embedding'
+        # (embeddings BERT du stockage persistant, recalculés seulement pour les textes nouveaux)
+        self.text_representation = 'tfidf'
+        self.similarity_block_size = 512
+        # Au-delà de dense_similarity_limit documents, la matrice est creuse (CSR) :
+        # seules les entrées >= sparse_similarity_threshold sont gardées, bloc par bloc
+        self.dense_similarity_limit = 5000
+        self.sparse_similarity_threshold = 0.3
+        # Paramètres LSH du graphe kNN (plus de tables = meilleur rappel, plus de candidats)
+        self.knn_index_params = {'n_tables': 48, 'n_bits': 12}
+        self.similarity_weights = {
+            'text': 0.4,
+            'entities': 0.3,
+            'temporal': 0.15,
+            'source': 0.1,
+            'type': 0.05
+        }
         self.cache_lock = Lock()
         self.vectorizer_cache = {}
         self.cluster_cache = {}
@@ -46,6 +68,8 @@ class DocumentClusteringService:
         """Extraire les caractéristiques sémantiques des documents"""
         features = {
             'texts': [],
+            'contents': [],
+            'content_hashes': [],
             'metadata': [],
             'temporal_info': [],
             'entity_info': []
@@ -59,6 +83,11 @@ class DocumentClusteringService:
             
             preprocessed_text = self.preprocess_text(content)
             features['texts'].append(preprocessed_text)
+            # Texte brut et empreinte de l'ingestion (clé du stockage d'embeddings)
+            features['contents'].append(content)
+            features['content_hashes'].append(
+                (doc.get('metadata') or {}).get('hash') if isinstance(doc.get('content'), str) else None
+            )
             
             # Métadonnées
             metadata = {
@@ -141,8 +170,13 @@ class DocumentClusteringService:
         
         return combined_similarity
     
-    def cluster_documents_by_similarity(self, documents: List[Dict]) -> Dict:
-        """Regrouper les documents par similarité"""
+    def cluster_documents_by_similarity(self, documents: List[Dict], mode: Optional[str] = None,
+                                        return_matrix: bool = False) -> Dict:
+        """Regrouper les documents par similarité
+        
+        La matrice n x n n'est plus sérialisée dans le résultat ; avec
+        return_matrix=True elle est renvoyée telle quelle (ndarray) pour export.
+        """
         if len(documents) < 2:
             return {'clusters': [], 'summary': {'total_documents': len(documents), 'clusters_found': 0}}
         
@@ -150,14 +184,17 @@ class DocumentClusteringService:
         features = self.extract_semantic_features(documents)
         
         # Créer la matrice de similarité
-        n_docs = len(documents)
-        similarity_matrix = np.zeros((n_docs, n_docs))
-        
-        for i in range(n_docs):
-            for j in range(i + 1, n_docs):
-                sim = self.calculate_document_similarity(documents[i], documents[j])
-                similarity_matrix[i][j] = sim
-                similarity_matrix[j][i] = sim
+        if (mode or self.similarity_mode) == 'pairwise':
+            n_docs = len(documents)
+            similarity_matrix = np.zeros((n_docs, n_docs))
+            
+            for i in range(n_docs):
+                for j in range(i + 1, n_docs):
+                    sim = self.calculate_document_similarity(documents[i], documents[j])
+                    similarity_matrix[i][j] = sim
+                    similarity_matrix[j][i] = sim
+        else:
+            similarity_matrix = self.compute_similarity_matrix(documents, features)
         
         # Clustering hiérarchique basé sur la similarité
         clusters = self._hierarchical_clustering(documents, similarity_matrix)
@@ -165,9 +202,8 @@ class DocumentClusteringService:
         # Analyser les clusters
         cluster_analysis = self._analyze_clusters(clusters, features)
         
-        return {
+        result = {
             'clusters': clusters,
-            'similarity_matrix': similarity_matrix.tolist(),
             'analysis': cluster_analysis,
             'summary': {
                 'total_documents': len(documents),
@@ -175,37 +211,300 @@ class DocumentClusteringService:
                 'avg_cluster_size': sum(len(cluster['documents']) for cluster in clusters) / len(clusters) if clusters else 0
             }
         }
+        if return_matrix:
+            result['similarity_matrix'] = similarity_matrix
+        return result
+    
+    def fit_corpus_vectors(self, texts: List[str]) -> Tuple[sparse.csr_matrix, Optional[TfidfVectorizer]]:
+        """Ajuster un vectoriseur TF-IDF une seule fois sur tout le corpus
+
+        Renvoie (vecteurs, vectoriseur ajusté ou None si le vocabulaire est
+        vide) ; rien n'est conservé sur le service, partagé entre requêtes.
+        """
+        vectorizer = clone(self.vectorizer)
+        try:
+            vectors = vectorizer.fit_transform(texts)
+        except ValueError:
+            # Corpus trop petit pour min_df/max_df : relâcher les bornes
+            vectorizer = clone(self.vectorizer).set_params(min_df=1, max_df=1.0)
+            try:
+                vectors = vectorizer.fit_transform(texts)
+            except ValueError:
+                # Vocabulaire vide (aucun texte exploitable)
+                return sparse.csr_matrix((len(texts), 0)), None
+        
+        return vectors, vectorizer
+    
+    def embedding_vectors(self, features: Dict) -> sparse.csr_matrix:
+        """Embeddings normalisés L2 des textes, lus du stockage persistant
+
+        Les documents sans texte gardent un vecteur nul.
+        """
+        from models.embedding_store import embedding_store
+        
+        contents, hashes = features['contents'], features['content_hashes']
+        present = [i for i, text in enumerate(features['texts']) if text]
+        if not present:
+            return sparse.csr_matrix((len(contents), 0), dtype=np.float32)
+        
+        embeddings = embedding_store.encode([contents[i] for i in present], hashes=[hashes[i] for i in present])
+        vectors = np.zeros((len(contents), embeddings.shape[1]), dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        vectors[present] = embeddings / np.maximum(norms, 1e-12)
+        return sparse.csr_matrix(vectors)
+    
+    def build_similarity_context(self, documents: List[Dict], features: Dict) -> Dict:
+        """Préparer une fois les représentations vectorisées de chaque composante
+
+        'vectorizer' est le TF-IDF ajusté sur ces textes (None en mode embedding) :
+        il n'appartient qu'à ce contexte.
+        """
+        n_docs = len(documents)
+        texts = features['texts']
+        
+        # Similarité textuelle : vecteurs normalisés L2, cosinus = produit scalaire
+        vectorizer = None
+        if self.text_representation == 'embedding':
+            text_vectors = self.embedding_vectors(features)
+        else:
+            text_vectors, vectorizer = self.fit_corpus_vectors(texts)
+        
+        # Similarité des entités : matrice d'incidence binaire document x entité
+        entity_index = {}
+        rows, cols = [], []
+        for i, doc in enumerate(documents):
+            for entity in set(e.get('text', '').lower() for e in doc.get('entities', [])):
+                rows.append(i)
+                cols.append(entity_index.setdefault(entity, len(entity_index)))
+        entity_matrix = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+            shape=(n_docs, len(entity_index))
+        )
+        
+        # Similarités catégorielles : codes entiers comparés par broadcast
+        periods = [info['time_period'] for info in features['temporal_info']]
+        
+        return {
+            'vectorizer': vectorizer,
+            'text_vectors': text_vectors,
+            'has_text': np.array([bool(text) for text in texts], dtype=bool),
+            'entity_matrix': entity_matrix,
+            'entity_counts': np.asarray(entity_matrix.sum(axis=1)).ravel(),
+            'period_codes': self._encode_categories(periods),
+            'known_period': np.array([period != 'unknown' for period in periods], dtype=bool),
+            'source_codes': self._encode_categories([doc.get('source') for doc in documents]),
+            'type_codes': self._encode_categories([doc.get('type') for doc in documents])
+        }
+    
+    def compute_similarity_matrix(self, documents: List[Dict], features: Optional[Dict] = None,
+                                  dtype=np.float32, context: Optional[Dict] = None,
+                                  threshold: Optional[float] = None) -> Union[np.ndarray, sparse.csr_matrix]:
+        """Calculer la matrice de similarité complète par opérations matricielles
+        
+        Même pondération que calculate_document_similarity, mais le TF-IDF est
+        ajusté une seule fois et chaque composante est calculée par blocs de lignes.
+        Avec un seuil (par défaut sparse_similarity_threshold au-delà de
+        dense_similarity_limit documents), seules les entrées >= threshold de
+        chaque bloc sont conservées et une matrice CSR est renvoyée : la mémoire
+        suit le nombre de paires similaires et non n².
+        """
+        if features is None:
+            features = self.extract_semantic_features(documents)
+        
+        n_docs = len(documents)
+        weights = self.similarity_weights
+        if context is None:
+            context = self.build_similarity_context(documents, features)
+        text_vectors = context['text_vectors']
+        entity_matrix = context['entity_matrix']
+        entity_counts = context['entity_counts']
+        has_text = context['has_text']
+        
+        if threshold is None and n_docs > self.dense_similarity_limit:
+            threshold = self.sparse_similarity_threshold
+        if threshold is None:
+            similarity_matrix = np.zeros((n_docs, n_docs), dtype=dtype)
+        else:
+            kept_rows, kept_cols, kept_values = [], [], []
+        
+        for start in range(0, n_docs, self.similarity_block_size):
+            stop = min(start + self.similarity_block_size, n_docs)
+            
+            text_similarity = (text_vectors[start:stop] @ text_vectors.T).toarray()
+            
+            intersection = (entity_matrix[start:stop] @ entity_matrix.T).toarray()
+            union = entity_counts[start:stop, None] + entity_counts[None, :] - intersection
+            entity_similarity = np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+            
+            temporal_similarity = (
+                (context['period_codes'][start:stop, None] == context['period_codes'][None, :])
+                & context['known_period'][start:stop, None]
+            )
+            source_similarity = context['source_codes'][start:stop, None] == context['source_codes'][None, :]
+            type_similarity = context['type_codes'][start:stop, None] == context['type_codes'][None, :]
+            
+            block = (
+                text_similarity * weights['text'] +
+                entity_similarity * weights['entities'] +
+                temporal_similarity * weights['temporal'] +
+                source_similarity * weights['source'] +
+                type_similarity * weights['type']
+            )
+            
+            # Un document sans texte n'est similaire à aucun autre
+            block[~has_text[start:stop], :] = 0.0
+            block[:, ~has_text] = 0.0
+            if threshold is None:
+                similarity_matrix[start:stop] = block
+            else:
+                block[np.arange(stop - start), np.arange(start, stop)] = 0.0
+                rows, cols = np.nonzero(block >= threshold)
+                kept_rows.append(rows + start)
+                kept_cols.append(cols)
+                kept_values.append(block[rows, cols].astype(dtype))
+        
+        if threshold is not None:
+            return sparse.csr_matrix(
+                (np.concatenate(kept_values), (np.concatenate(kept_rows), np.concatenate(kept_cols))),
+                shape=(n_docs, n_docs), dtype=dtype
+            )
+        np.fill_diagonal(similarity_matrix, 0.0)
+        return similarity_matrix
+    
+    def compute_knn_similarity_graph(self, documents: List[Dict], features: Optional[Dict] = None,
+                                     k: int = 20, index_kind: str = 'lsh',
+                                     context: Optional[Dict] = None) -> Tuple[sparse.csr_matrix, object]:
+        """Graphe creux de similarité limité aux k plus proches voisins textuels
+        
+        Les voisins sont obtenus par un index ANN sur des vecteurs augmentés dont
+        le produit scalaire approche la similarité combinée (TF-IDF, entités et
+        indicatrices temporelle/source/type pondérés par la racine de leur
+        poids), puis la similarité exacte n'est calculée que sur ces arêtes.
+        
+        Returns:
+            (graphe n x n symétrique, index ANN construit sur le corpus)
+        """
+        from services.ann_index import create_index
+        
+        if features is None:
+            features = self.extract_semantic_features(documents)
+        
+        n_docs = len(documents)
+        if context is None:
+            context = self.build_similarity_context(documents, features)
+        vectors = self._augmented_vectors(context)
+        
+        index = create_index(index_kind, vectors.shape[1], **self.knn_index_params)
+        index.add([str(i) for i in range(n_docs)], vectors)
+        neighbours = index.knn_graph(k).tocoo()
+        
+        upper = neighbours.row < neighbours.col
+        rows, cols = neighbours.row[upper], neighbours.col[upper]
+        values = self._pair_similarities(context, rows, cols)
+        
+        graph = sparse.csr_matrix((values, (rows, cols)), shape=(n_docs, n_docs), dtype=np.float32)
+        return (graph + graph.T).tocsr(), index
     
-    def _hierarchical_clustering(self, documents: List[Dict], similarity_matrix: np.ndarray) -> List[Dict]:
-        """Clustering hiérarchique des documents"""
+    def _augmented_vectors(self, context: Dict) -> sparse.csr_matrix:
+        """Concaténer toutes les composantes pondérées en un seul vecteur creux"""
+        weights = self.similarity_weights
+        n_docs = context['has_text'].shape[0]
+        
+        entity_norms = np.sqrt(context['entity_counts'])
+        entity_norms[entity_norms == 0] = 1.0
+        entity_vectors = sparse.diags(1.0 / entity_norms).dot(context['entity_matrix'])
+        
+        def one_hot(codes, mask=None):
+            values = np.ones(n_docs, dtype=np.float32) if mask is None else mask.astype(np.float32)
+            return sparse.csr_matrix((values, (np.arange(n_docs), codes)), shape=(n_docs, int(codes.max()) + 1))
+        
+        blocks = [
+            context['text_vectors'] * np.sqrt(weights['text']),
+            entity_vectors * np.sqrt(weights['entities']),
+            one_hot(context['period_codes'], context['known_period']) * np.sqrt(weights['temporal']),
+            one_hot(context['source_codes']) * np.sqrt(weights['source']),
+            one_hot(context['type_codes']) * np.sqrt(weights['type'])
+        ]
+        vectors = sparse.hstack(blocks, format='csr', dtype=np.float32)
+        # Un document sans texte n'a pas de voisin
+        return sparse.diags(context['has_text'].astype(np.float32)).dot(vectors).tocsr()
+    
+    def _pair_similarities(self, context: Dict, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+        """Similarité combinée pour une liste de paires (i, j)"""
+        weights = self.similarity_weights
+        text_vectors = context['text_vectors']
+        entity_matrix = context['entity_matrix']
+        entity_counts = context['entity_counts']
+        
+        text_similarity = np.asarray(text_vectors[rows].multiply(text_vectors[cols]).sum(axis=1)).ravel()
+        
+        intersection = np.asarray(entity_matrix[rows].multiply(entity_matrix[cols]).sum(axis=1)).ravel()
+        union = entity_counts[rows] + entity_counts[cols] - intersection
+        entity_similarity = np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+        
+        temporal_similarity = (context['period_codes'][rows] == context['period_codes'][cols]) & context['known_period'][rows]
+        source_similarity = context['source_codes'][rows] == context['source_codes'][cols]
+        type_similarity = context['type_codes'][rows] == context['type_codes'][cols]
+        
+        values = (
+            text_similarity * weights['text'] +
+            entity_similarity * weights['entities'] +
+            temporal_similarity * weights['temporal'] +
+            source_similarity * weights['source'] +
+            type_similarity * weights['type']
+        )
+        values[~(context['has_text'][rows] & context['has_text'][cols])] = 0.0
+        return values.astype(np.float32)
+    
+    def _encode_categories(self, values: List) -> np.ndarray:
+        """Encoder des valeurs catégorielles en codes entiers (égalité conservée)"""
+        codes = {}
+        return np.array([codes.setdefault(value, len(codes)) for value in values])
+    
+    def _hierarchical_clustering(self, documents: List[Dict], similarity_matrix) -> List[Dict]:
+        """Clustering hiérarchique des documents
+        
+        Accepte une matrice dense n x n ou un graphe creux (CSR) de k plus proches
+        voisins ; une paire absente du graphe est considérée de similarité nulle.
+        """
         n_docs = len(documents)
         clusters = []
-        used_docs = set()
+        used_docs = np.zeros(n_docs, dtype=bool)
+        is_graph = sparse.issparse(similarity_matrix)
+        if is_graph:
+            similarity_matrix = similarity_matrix.tocsr()
+            similarity_matrix.sort_indices()
         
         # Trouver les groupes de documents similaires
         for i in range(n_docs):
-            if i in used_docs:
+            if used_docs[i]:
                 continue
-                
-            cluster_docs = [i]
-            used_docs.add(i)
+            
+            used_docs[i] = True
             
             # Trouver tous les documents similaires
-            for j in range(n_docs):
-                if j != i and j not in used_docs and similarity_matrix[i][j] >= self.similarity_threshold:
-                    cluster_docs.append(j)
-                    used_docs.add(j)
+            if is_graph:
+                start, stop = similarity_matrix.indptr[i], similarity_matrix.indptr[i + 1]
+                neighbours = similarity_matrix.indices[start:stop]
+                scores = similarity_matrix.data[start:stop]
+                similar = neighbours[(scores >= self.similarity_threshold) & ~used_docs[neighbours]]
+            else:
+                similar = np.flatnonzero((similarity_matrix[i] >= self.similarity_threshold) & ~used_docs)
+            used_docs[similar] = True
+            cluster_docs = [i] + similar.tolist()
             
             # Créer le cluster si suffisamment de documents
             if len(cluster_docs) >= self.min_cluster_size:
+                submatrix = similarity_matrix[cluster_docs][:, cluster_docs]
+                if is_graph:
+                    submatrix = submatrix.toarray()
+                upper = np.triu_indices(len(cluster_docs), k=1)
                 cluster = {
                     'id': f"cluster_{len(clusters) + 1}",
                     'documents': [documents[idx] for idx in cluster_docs],
                     'document_indices': cluster_docs,
                     'size': len(cluster_docs),
-                    'avg_similarity': np.mean([similarity_matrix[cluster_docs[i]][cluster_docs[j]] 
-                                             for i in range(len(cluster_docs)) 
-                                             for j in range(i + 1, len(cluster_docs))]) if len(cluster_docs) > 1 else 0.0
+                    'avg_similarity': float(np.mean(submatrix[upper])) if len(cluster_docs) > 1 else 0.0
                 }
                 clusters.append(cluster)
         
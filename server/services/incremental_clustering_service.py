@@ -0,0 +1,459 @@
+"""
+Service d'affectation incrémentale des documents aux clusters
+Maintient un état persistant (vocabulaire TF-IDF, centroïdes, membres) pour
+éviter de re-clusteriser tout le corpus à chaque ingestion
+"""
+
+import os
+import pickle
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from threading import Lock, RLock
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from config import Config
+from services.ann_index import ANNIndex, create_index
+from services.document_clustering_service import DocumentClusteringService
+import logging
+
+logger = logging.getLogger(__name__)
+
+class IncrementalClusteringService:
+    """Affectation des nouveaux documents aux centroïdes des clusters existants"""
+
+    def __init__(self, clustering_service: Optional[DocumentClusteringService] = None,
+                 state_path: Optional[str] = None, index_path: Optional[str] = None,
+                 index_kind: str = 'lsh'):
+        self.clustering_service = clustering_service or DocumentClusteringService()
+        self.state_path = state_path or os.path.join(Config.ML_MODEL_PATH, 'cluster_state.pkl')
+        self.index_path = index_path or os.path.join(Config.ML_MODEL_PATH, 'ann_index.pkl')
+        self.index_kind = index_kind
+        self.drift_threshold = 0.2  # Part du corpus ajoutée avant reconstruction complète
+        self.persist_every = 50  # Sauvegarde de l'état toutes les N affectations
+        self.dense_rebuild_limit = 5000  # Au-delà, clustering sur graphe kNN creux
+        self.knn_neighbours = 20
+        self.state = None
+        self.index = None
+        # Réentrant : _ensure_state charge l'état (load_state) en le tenant
+        self.state_lock = RLock()
+        self.schedule_lock = Lock()
+        self.rebuild_thread = None
+        self.rebuild_journal = None  # Écritures reçues pendant une reconstruction, rejouées avant l'échange
+        self.last_replayed = 0
+        self.loaded = False
+        self.pending_writes = 0
+
+    # ------------------------------------------------------------------
+    # Construction et persistance de l'état
+    # ------------------------------------------------------------------
+
+    def _extract_streamed(self, documents: Iterable[Dict]) -> Tuple[List[Dict], Dict]:
+        """Extraire les caractéristiques d'un flux de documents
+
+        Renvoie les documents sans leur contenu (seul le texte prétraité des
+        caractéristiques est conservé) et les caractéristiques.
+        """
+        kept = []
+
+        def stream():
+            for doc in documents:
+                kept.append({key: value for key, value in doc.items() if key != 'content'})
+                yield doc
+
+        features = self.clustering_service.extract_semantic_features(stream())
+        return kept, features
+
+    def rebuild(self, documents: Optional[List[Dict]] = None) -> Dict:
+        """Reconstruire l'état complet des clusters à partir du corpus
+
+        Le corpus est lu hors verrou ; les affectations et ajouts à l'index
+        reçus pendant cette lecture sont journalisés. Le calcul des clusters,
+        le rejeu du journal et le remplacement de l'état se font ensuite sous
+        le verrou : aucun document n'est perdu et deux reconstructions ne
+        s'entremêlent pas.
+        """
+        start_time = time.time()
+        with self.state_lock:
+            self.rebuild_journal = []
+
+        try:
+            documents, features = self._read_corpus(documents)
+            with self.state_lock:
+                state, index, n_clusters = self._build_state(documents, features)
+                self._install_state(state, index)
+                replayed = self.last_replayed
+        except Exception:
+            with self.state_lock:
+                self.rebuild_journal = None
+            raise
+
+        self.save_state()
+        logger.info(
+            f"État des clusters reconstruit: {n_clusters} clusters, "
+            f"{len(documents)} documents en {time.time() - start_time:.2f}s "
+            f"({replayed} écritures rejouées)"
+        )
+        return self.get_state_stats()
+
+    def _install_state(self, state: Dict, index: Optional[ANNIndex]) -> None:
+        """Rejouer le journal sur le nouvel état puis le mettre en place (verrou déjà pris)"""
+        for kind, document, document_id, text, period, entities in self.rebuild_journal:
+            if kind == 'assign':
+                self._assign_locked(state, document, document_id, text, period, entities)
+            elif index is not None and state['vectorizer'] is not None:
+                index.add([document_id], state['vectorizer'].transform([text]))
+        self.last_replayed = len(self.rebuild_journal)
+        self.rebuild_journal = None
+        self.state = state
+        self.index = index
+        self.loaded = True
+        self.pending_writes = 0
+
+    def _read_corpus(self, documents: Optional[List[Dict]]) -> Tuple[List[Dict], Dict]:
+        """Documents et caractéristiques du corpus (lu en base si documents est None)"""
+        if documents is None:
+            from optimized_database import optimized_db
+            # Corpus lu en flux : le contenu brut n'est gardé que le temps d'extraire ses caractéristiques
+            return self._extract_streamed(optimized_db.iter_documents())
+        return documents, self.clustering_service.extract_semantic_features(documents)
+
+    def _build_state(self, documents: List[Dict], features: Dict) -> Tuple[Dict, Optional[ANNIndex], int]:
+        """Calculer un nouvel état (clusters, centroïdes) et son index ANN, sans l'installer
+
+        Le vectoriseur TF-IDF vient du contexte de similarité propre à ce
+        calcul : un clustering concurrent sur le service partagé n'y touche pas.
+        """
+        service = self.clustering_service
+        context = service.build_similarity_context(documents, features)
+
+        if len(documents) > self.dense_rebuild_limit:
+            # Matrice dense O(n²) trop coûteuse : seules les arêtes kNN sont évaluées
+            knn_graph, _ = service.compute_knn_similarity_graph(
+                documents, features, k=self.knn_neighbours, index_kind=self.index_kind, context=context
+            )
+            clusters = service._hierarchical_clustering(documents, knn_graph)
+            del knn_graph
+        elif len(documents) >= 2:
+            similarity_matrix = service.compute_similarity_matrix(documents, features, context=context)
+            clusters = service._hierarchical_clustering(documents, similarity_matrix)
+            del similarity_matrix
+        else:
+            clusters = []
+
+        # Vecteurs TF-IDF du contexte (fit_transform) : pas de second passage sur les textes
+        vectorizer = context['vectorizer']
+        n_features = len(vectorizer.vocabulary_) if vectorizer is not None else 0
+        vectors = context['text_vectors'] if vectorizer is not None else None
+
+        state = {
+            'vectorizer': vectorizer,
+            'centroid_sums': np.zeros((len(clusters), n_features), dtype=np.float32),
+            'clusters': [],
+            'document_clusters': {},
+            'documents_at_build': len(documents),
+            'assigned_since_build': 0,
+            'unassigned_since_build': 0,
+            'built_at': datetime.now().isoformat()
+        }
+
+        for position, cluster in enumerate(clusters):
+            indices = cluster['document_indices']
+            if vectors is not None and n_features:
+                state['centroid_sums'][position] = np.asarray(vectors[indices].sum(axis=0)).ravel()
+
+            members = cluster['documents']
+            state['clusters'].append({
+                'id': cluster['id'],
+                'member_ids': [str(doc.get('id')) for doc in members],
+                'sources': Counter(doc.get('source') for doc in members),
+                'types': Counter(doc.get('type') for doc in members),
+                'periods': Counter(features['temporal_info'][idx]['time_period'] for idx in indices),
+                'entities': set(
+                    e.get('text', '').lower() for doc in members for e in doc.get('entities', [])
+                )
+            })
+            for doc in members:
+                state['document_clusters'][str(doc.get('id'))] = position
+
+        state['centroids'] = self._normalize_rows(state['centroid_sums'])
+
+        # Index ANN du corpus, dans l'espace du vocabulaire de l'état
+        index = None
+        if vectors is not None and n_features:
+            index = create_index(self.index_kind, n_features)
+            index.add([str(doc.get('id')) for doc in documents], vectors)
+
+        return state, index, len(clusters)
+
+    def schedule_rebuild(self) -> bool:
+        """Lancer une reconstruction complète en arrière-plan (une seule à la fois)"""
+        with self.schedule_lock:
+            if self.rebuild_thread and self.rebuild_thread.is_alive():
+                return False
+
+            def run_rebuild():
+                try:
+                    self.rebuild()
+                except Exception as e:
+                    logger.error(f"Erreur reconstruction des clusters: {e}")
+
+            self.rebuild_thread = threading.Thread(target=run_rebuild, daemon=True)
+            self.rebuild_thread.start()
+            return True
+
+    def load_state(self) -> bool:
+        """Charger l'état persisté sur disque"""
+        try:
+            if os.path.exists(self.state_path):
+                with open(self.state_path, 'rb') as f:
+                    state = pickle.load(f)
+                index = ANNIndex.load(self.index_path)
+                with self.state_lock:
+                    self.state = state
+                    self.index = index
+                return True
+        except Exception as e:
+            logger.error(f"Erreur chargement état des clusters: {e}")
+        return False
+
+    def save_state(self) -> None:
+        """Sauvegarder l'état sur disque (écriture atomique)"""
+        try:
+            with self.state_lock:
+                if self.state is None:
+                    return
+                payload = pickle.dumps(self.state)
+                index_payload = pickle.dumps(self.index) if self.index is not None else None
+                self.pending_writes = 0
+
+            for path, data in ((self.state_path, payload), (self.index_path, index_payload)):
+                if data is None:
+                    continue
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+        except Exception as e:
+            logger.error(f"Erreur sauvegarde état des clusters: {e}")
+
+    def _ensure_state(self) -> bool:
+        """Charger l'état au premier usage, ou planifier sa construction (une seule fois)"""
+        with self.state_lock:
+            if not self.loaded:
+                self.loaded = True
+                if not self.load_state():
+                    self.schedule_rebuild()
+            return self.state is not None
+
+    # ------------------------------------------------------------------
+    # Affectation incrémentale
+    # ------------------------------------------------------------------
+
+    def assign_document(self, document: Dict) -> Optional[Dict]:
+        """Affecter un document au cluster le plus proche
+
+        Le document est vectorisé avec le vocabulaire déjà ajusté puis comparé
+        aux seuls centroïdes : le coût dépend du nombre de clusters, pas du corpus.
+        """
+        ready = self._ensure_state()
+
+        features = self.clustering_service.extract_semantic_features([document])
+        text = features['texts'][0]
+        period = features['temporal_info'][0]['time_period']
+        entities = set(e.get('text', '').lower() for e in document.get('entities', []))
+        document_id = str(document.get('id'))
+
+        with self.state_lock:
+            if self.rebuild_journal is not None:
+                self.rebuild_journal.append(('assign', document, document_id, text, period, entities))
+            if not ready or self.state is None:
+                return None
+            state = self.state
+
+            # Document déjà connu (ré-ingestion) : cluster inchangé
+            if document_id in state['document_clusters']:
+                position = state['document_clusters'][document_id]
+                return self._describe_cluster(state, position, None)
+
+            result = self._assign_locked(state, document, document_id, text, period, entities)
+            self.pending_writes += 1
+            should_persist = self.pending_writes >= self.persist_every
+            drift = self._compute_drift(state)
+
+        if drift > self.drift_threshold:
+            self.schedule_rebuild()
+        elif should_persist:
+            self.save_state()
+
+        return result
+
+    def index_document(self, document: Dict) -> bool:
+        """Ajouter un document stocké à l'index ANN (mise à jour incrémentale)"""
+        ready = self._ensure_state()
+
+        text = self.clustering_service.extract_semantic_features([document])['texts'][0]
+        document_id = str(document.get('id'))
+        with self.state_lock:
+            if self.rebuild_journal is not None and text:
+                self.rebuild_journal.append(('index', document, document_id, text, None, None))
+            if not ready or self.index is None or self.state is None or self.state['vectorizer'] is None or not text:
+                return False
+            vector = self.state['vectorizer'].transform([text])
+            self.index.add([document_id], vector)
+            self.pending_writes += 1
+            should_persist = self.pending_writes >= self.persist_every
+
+        if should_persist:
+            self.save_state()
+        return True
+
+    def find_similar_documents(self, document_id, k: int = 10) -> Optional[List[Dict]]:
+        """Top-k documents les plus proches d'un document indexé (cosinus textuel)"""
+        if not self._ensure_state():
+            return None
+
+        with self.state_lock:
+            if self.index is None:
+                return None
+            neighbours = self.index.query_id(str(document_id), k)
+
+        if neighbours is None:
+            return None
+        return [
+            {'document_id': neighbour_id, 'similarity': round(score, 4)}
+            for neighbour_id, score in neighbours
+        ]
+
+    def get_document_cluster(self, document_id) -> Optional[Dict]:
+        """Retrouver le cluster d'un document déjà affecté"""
+        if not self._ensure_state():
+            return None
+
+        with self.state_lock:
+            position = self.state['document_clusters'].get(str(document_id))
+            if position is None:
+                return None
+            return self._describe_cluster(self.state, position, None)
+
+    def get_cluster(self, cluster_id: str) -> Optional[Dict]:
+        """Retrouver un cluster par son identifiant"""
+        if not self._ensure_state():
+            return None
+
+        with self.state_lock:
+            for position, cluster in enumerate(self.state['clusters']):
+                if cluster['id'] == cluster_id:
+                    return self._describe_cluster(self.state, position, None)
+        return None
+
+    def get_state_stats(self) -> Dict:
+        """Statistiques de l'état des clusters"""
+        with self.state_lock:
+            state = self.state
+            if state is None:
+                return {
+                    'ready': False,
+                    'rebuild_running': bool(self.rebuild_thread and self.rebuild_thread.is_alive())
+                }
+
+            return {
+                'ready': True,
+                'clusters': len(state['clusters']),
+                'assigned_documents': len(state['document_clusters']),
+                'documents_at_build': state['documents_at_build'],
+                'assigned_since_build': state['assigned_since_build'],
+                'unassigned_since_build': state['unassigned_since_build'],
+                'drift': round(self._compute_drift(state), 4),
+                'drift_threshold': self.drift_threshold,
+                'built_at': state['built_at'],
+                'indexed_documents': len(self.index) if self.index is not None else 0,
+                'rebuild_running': bool(self.rebuild_thread and self.rebuild_thread.is_alive())
+            }
+
+    def _assign_locked(self, state: Dict, document: Dict, document_id: str, text: str,
+                       period: str, entities: set) -> Optional[Dict]:
+        """Affecter un document au meilleur centroïde de state (verrou déjà pris)"""
+        if document_id in state['document_clusters']:
+            return self._describe_cluster(state, state['document_clusters'][document_id], None)
+
+        service = self.clustering_service
+        weights = service.similarity_weights
+        best_position, best_score = None, 0.0
+        vector = None
+        if text and state['vectorizer'] is not None and len(state['clusters']):
+            vector = state['vectorizer'].transform([text])
+            text_similarity = np.asarray(vector @ state['centroids'].T).ravel()
+
+            scores = text_similarity * weights['text']
+            scores += self._dominant_matches(state, 'periods', period) * (period != 'unknown') * weights['temporal']
+            scores += self._dominant_matches(state, 'sources', document.get('source')) * weights['source']
+            scores += self._dominant_matches(state, 'types', document.get('type')) * weights['type']
+
+            # Jaccard des entités uniquement pour les candidats qui peuvent atteindre le seuil
+            if entities:
+                candidates = np.flatnonzero(scores + weights['entities'] >= service.similarity_threshold)
+                for position in candidates:
+                    cluster_entities = state['clusters'][position]['entities']
+                    if cluster_entities:
+                        scores[position] += weights['entities'] * (
+                            len(entities & cluster_entities) / len(entities | cluster_entities)
+                        )
+
+            best_position = int(np.argmax(scores))
+            best_score = float(scores[best_position])
+
+        if best_position is None or best_score < service.similarity_threshold:
+            state['unassigned_since_build'] += 1
+            return None
+
+        self._add_member(state, best_position, document, document_id, vector, period, entities)
+        state['assigned_since_build'] += 1
+        return self._describe_cluster(state, best_position, best_score)
+
+    def _add_member(self, state: Dict, position: int, document: Dict, document_id: str,
+                    vector, period: str, entities: set) -> None:
+        """Ajouter un document à un cluster et mettre à jour son centroïde"""
+        cluster = state['clusters'][position]
+        cluster['member_ids'].append(document_id)
+        cluster['sources'][document.get('source')] += 1
+        cluster['types'][document.get('type')] += 1
+        cluster['periods'][period] += 1
+        cluster['entities'].update(entities)
+        state['document_clusters'][document_id] = position
+
+        if vector is not None:
+            state['centroid_sums'][position] += vector.toarray().ravel()
+            state['centroids'][position] = self._normalize_rows(state['centroid_sums'][position:position + 1])[0]
+
+    def _dominant_matches(self, state: Dict, field: str, value) -> np.ndarray:
+        """Indiquer pour chaque cluster si sa valeur dominante égale celle du document"""
+        return np.array([
+            bool(cluster[field]) and cluster[field].most_common(1)[0][0] == value
+            for cluster in state['clusters']
+        ], dtype=np.float32)
+
+    def _describe_cluster(self, state: Dict, position: int, score: Optional[float]) -> Dict:
+        """Représentation d'un cluster renvoyée aux appelants"""
+        cluster = state['clusters'][position]
+        return {
+            'id': cluster['id'],
+            'document_ids': list(cluster['member_ids']),
+            'size': len(cluster['member_ids']),
+            'assignment_score': score
+        }
+
+    def _compute_drift(self, state: Dict) -> float:
+        """Part du corpus ajoutée depuis la dernière reconstruction"""
+        added = state['assigned_since_build'] + state['unassigned_since_build']
+        return added / max(state['documents_at_build'], 1)
+
+    @staticmethod
+    def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+        """Normaliser chaque ligne en L2 (centroïde comparé par cosinus)"""
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
@@ -0,0 +1,161 @@
+"""
+Stockage des matrices de similarité sous forme d'artefacts binaires compacts
+La réponse JSON du clustering ne transporte plus la matrice n x n : elle est
+écrite sur disque (float16 dense ou COO creux au-dessus d'un seuil) et servie
+à la demande, en téléchargement ou par pages de lignes top-k
+"""
+
+import json
+import os
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+from scipy import sparse
+
+from config import Config
+import logging
+
+logger = logging.getLogger(__name__)
+
+class SimilarityArtifactStore:
+    """Écriture et lecture paginée des matrices de similarité exportées"""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or os.path.join(Config.ML_MODEL_PATH, 'similarity')
+        self.dense_limit = 5000  # Au-delà, seules les entrées >= sparse_threshold sont gardées
+        self.sparse_threshold = 0.3
+        self.max_artifacts = 20  # Artefacts conservés (les plus anciens sont supprimés)
+
+    def _paths(self, artifact_id: str) -> Dict[str, str]:
+        base = os.path.join(self.directory, artifact_id)
+        return {'meta': f"{base}.json", 'dense': f"{base}.npy", 'sparse': f"{base}.npz"}
+
+    def save(self, similarity_matrix, document_ids: List[str]) -> Dict:
+        """Exporter une matrice (dense ou creuse) et renvoyer ses métadonnées"""
+        os.makedirs(self.directory, exist_ok=True)
+        artifact_id = uuid.uuid4().hex
+        paths = self._paths(artifact_id)
+        n_docs = similarity_matrix.shape[0]
+
+        if sparse.issparse(similarity_matrix) or n_docs > self.dense_limit:
+            if sparse.issparse(similarity_matrix):
+                # Matrice déjà seuillée par le clustering : même seuil que l'export dense
+                matrix = similarity_matrix.tocoo()
+                kept = matrix.data >= self.sparse_threshold
+                matrix = sparse.coo_matrix(
+                    (matrix.data[kept], (matrix.row[kept], matrix.col[kept])), shape=matrix.shape
+                )
+            else:
+                rows, cols = np.nonzero(similarity_matrix >= self.sparse_threshold)
+                matrix = sparse.coo_matrix(
+                    (similarity_matrix[rows, cols], (rows, cols)), shape=similarity_matrix.shape
+                )
+            # scipy.sparse ne gère pas float16 : triplets COO enregistrés directement
+            np.savez_compressed(
+                paths['sparse'],
+                row=matrix.row.astype(np.int32),
+                col=matrix.col.astype(np.int32),
+                data=matrix.data.astype(np.float16),
+                shape=np.array(matrix.shape)
+            )
+            matrix_format, nnz = 'coo', int(matrix.nnz)
+        else:
+            np.save(paths['dense'], np.asarray(similarity_matrix, dtype=np.float16))
+            matrix_format, nnz = 'dense', n_docs * n_docs
+
+        metadata = {
+            'id': artifact_id,
+            'format': matrix_format,
+            'dtype': 'float16',
+            'shape': [n_docs, n_docs],
+            'nnz': nnz,
+            'threshold': self.sparse_threshold if matrix_format == 'coo' else None,
+            'document_ids': [str(document_id) for document_id in document_ids],
+            'created_at': datetime.now().isoformat()
+        }
+        with open(paths['meta'], 'w') as f:
+            json.dump(metadata, f)
+
+        self._prune()
+        return {key: value for key, value in metadata.items() if key != 'document_ids'}
+
+    def get_metadata(self, artifact_id: str) -> Optional[Dict]:
+        """Métadonnées d'un artefact (None si inconnu)"""
+        if not self._is_valid_id(artifact_id):
+            return None
+        try:
+            with open(self._paths(artifact_id)['meta']) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def get_file_path(self, artifact_id: str) -> Optional[str]:
+        """Chemin du fichier binaire (.npy float16 ou .npz COO)"""
+        metadata = self.get_metadata(artifact_id)
+        if metadata is None:
+            return None
+        return self._paths(artifact_id)['dense' if metadata['format'] == 'dense' else 'sparse']
+
+    def get_rows(self, artifact_id: str, offset: int = 0, limit: int = 50,
+                 top_k: int = 10) -> Optional[Dict]:
+        """Page de lignes de la matrice, réduites à leurs top-k voisins"""
+        metadata = self.get_metadata(artifact_id)
+        if metadata is None:
+            return None
+
+        n_docs = metadata['shape'][0]
+        stop = min(offset + limit, n_docs)
+        document_ids = metadata['document_ids']
+        path = self.get_file_path(artifact_id)
+
+        if metadata['format'] == 'dense':
+            # Lecture mappée : seules les lignes demandées sont chargées
+            block = np.load(path, mmap_mode='r')[offset:stop].astype(np.float32)
+        else:
+            with np.load(path) as coo:
+                matrix = sparse.csr_matrix(
+                    (coo['data'].astype(np.float32), (coo['row'], coo['col'])), shape=tuple(coo['shape'])
+                )
+            block = matrix[offset:stop].toarray()
+
+        rows = []
+        for row_offset, row in enumerate(block):
+            top = np.argsort(-row, kind='stable')[:top_k]
+            top = top[row[top] > 0]
+            rows.append({
+                'document_id': document_ids[offset + row_offset],
+                'neighbours': [
+                    {'document_id': document_ids[col], 'similarity': round(float(row[col]), 4)}
+                    for col in top
+                ]
+            })
+
+        return {
+            'artifact_id': artifact_id,
+            'offset': offset,
+            'limit': limit,
+            'total': n_docs,
+            'next_offset': stop if stop < n_docs else None,
+            'rows': rows
+        }
+
+    def _prune(self) -> None:
+        """Supprimer les artefacts les plus anciens au-delà de max_artifacts"""
+        try:
+            metas = sorted(
+                (name for name in os.listdir(self.directory) if name.endswith('.json')),
+                key=lambda name: os.path.getmtime(os.path.join(self.directory, name))
+            )
+            for name in metas[:-self.max_artifacts]:
+                for path in self._paths(name[:-len('.json')]).values():
+                    if os.path.exists(path):
+                        os.remove(path)
+        except OSError as e:
+            logger.error(f"Erreur nettoyage des artefacts de similarité: {e}")
+
+    @staticmethod
+    def _is_valid_id(artifact_id: str) -> bool:
+        """Identifiant hexadécimal uniquement (pas de chemin arbitraire)"""
+        return bool(artifact_id) and len(artifact_id) == 32 and all(c in '0123456789abcdef' for c in artifact_id)
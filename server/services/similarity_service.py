@@ -1,13 +1,38 @@
 
 from typing import Dict, List, Optional, Tuple
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import json
 import numpy as np
+from scipy import sparse
 from collections import defaultdict
 import logging
 
 logger = logging.getLogger(__name__)
 
+class DisjointSet:
+    """Union-find (union par taille, compression de chemin) pour les composantes connexes"""
+    
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+        self.size = [1] * size
+    
+    def find(self, item: int) -> int:
+        root = item
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[item] != root:
+            self.parent[item], item = root, self.parent[item]
+        return root
+    
+    def union(self, item1: int, item2: int) -> None:
+        root1, root2 = self.find(item1), self.find(item2)
+        if root1 == root2:
+            return
+        if self.size[root1] < self.size[root2]:
+            root1, root2 = root2, root1
+        self.parent[root2] = root1
+        self.size[root1] += self.size[root2]
+
 class SimilarityService:
     """Service pour regrouper les messages par similarité thématique et contextuelle"""
     
@@ -22,6 +47,20 @@ class SimilarityService:
             'économie': 0.7,
             'social': 0.6
         }
+        # Thèmes compatibles (ex: sécurité et militaire) ; relation non symétrique
+        self.compatible_themes = {
+            'sécurité': ['militaire', 'politique'],
+            'militaire': ['sécurité', 'politique'],
+            'politique': ['sécurité', 'militaire', 'économie'],
+            'économie': ['politique', 'social'],
+            'social': ['économie', 'politique']
+        }
+        self.similarity_block_size = 1024
+        self.max_block_pairs = 1 << 22  # Paires évaluées par opération vectorisée (mémoire bornée)
+        self.blocking_window_hours = 6  # Largeur des tranches temporelles du blocage
+        # Similarité du contenu : 'words' (Jaccard des mots) ou 'embedding'
+        # (cosinus des embeddings du stockage persistant, borné à [0, 1])
+        self.content_representation = 'words'
     
     def group_messages_by_similarity(self, messages: List[Dict]) -> Dict:
         """Regrouper les messages par similarité thématique et contextuelle"""
@@ -32,11 +71,11 @@ class SimilarityService:
             # Filtrer les messages récents
             recent_messages = self._filter_recent_messages(messages)
             
-            # Calculer les scores de similarité
-            similarity_matrix = self._calculate_similarity_matrix(recent_messages)
+            # Paires au-dessus du seuil (blocage thème / fenêtre temporelle, sans matrice n x n)
+            similar_pairs = self._find_similar_pairs(recent_messages)
             
             # Créer les clusters
-            clusters = self._create_clusters(recent_messages, similarity_matrix)
+            clusters = self._create_clusters(recent_messages, similar_pairs)
             
             # Enrichir les clusters avec des métriques
             enriched_clusters = self._enrich_clusters(clusters)
@@ -65,21 +104,201 @@ class SimilarityService:
         return recent_messages
     
     def _calculate_similarity_matrix(self, messages: List[Dict]) -> np.ndarray:
-        """Calculer la matrice de similarité entre messages"""
+        """Calculer la matrice de similarité entre messages
+        
+        Les caractéristiques de chaque message sont extraites une seule fois, puis
+        les cinq composantes sont calculées par blocs de lignes en opérations
+        matricielles. Les scores sont identiques à _calculate_message_similarity.
+        """
         n = len(messages)
         similarity_matrix = np.zeros((n, n))
+        features = self._extract_message_features(messages)
         
-        for i in range(n):
-            for j in range(i, n):
-                if i == j:
-                    similarity_matrix[i][j] = 1.0
-                else:
-                    similarity = self._calculate_message_similarity(messages[i], messages[j])
-                    similarity_matrix[i][j] = similarity
-                    similarity_matrix[j][i] = similarity
+        for start in range(0, n, self.similarity_block_size):
+            stop = min(start + self.similarity_block_size, n)
+            similarity_matrix[start:stop] = self._calculate_similarity_block(
+                features, np.arange(start, stop), np.arange(n)
+            )
         
+        np.fill_diagonal(similarity_matrix, 1.0)
         return similarity_matrix
     
+    def _extract_message_features(self, messages: List[Dict]) -> Dict:
+        """Pré-calcul par message : thème, lieu, horodatage, entités et mots"""
+        n = len(messages)
+        
+        # Thèmes : identifiants entiers et table de compatibilité (ligne = msg1)
+        theme_ids = {}
+        themes = np.array([
+            theme_ids.setdefault(msg.get('metadata', {}).get('theme_name', 'general'), len(theme_ids))
+            for msg in messages
+        ], dtype=np.int64)
+        theme_table = np.full((len(theme_ids), len(theme_ids)), 0.1)
+        for theme1, id1 in theme_ids.items():
+            for theme2, id2 in theme_ids.items():
+                if theme1 == theme2:
+                    theme_table[id1, id2] = 1.0
+                elif theme1 in self.compatible_themes and theme2 in self.compatible_themes[theme1]:
+                    theme_table[id1, id2] = 0.6
+        
+        # Lieux : chaîne normalisée et mots-clés de plus de 3 caractères
+        locations = [msg.get('metadata', {}).get('location', '') for msg in messages]
+        location_ids = {}
+        location_codes = np.array([
+            location_ids.setdefault(loc.lower(), len(location_ids)) if loc else -1
+            for loc in locations
+        ], dtype=np.int64)
+        location_keywords = self._build_incidence([
+            [keyword for keyword in loc.lower().split() if len(keyword) > 3] if loc else []
+            for loc in locations
+        ])
+        
+        # Horodatages : microsecondes depuis l'epoch (entiers, différences exactes)
+        epoch_naive = datetime(1970, 1, 1)
+        epoch_aware = datetime.fromtimestamp(0, tz=timezone.utc)
+        timestamps = np.zeros(n, dtype=np.int64)
+        time_kinds = np.zeros(n, dtype=np.int8)  # 0 invalide, 1 naïf, 2 avec fuseau
+        for i, msg in enumerate(messages):
+            try:
+                msg_time = datetime.fromisoformat(msg.get('timestamp', '').replace('Z', '+00:00'))
+            except Exception:
+                continue
+            aware = msg_time.tzinfo is not None and msg_time.utcoffset() is not None
+            timestamps[i] = (msg_time - (epoch_aware if aware else epoch_naive)) // timedelta(microseconds=1)
+            time_kinds[i] = 2 if aware else 1
+        
+        # Entités et mots du contenu : matrices d'incidence creuses
+        entity_sets = [set(ent.get('name', '').lower() for ent in msg.get('entities', [])) for msg in messages]
+        contents = [msg.get('content', '').lower() for msg in messages]
+        
+        features = {
+            'themes': themes,
+            'theme_table': theme_table,
+            'location_codes': location_codes,
+            'location_keywords': location_keywords,
+            'timestamps': timestamps,
+            'time_kinds': time_kinds,
+            'entities': self._build_incidence(entity_sets),
+            'has_content': np.array([bool(content) for content in contents], dtype=bool),
+            'words': self._build_incidence([set(content.split()) for content in contents])
+        }
+        if self.content_representation == 'embedding':
+            features['content_embeddings'] = self._content_embeddings(messages, features['has_content'])
+        return features
+    
+    def _content_embeddings(self, messages: List[Dict], has_content: np.ndarray) -> np.ndarray:
+        """Embeddings normalisés L2 du contenu, lus du stockage (vecteur nul sans contenu)"""
+        from models.embedding_store import embedding_store
+        
+        present = np.flatnonzero(has_content)
+        if not len(present):
+            return np.zeros((len(messages), 0), dtype=np.float32)
+        embeddings = embedding_store.encode(
+            [messages[i].get('content', '') for i in present],
+            hashes=[messages[i].get('metadata', {}).get('hash') for i in present]
+        )
+        vectors = np.zeros((len(messages), embeddings.shape[1]), dtype=np.float32)
+        vectors[present] = embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        return vectors
+    
+    def _build_incidence(self, token_sets: List) -> sparse.csr_matrix:
+        """Matrice d'incidence binaire message x jeton (identifiants entiers)"""
+        vocabulary = {}
+        rows, cols = [], []
+        for i, tokens in enumerate(token_sets):
+            for token in set(tokens):
+                rows.append(i)
+                cols.append(vocabulary.setdefault(token, len(vocabulary)))
+        return sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.int32), (rows, cols)),
+            shape=(len(token_sets), len(vocabulary))
+        )
+    
+    def _calculate_similarity_block(self, features: Dict, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+        """Similarités combinées entre les messages rows (lignes) et cols (colonnes)"""
+        return self._calculate_pair_similarities(features, rows[:, None], cols[None, :])
+    
+    def _calculate_pair_similarities(self, features: Dict, i: np.ndarray, j: np.ndarray) -> np.ndarray:
+        """Similarités combinées des paires (i, j)
+        
+        i et j sont soit deux vecteurs de même longueur (liste de paires), soit
+        une colonne et une ligne (grille lignes x colonnes par broadcast).
+        """
+        # Thème : le message d'indice le plus petit joue le rôle de msg1
+        themes, theme_table = features['themes'], features['theme_table']
+        theme_sim = np.where(
+            i < j,
+            theme_table[themes[i], themes[j]],
+            theme_table[themes[j], themes[i]]
+        )
+        
+        # Géographie : 0.5 sans lieu, 1.0 identique, 0.7 mot-clé commun, sinon 0.2
+        location_i, location_j = features['location_codes'][i], features['location_codes'][j]
+        shared_keywords = self._intersection_counts(features['location_keywords'], i, j) > 0
+        geo_sim = np.where(shared_keywords, 0.7, 0.2)
+        geo_sim[np.broadcast_to(location_i == location_j, geo_sim.shape)] = 1.0
+        geo_sim[np.broadcast_to((location_i < 0) | (location_j < 0), geo_sim.shape)] = 0.5
+        
+        # Temporel : écart en heures ramené aux paliers 1h / 6h / 24h
+        kind_i, kind_j = features['time_kinds'][i], features['time_kinds'][j]
+        time_diff = np.abs(features['timestamps'][i] - features['timestamps'][j])
+        time_diff = time_diff.astype(np.float64) / 1e6 / 3600
+        temporal_sim = np.select([time_diff <= 1, time_diff <= 6, time_diff <= 24], [1.0, 0.8, 0.5], 0.2)
+        # Horodatage invalide ou naïf comparé à un horodatage avec fuseau : neutre
+        comparable = (kind_i == kind_j) & (kind_i > 0)
+        temporal_sim[~comparable] = 0.5
+        
+        # Entités : Jaccard, 0.3 si l'un des messages n'en a pas
+        entity_sim = self._jaccard(features['entities'], i, j, empty_value=0.3)
+        
+        # Contenu : Jaccard des mots (ou cosinus des embeddings), 0.3 si un contenu est vide
+        if 'content_embeddings' in features:
+            content_sim = self._cosine(features['content_embeddings'], i, j)
+        else:
+            content_sim = self._jaccard(features['words'], i, j, empty_value=None)
+        has_content = features['has_content']
+        content_sim[np.broadcast_to(~(has_content[i] & has_content[j]), content_sim.shape)] = 0.3
+        
+        return (
+            theme_sim * 0.3 +
+            geo_sim * 0.2 +
+            temporal_sim * 0.15 +
+            entity_sim * 0.2 +
+            content_sim * 0.15
+        )
+    
+    def _intersection_counts(self, incidence: sparse.csr_matrix, i: np.ndarray, j: np.ndarray) -> np.ndarray:
+        """Nombre de jetons communs pour chaque paire (i, j)"""
+        if i.ndim == 2:
+            return (incidence[i.ravel()] @ incidence[j.ravel()].T).toarray()
+        return np.asarray(incidence[i].multiply(incidence[j]).sum(axis=1)).ravel()
+    
+    def _cosine(self, vectors: np.ndarray, i: np.ndarray, j: np.ndarray) -> np.ndarray:
+        """Cosinus de vecteurs normalisés pour chaque paire (i, j), borné à [0, 1]"""
+        if i.ndim == 2:
+            cosine = vectors[i.ravel()] @ vectors[j.ravel()].T
+        else:
+            cosine = np.einsum('ij,ij->i', vectors[i], vectors[j])
+        return np.clip(cosine.astype(np.float64), 0.0, 1.0)
+    
+    def _jaccard(self, incidence: sparse.csr_matrix, i: np.ndarray, j: np.ndarray,
+                 empty_value: Optional[float]) -> np.ndarray:
+        """Jaccard par comptage d'intersections ; 0.3 si l'union est vide
+        
+        Avec empty_value, la valeur est aussi appliquée dès qu'un des deux
+        ensembles est vide (règle des entités).
+        """
+        counts = np.asarray(incidence.sum(axis=1)).ravel()
+        count_i, count_j = counts[i], counts[j]
+        intersection = self._intersection_counts(incidence, i, j)
+        union = count_i + count_j - intersection
+        
+        jaccard = np.full(union.shape, 0.3)
+        np.divide(intersection, union, out=jaccard, where=union > 0)
+        if empty_value is not None:
+            jaccard[(count_i == 0) | (count_j == 0)] = empty_value
+        return jaccard
+    
     def _calculate_message_similarity(self, msg1: Dict, msg2: Dict) -> float:
         """Calculer la similarité entre deux messages"""
         # Similarité thématique
@@ -117,13 +336,7 @@ class SimilarityService:
             return 1.0
         
         # Thèmes compatibles (ex: sécurité et militaire)
-        compatible_themes = {
-            'sécurité': ['militaire', 'politique'],
-            'militaire': ['sécurité', 'politique'],
-            'politique': ['sécurité', 'militaire', 'économie'],
-            'économie': ['politique', 'social'],
-            'social': ['économie', 'politique']
-        }
+        compatible_themes = self.compatible_themes
         
         if theme1 in compatible_themes and theme2 in compatible_themes[theme1]:
             return 0.6
@@ -218,43 +431,175 @@ class SimilarityService:
         
         return common_keywords
     
-    def _create_clusters(self, messages: List[Dict], similarity_matrix: np.ndarray) -> List[Dict]:
-        """Créer des clusters basés sur la matrice de similarité"""
+    def _find_similar_pairs(self, messages: List[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+        """Lister les paires (i < j) dont la similarité atteint le seuil
+        
+        Les messages sont répartis en blocs (thème, type d'horodatage, tranche
+        temporelle). Pour chaque couple de blocs, la borne supérieure du score
+        (thème et écart temporel minimal connus, autres composantes au maximum)
+        permet d'écarter le couple entier. Sinon, seules les paires partageant un
+        jeton du préfixe (jetons rares d'abord) sont vérifiées, ce qui est sans
+        perte : une paire sans jeton commun de préfixe ne peut pas atteindre le
+        seuil. Les messages sans entité ou sans mot sont comparés à tous les
+        blocs atteignables.
+        """
         n = len(messages)
-        visited = [False] * n
-        clusters = []
+        if n < 2:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        
+        features = self._extract_message_features(messages)
+        threshold = self.similarity_threshold
+        window = int(self.blocking_window_hours * 3600 * 1e6)
+        
+        # Blocs : (thème, type d'horodatage, tranche temporelle)
+        buckets = np.where(features['time_kinds'] > 0, features['timestamps'] // window, 0)
+        keys = np.stack([features['themes'], features['time_kinds'], buckets], axis=1)
+        block_keys, block_ids = np.unique(keys, axis=0, return_inverse=True)
+        block_ids = block_ids.ravel()
+        order = np.argsort(block_ids, kind='stable')
+        bounds = np.searchsorted(block_ids[order], np.arange(len(block_keys) + 1))
+        blocks = [order[bounds[b]:bounds[b + 1]] for b in range(len(block_keys))]
+        
+        # Borne supérieure par couple de blocs : thème et écart temporel minimal connus,
+        # géographie au maximum ; la marge restante doit venir des entités et du contenu
+        theme_table = features['theme_table']
+        block_themes, block_kinds, block_buckets = block_keys[:, 0], block_keys[:, 1], block_keys[:, 2]
+        theme_max = np.maximum(
+            theme_table[block_themes[:, None], block_themes[None, :]],
+            theme_table[block_themes[None, :], block_themes[:, None]]
+        )
+        min_gap = np.maximum(np.abs(block_buckets[:, None] - block_buckets[None, :]) - 1, 0) * self.blocking_window_hours
+        temporal_max = np.select([min_gap <= 1, min_gap <= 6, min_gap <= 24], [1.0, 0.8, 0.5], 0.2)
+        comparable = (block_kinds[:, None] == block_kinds[None, :]) & (block_kinds[:, None] > 0)
+        temporal_max[~comparable] = 0.5
+        margins = threshold - (theme_max * 0.3 + 0.2 + temporal_max * 0.15)
+        reachable = margins <= 0.35  # Entités (0.2) + contenu (0.15) au maximum
+        
+        entity_counts = np.asarray(features['entities'].sum(axis=1)).ravel()
+        word_counts = np.asarray(features['words'].sum(axis=1)).ravel()
+        wildcard = (entity_counts == 0) | (word_counts == 0) | ~features['has_content']
+        if 'content_embeddings' in features:
+            # Le filtrage de préfixe borne le Jaccard des mots, pas le cosinus : comparaison exhaustive
+            wildcard[:] = True
+        regular = np.flatnonzero(~wildcard)
+        
+        found_rows, found_cols = [], []
+        
+        # Couples de blocs où les composantes bon marché suffisent : toutes les paires
+        for a, b in zip(*np.nonzero(np.triu(margins <= 0))):
+            self._collect_grid_pairs(features, blocks[a], blocks[b], found_rows, found_cols)
+        
+        # Messages sans entité ou sans mot : comparés à tous les blocs atteignables
+        self._collect_grid_pairs(
+            features, np.flatnonzero(wildcard), np.arange(n), found_rows, found_cols,
+            mask=lambda chunk: reachable[block_ids[chunk][:, None], block_ids[None, :]]
+        )
         
-        for i in range(n):
-            if not visited[i]:
-                cluster = self._build_cluster(i, messages, similarity_matrix, visited)
-                if cluster['messages']:
-                    clusters.append(cluster)
+        # Autres messages : filtrage de préfixe, une passe par niveau de marge
+        candidate_rows, candidate_cols = [], []
+        for margin in np.unique(margins[(margins > 0) & reachable]):
+            entity_prefix = self._prefix_matrix(features['entities'][regular], margin / 0.4)
+            word_prefix = self._prefix_matrix(features['words'][regular], margin / 0.3)
+            shared = sparse.triu(entity_prefix @ entity_prefix.T + word_prefix @ word_prefix.T, k=1).tocoo()
+            i, j = regular[shared.row], regular[shared.col]
+            same_margin = margins[block_ids[i], block_ids[j]] == margin
+            candidate_rows.append(i[same_margin])
+            candidate_cols.append(j[same_margin])
+        
+        # Vérification exacte des paires candidates
+        if candidate_rows:
+            candidates = np.concatenate(candidate_rows) * n + np.concatenate(candidate_cols)
+            for start in range(0, len(candidates), self.max_block_pairs):
+                i, j = np.divmod(candidates[start:start + self.max_block_pairs], n)
+                similar = self._calculate_pair_similarities(features, i, j) >= threshold
+                found_rows.append(i[similar])
+                found_cols.append(j[similar])
+        
+        if not found_rows:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        
+        # Une paire peut être trouvée deux fois (bloc diagonal, messages génériques)
+        pairs = np.sort(np.concatenate(found_rows) * n + np.concatenate(found_cols))
+        pairs = pairs[np.concatenate(([True], pairs[1:] != pairs[:-1]))]
+        return np.divmod(pairs, n)
+    
+    def _collect_grid_pairs(self, features: Dict, rows: np.ndarray, cols: np.ndarray,
+                            found_rows: List, found_cols: List, mask=None) -> None:
+        """Évaluer toutes les paires lignes x colonnes par tranches de lignes
+        
+        mask(chunk) peut restreindre les colonnes retenues pour chaque tranche.
+        """
+        if not len(rows) or not len(cols):
+            return
+        step = max(1, self.max_block_pairs // len(cols))
+        for start in range(0, len(rows), step):
+            chunk = rows[start:start + step]
+            similar = self._calculate_similarity_block(features, chunk, cols) >= self.similarity_threshold
+            similar &= chunk[:, None] != cols[None, :]
+            if mask is not None:
+                similar &= mask(chunk)
+            i, j = np.nonzero(similar)
+            found_rows.append(np.minimum(chunk[i], cols[j]))
+            found_cols.append(np.maximum(chunk[i], cols[j]))
+    
+    def _prefix_matrix(self, incidence: sparse.csr_matrix, jaccard_threshold: float) -> sparse.csr_matrix:
+        """Garder pour chaque ensemble les jetons de son préfixe (jetons les plus rares)
+        
+        Deux ensembles de Jaccard >= t partagent au moins un jeton de leurs
+        préfixes de longueur |x| - ceil(t|x|) + 1. Comme
+        0.2 * Je + 0.15 * Jc >= marge impose Je >= marge / 0.4 ou
+        Jc >= marge / 0.3, une paire sans jeton de préfixe commun est écartée.
+        """
+        if jaccard_threshold > 1:
+            return sparse.csr_matrix(incidence.shape, dtype=np.int32)
+        
+        # Renuméroter les jetons par fréquence croissante
+        frequencies = np.asarray(incidence.sum(axis=0)).ravel()
+        rank = np.empty(len(frequencies), dtype=np.int64)
+        rank[np.argsort(frequencies, kind='stable')] = np.arange(len(frequencies))
+        ranked = sparse.csr_matrix(
+            (incidence.data, rank[incidence.indices], incidence.indptr), shape=incidence.shape
+        )
+        ranked.sort_indices()
         
-        return clusters
+        sizes = np.diff(ranked.indptr)
+        prefix_lengths = sizes - np.ceil(jaccard_threshold * sizes - 1e-9).astype(np.int64) + 1
+        positions = np.arange(ranked.nnz) - np.repeat(ranked.indptr[:-1], sizes)
+        keep = positions < np.repeat(prefix_lengths, sizes)
+        
+        row_ids = np.repeat(np.arange(ranked.shape[0]), sizes)[keep]
+        return sparse.csr_matrix(
+            (np.ones(int(keep.sum()), dtype=np.int32), (row_ids, ranked.indices[keep])), shape=ranked.shape
+        )
     
-    def _build_cluster(self, start_idx: int, messages: List[Dict], 
-                      similarity_matrix: np.ndarray, visited: List[bool]) -> Dict:
-        """Construire un cluster à partir d'un message de départ"""
-        cluster_messages = []
-        queue = [start_idx]
-        visited[start_idx] = True
+    def _create_clusters(self, messages: List[Dict], similar_pairs) -> List[Dict]:
+        """Créer des clusters (composantes connexes des paires au-dessus du seuil)
         
-        while queue:
-            current_idx = queue.pop(0)
-            cluster_messages.append(messages[current_idx])
-            
-            # Trouver les messages similaires
-            for j in range(len(messages)):
-                if not visited[j] and similarity_matrix[current_idx][j] >= self.similarity_threshold:
-                    visited[j] = True
-                    queue.append(j)
+        Accepte la liste de paires de _find_similar_pairs ou une matrice dense.
+        """
+        n = len(messages)
+        if isinstance(similar_pairs, np.ndarray) and similar_pairs.ndim == 2:
+            similar_pairs = np.nonzero(np.triu(similar_pairs >= self.similarity_threshold, k=1))
         
-        return {
-            'id': f"cluster_{start_idx}_{len(cluster_messages)}",
-            'messages': cluster_messages,
-            'size': len(cluster_messages),
-            'created_at': datetime.now().isoformat()
-        }
+        components = DisjointSet(n)
+        for i, j in zip(*similar_pairs):
+            components.union(int(i), int(j))
+        
+        members = defaultdict(list)
+        for i in range(n):
+            members[components.find(i)].append(i)
+        
+        clusters = []
+        for indices in sorted(members.values(), key=lambda group: group[0]):
+            cluster_messages = [messages[idx] for idx in indices]
+            clusters.append({
+                'id': f"cluster_{indices[0]}_{len(cluster_messages)}",
+                'messages': cluster_messages,
+                'size': len(cluster_messages),
+                'created_at': datetime.now().isoformat()
+            })
+        
+        return clusters
     
     def _enrich_clusters(self, clusters: List[Dict]) -> List[Dict]:
         """Enrichir les clusters avec des métriques d'analyse"""
@@ -10,6 +10,7 @@ from typing import Dict, List, Optional, Tuple
 from services.document_clustering_service import DocumentClusteringService
 from services.prescription_service import PrescriptionService
 from optimized_database import optimized_db
+from async_database import async_db
 from cache_manager import cache_manager
 import logging
 
@@ -22,61 +23,89 @@ class ThreatEvaluationService:
         self.clustering_service = DocumentClusteringService()
         self.prescription_service = PrescriptionService()
         
-    def evaluate_new_document(self, document: Dict) -> Dict:
+    def evaluate_new_document(self, document: Dict, clustering_result: Optional[Dict] = None,
+                              cluster: Optional[Dict] = None) -> Dict:
         """
         Évalue un nouveau document et réévalue les menaces/prescriptions du cluster
         
         Args:
             document: Document nouvellement inséré
+            clustering_result: Résultat de clustering déjà calculé (évite un re-clustering)
+            cluster: Cluster du document déjà identifié (avec ses documents)
             
         Returns:
             Dict: Résultat de l'évaluation avec menaces, prédictions, prescriptions
         """
         try:
-            # 1. Obtenir tous les documents de la base pour le clustering
-            all_documents = optimized_db.get_all_documents_cached()
-            
-            # 2. Effectuer le clustering avec le nouveau document
-            clustering_result = self.clustering_service.cluster_documents_by_similarity(all_documents)
-            
-            if 'error' in clustering_result:
-                return {'error': f'Erreur clustering: {clustering_result["error"]}'}
+            if cluster is None:
+                all_documents = None
+                if clustering_result is None:
+                    # Sans cluster fourni : clustering complet (chemin historique)
+                    all_documents = optimized_db.get_all_documents_cached()
+                    clustering_result = self.clustering_service.cluster_documents_by_similarity(all_documents)
+                
+                if 'error' in clustering_result:
+                    return {'error': f'Erreur clustering: {clustering_result["error"]}'}
+                
+                # Identifier le cluster du nouveau document
+                cluster = self._find_document_cluster(document, clustering_result)
+                
+                if not cluster:
+                    return {'error': 'Impossible de déterminer le cluster du document'}
+                
+                if all_documents is not None:
+                    cluster = {**cluster, 'documents': self._get_cluster_documents(cluster, all_documents)}
             
-            # 3. Identifier le cluster du nouveau document
-            document_cluster = self._find_document_cluster(document, clustering_result)
+            return self.evaluate_cluster(cluster, document)
             
-            if not document_cluster:
-                return {'error': 'Impossible de déterminer le cluster du document'}
+        except Exception as e:
+            logger.error(f"Erreur lors de l'évaluation du document: {e}")
+            return {'error': str(e)}
+    
+    def evaluate_cluster(self, cluster: Dict, new_document: Optional[Dict] = None) -> Dict:
+        """
+        Évalue en une seule passe tous les documents d'un cluster
+        
+        Les mots-clés et tendances du cluster sont calculés une fois et partagés
+        entre les membres ; les menaces sont lues et écrites par requêtes groupées.
+        
+        Args:
+            cluster: Cluster déjà calculé ({'id', 'documents', ...})
+            new_document: Document à l'origine de la réévaluation, le cas échéant
             
-            # 4. Récupérer tous les documents du même cluster
-            cluster_documents = self._get_cluster_documents(document_cluster, all_documents)
+        Returns:
+            Dict: Résultat de l'évaluation avec menaces, prédictions, prescriptions
+        """
+        try:
+            start_time = time.time()
+            cluster_documents = cluster.get('documents', [])
             
-            # 5. Réévaluer les menaces pour ce cluster
-            threat_evaluation = self._evaluate_cluster_threats(cluster_documents, document)
+            # 1. Réévaluer les menaces pour ce cluster
+            threat_evaluation = self._evaluate_cluster_threats(cluster_documents, new_document)
             
-            # 6. Réévaluer les prédictions pour ce cluster
-            prediction_evaluation = self._evaluate_cluster_predictions(cluster_documents, document)
+            # 2. Réévaluer les prédictions pour ce cluster
+            prediction_evaluation = self._evaluate_cluster_predictions(cluster_documents, new_document)
             
-            # 7. Réévaluer les prescriptions pour ce cluster
-            prescription_evaluation = self._evaluate_cluster_prescriptions(cluster_documents, document)
+            # 3. Réévaluer les prescriptions pour ce cluster
+            prescription_evaluation = self._evaluate_cluster_prescriptions(cluster_documents, new_document)
             
-            # 8. Invalider les caches pertinents
+            # 4. Invalider les caches pertinents
             self._invalidate_related_caches()
             
             return {
                 'success': True,
-                'document_id': document.get('id'),
-                'cluster_id': document_cluster['id'],
+                'document_id': new_document.get('id') if new_document else None,
+                'cluster_id': cluster.get('id'),
                 'cluster_size': len(cluster_documents),
                 'threats': threat_evaluation,
                 'predictions': prediction_evaluation,
                 'prescriptions': prescription_evaluation,
-                'processing_time': time.time() - time.time(),
+                'processing_time': time.time() - start_time,
                 'timestamp': datetime.now().isoformat()
             }
             
         except Exception as e:
-            logger.error(f"Erreur lors de l'évaluation du document: {e}")
+            logger.error(f"Erreur lors de l'évaluation du cluster: {e}")
             return {'error': str(e)}
     
     def _find_document_cluster(self, document: Dict, clustering_result: Dict) -> Optional[Dict]:
@@ -125,7 +154,7 @@ class ThreatEvaluationService:
             logger.error(f"Erreur lors de la récupération des documents du cluster: {e}")
             return []
     
-    def _evaluate_cluster_threats(self, cluster_documents: List[Dict], new_document: Dict) -> Dict:
+    def _evaluate_cluster_threats(self, cluster_documents: List[Dict], new_document: Optional[Dict]) -> Dict:
         """Évalue les menaces pour un cluster de documents"""
         try:
             threat_results = {
@@ -134,27 +163,30 @@ class ThreatEvaluationService:
                 'total_processed': 0
             }
             
-            # Analyser chaque document du cluster
+            # Facteur de mots-clés du cluster : calculé une seule fois pour tous les membres
+            keyword_factor = self._calculate_cluster_keyword_factor(cluster_documents)
+            
+            # Menaces existantes de tous les documents en une seule requête
+            existing_threats = self._get_existing_threats([doc.get('id') for doc in cluster_documents])
+            
+            updates = []
+            creations = []
             for doc in cluster_documents:
-                doc_id = doc.get('id')
-                
                 # Calculer le score de menace basé sur le cluster
-                threat_score = self._calculate_cluster_threat_score(doc, cluster_documents)
-                
-                # Vérifier si une menace existe déjà pour ce document
-                existing_threat = self._get_existing_threat(doc_id)
+                threat_score = self._calculate_cluster_threat_score(doc, cluster_documents, keyword_factor)
                 
+                existing_threat = existing_threats.get(str(doc.get('id')))
                 if existing_threat:
-                    # Réévaluer la menace existante
-                    updated_threat = self._update_threat(existing_threat, threat_score, cluster_documents)
-                    threat_results['updated_threats'].append(updated_threat)
+                    updates.append((existing_threat, threat_score))
                 else:
-                    # Créer une nouvelle menace
-                    new_threat = self._create_new_threat(doc, threat_score, cluster_documents)
-                    threat_results['new_threats'].append(new_threat)
+                    creations.append((doc, threat_score))
                 
                 threat_results['total_processed'] += 1
             
+            # Écritures groupées : un UPDATE et un INSERT pour tout le cluster
+            threat_results['updated_threats'] = self._update_threats(updates, cluster_documents)
+            threat_results['new_threats'] = self._create_new_threats(creations, cluster_documents)
+            
             return threat_results
             
         except Exception as e:
@@ -173,9 +205,11 @@ class ThreatEvaluationService:
             # Analyser les tendances du cluster
             cluster_trends = self._analyze_cluster_trends(cluster_documents)
             
+            # Recherches indépendantes : lancées en parallèle puis traitées dans l'ordre
+            existing_predictions = self._get_existing_predictions([trend['pattern'] for trend in cluster_trends])
+            
             # Générer ou mettre à jour les prédictions
-            for trend in cluster_trends:
-                existing_prediction = self._get_existing_prediction(trend['pattern'])
+            for trend, existing_prediction in zip(cluster_trends, existing_predictions):
                 
                 if existing_prediction:
                     # Réévaluer la prédiction existante
@@ -206,9 +240,11 @@ class ThreatEvaluationService:
             # Analyser les besoins en prescriptions du cluster
             cluster_needs = self._analyze_cluster_prescription_needs(cluster_documents)
             
+            # Recherches indépendantes : lancées en parallèle puis traitées dans l'ordre
+            existing_prescriptions = self._get_existing_prescriptions([need['type'] for need in cluster_needs])
+            
             # Générer ou mettre à jour les prescriptions
-            for need in cluster_needs:
-                existing_prescription = self._get_existing_prescription(need['type'])
+            for need, existing_prescription in zip(cluster_needs, existing_prescriptions):
                 
                 if existing_prescription:
                     # Réévaluer la prescription existante
@@ -216,7 +252,7 @@ class ThreatEvaluationService:
                     prescription_results['updated_prescriptions'].append(updated_prescription)
                 else:
                     # Créer une nouvelle prescription
-                    new_prescription = self._create_new_prescription(need, cluster_documents)
+                    new_prescription = self._create_new_prescription(need, cluster_documents, new_document)
                     prescription_results['new_prescriptions'].append(new_prescription)
                 
                 prescription_results['total_processed'] += 1
@@ -227,7 +263,20 @@ class ThreatEvaluationService:
             logger.error(f"Erreur lors de l'évaluation des prescriptions: {e}")
             return {'error': str(e)}
     
-    def _calculate_cluster_threat_score(self, document: Dict, cluster_documents: List[Dict]) -> float:
+    def _calculate_cluster_keyword_factor(self, cluster_documents: List[Dict]) -> float:
+        """Calcule le facteur lié aux mots-clés critiques présents dans le cluster"""
+        critical_keywords = ['urgent', 'critique', 'menace', 'danger', 'alerte']
+        keyword_factor = 0
+        
+        for doc in cluster_documents:
+            content = doc.get('content', '').lower()
+            keyword_count = sum(1 for keyword in critical_keywords if keyword in content)
+            keyword_factor += keyword_count * 0.05
+        
+        return keyword_factor
+    
+    def _calculate_cluster_threat_score(self, document: Dict, cluster_documents: List[Dict],
+                                        keyword_factor: Optional[float] = None) -> float:
         """Calcule le score de menace basé sur le contexte du cluster"""
         try:
             base_score = document.get('threat_score', 0.5)
@@ -236,13 +285,8 @@ class ThreatEvaluationService:
             cluster_factor = len(cluster_documents) * 0.1  # Plus de documents = plus de risque
             
             # Analyse des mots-clés critiques dans le cluster
-            critical_keywords = ['urgent', 'critique', 'menace', 'danger', 'alerte']
-            keyword_factor = 0
-            
-            for doc in cluster_documents:
-                content = doc.get('content', '').lower()
-                keyword_count = sum(1 for keyword in critical_keywords if keyword in content)
-                keyword_factor += keyword_count * 0.05
+            if keyword_factor is None:
+                keyword_factor = self._calculate_cluster_keyword_factor(cluster_documents)
             
             # Score final ajusté
             adjusted_score = min(1.0, base_score + cluster_factor + keyword_factor)
@@ -253,113 +297,128 @@ class ThreatEvaluationService:
             logger.error(f"Erreur calcul score menace: {e}")
             return 0.5
     
-    def _get_existing_threat(self, document_id: str) -> Optional[Dict]:
-        """Récupère une menace existante pour un document"""
+    def _get_existing_threats(self, document_ids: List) -> Dict[str, Dict]:
+        """Récupère en une requête les menaces existantes de plusieurs documents"""
         try:
-            threat = optimized_db.execute_query(
-                "SELECT * FROM threats WHERE metadata->>'document_id' = %s",
-                (str(document_id),), fetch_one=True
-            )
-            return threat
+            ids = [str(doc_id) for doc_id in document_ids if doc_id is not None]
+            if not ids:
+                return {}
+            
+            threats = optimized_db.execute_prepared('threats_by_document_ids', (ids,), fetch_all=True)
+            
+            existing = {}
+            for threat in threats or []:
+                document_id = (threat.get('metadata') or {}).get('document_id')
+                existing.setdefault(str(document_id), threat)
+            return existing
         except Exception as e:
-            logger.error(f"Erreur récupération menace: {e}")
-            return None
+            logger.error(f"Erreur récupération menaces: {e}")
+            return {}
+    
+    def _severity_for_score(self, score: float) -> str:
+        """Détermine la sévérité correspondant à un score"""
+        if score >= 0.8:
+            return 'critical'
+        elif score >= 0.6:
+            return 'high'
+        elif score >= 0.4:
+            return 'medium'
+        return 'low'
     
-    def _update_threat(self, existing_threat: Dict, new_score: float, cluster_documents: List[Dict]) -> Dict:
-        """Met à jour une menace existante"""
+    def _update_threats(self, updates: List[Tuple[Dict, float]], cluster_documents: List[Dict]) -> List[Dict]:
+        """Met à jour plusieurs menaces existantes en une seule instruction"""
         try:
-            threat_id = existing_threat['id']
-            
-            # Calculer les changements
-            old_score = existing_threat.get('score', 0)
-            score_change = new_score - old_score
-            
-            # Déterminer la nouvelle sévérité
-            if new_score >= 0.8:
-                severity = 'critical'
-            elif new_score >= 0.6:
-                severity = 'high'
-            elif new_score >= 0.4:
-                severity = 'medium'
-            else:
-                severity = 'low'
-            
-            # Mettre à jour en base
-            optimized_db.execute_query("""
-                UPDATE threats 
-                SET score = %s, severity = %s, 
-                    metadata = jsonb_set(metadata, '{cluster_size}', %s),
+            if not updates:
+                return []
+            
+            cluster_size = len(cluster_documents)
+            rows = []
+            results = []
+            for existing_threat, new_score in updates:
+                old_score = existing_threat.get('score', 0)
+                severity = self._severity_for_score(new_score)
+                rows.append((existing_threat['id'], new_score, severity, json.dumps(cluster_size)))
+                results.append({
+                    'id': existing_threat['id'],
+                    'old_score': old_score,
+                    'new_score': new_score,
+                    'score_change': new_score - old_score,
+                    'severity': severity,
+                    'cluster_size': cluster_size,
+                    'action': 'updated'
+                })
+            
+            updated = optimized_db.execute_values_query("""
+                UPDATE threats AS t
+                SET score = v.score, severity = v.severity,
+                    metadata = jsonb_set(t.metadata, '{cluster_size}', v.cluster_size::jsonb),
                     updated_at = NOW()
-                WHERE id = %s
-            """, (new_score, severity, json.dumps(len(cluster_documents)), threat_id))
+                FROM (VALUES %s) AS v(id, score, severity, cluster_size)
+                WHERE t.id = v.id
+                RETURNING t.id
+            """, rows, template="(%s::integer, %s::real, %s, %s)", fetch_all=True)
+            if updated is None:
+                return [{'error': f"Échec de la mise à jour de {len(rows)} menaces"}]
             
-            return {
-                'id': threat_id,
-                'old_score': old_score,
-                'new_score': new_score,
-                'score_change': score_change,
-                'severity': severity,
-                'cluster_size': len(cluster_documents),
-                'action': 'updated'
-            }
+            # Seules les menaces effectivement modifiées (une menace supprimée entre-temps n'y est plus)
+            updated_ids = {row['id'] for row in updated}
+            return [result for result in results if int(result['id']) in updated_ids]
             
         except Exception as e:
-            logger.error(f"Erreur mise à jour menace: {e}")
-            return {'error': str(e)}
+            logger.error(f"Erreur mise à jour menaces: {e}")
+            return [{'error': str(e)}]
     
-    def _create_new_threat(self, document: Dict, threat_score: float, cluster_documents: List[Dict]) -> Dict:
-        """Crée une nouvelle menace"""
+    def _create_new_threats(self, creations: List[Tuple[Dict, float]], cluster_documents: List[Dict]) -> List[Dict]:
+        """Crée plusieurs menaces en une seule instruction"""
         try:
-            # Déterminer la sévérité
-            if threat_score >= 0.8:
-                severity = 'critical'
-            elif threat_score >= 0.6:
-                severity = 'high'
-            elif threat_score >= 0.4:
-                severity = 'medium'
-            else:
-                severity = 'low'
-            
-            # Créer la menace
-            threat_data = {
-                'name': f"Menace détectée - {document.get('name', 'Document')}",
-                'description': f"Menace identifiée dans le cluster de {len(cluster_documents)} documents",
-                'score': threat_score,
-                'severity': severity,
-                'status': 'active',
-                'metadata': {
+            if not creations:
+                return []
+            
+            cluster_size = len(cluster_documents)
+            # Ids réservés avant l'insertion : RETURNING ne garantit pas l'ordre des lignes insérées
+            threat_ids = optimized_db.allocate_ids('threats', len(creations))
+            if threat_ids is None:
+                return [{'error': f"Allocation de {len(creations)} ids de menaces impossible"}]
+            
+            rows = []
+            for (document, threat_score), threat_id in zip(creations, threat_ids):
+                metadata = {
                     'document_id': document.get('id'),
-                    'cluster_size': len(cluster_documents),
+                    'cluster_size': cluster_size,
                     'source': 'cluster_analysis',
                     'created_by': 'threat_evaluation_service'
                 }
-            }
-            
-            # Insérer en base
-            threat_id = optimized_db.execute_query("""
-                INSERT INTO threats (name, description, score, severity, status, metadata, created_at)
-                VALUES (%s, %s, %s, %s, %s, %s, NOW())
-                RETURNING id
-            """, (
-                threat_data['name'],
-                threat_data['description'],
-                threat_data['score'],
-                threat_data['severity'],
-                threat_data['status'],
-                json.dumps(threat_data['metadata'])
-            ), fetch_one=True)
-            
-            return {
-                'id': threat_id['id'] if threat_id else None,
-                'score': threat_score,
-                'severity': severity,
-                'cluster_size': len(cluster_documents),
-                'action': 'created'
-            }
+                rows.append((
+                    threat_id,
+                    f"Menace détectée - {document.get('name', 'Document')}",
+                    f"Menace identifiée dans le cluster de {cluster_size} documents",
+                    threat_score,
+                    self._severity_for_score(threat_score),
+                    'active',
+                    json.dumps(metadata)
+                ))
+            
+            inserted = optimized_db.execute_values_query("""
+                INSERT INTO threats (id, name, description, score, severity, status, metadata)
+                VALUES %s
+            """, rows)
+            if inserted is None:
+                return [{'error': f"Échec de la création de {len(rows)} menaces"}]
+            
+            return [
+                {
+                    'id': threat_id,
+                    'score': threat_score,
+                    'severity': self._severity_for_score(threat_score),
+                    'cluster_size': cluster_size,
+                    'action': 'created'
+                }
+                for (_, threat_score), threat_id in zip(creations, threat_ids)
+            ]
             
         except Exception as e:
-            logger.error(f"Erreur création menace: {e}")
-            return {'error': str(e)}
+            logger.error(f"Erreur création menaces: {e}")
+            return [{'error': str(e)}]
     
     def _analyze_cluster_trends(self, cluster_documents: List[Dict]) -> List[Dict]:
         """Analyse les tendances dans un cluster de documents"""
@@ -391,17 +450,14 @@ class ThreatEvaluationService:
             logger.error(f"Erreur analyse tendances: {e}")
             return []
     
-    def _get_existing_prediction(self, pattern: str) -> Optional[Dict]:
-        """Récupère une prédiction existante pour un pattern"""
+    def _get_existing_predictions(self, patterns: List[str]) -> List[Optional[Dict]]:
+        """Récupère en parallèle les prédictions existantes de plusieurs patterns"""
         try:
-            prediction = optimized_db.execute_query(
-                "SELECT * FROM predictions WHERE pattern = %s",
-                (pattern,), fetch_one=True
-            )
-            return prediction
+            return async_db.fetch_many([('prediction_by_pattern', (pattern,)) for pattern in patterns],
+                                       fetch_one=True)
         except Exception as e:
-            logger.error(f"Erreur récupération prédiction: {e}")
-            return None
+            logger.error(f"Erreur récupération prédictions: {e}")
+            return [None] * len(patterns)
     
     def _update_prediction(self, existing_prediction: Dict, trend: Dict, cluster_documents: List[Dict]) -> Dict:
         """Met à jour une prédiction existante"""
@@ -492,17 +548,14 @@ class ThreatEvaluationService:
             logger.error(f"Erreur analyse besoins prescriptions: {e}")
             return []
     
-    def _get_existing_prescription(self, prescription_type: str) -> Optional[Dict]:
-        """Récupère une prescription existante"""
+    def _get_existing_prescriptions(self, prescription_types: List[str]) -> List[Optional[Dict]]:
+        """Récupère en parallèle les prescriptions existantes de plusieurs types (colonne category)"""
         try:
-            prescription = optimized_db.execute_query(
-                "SELECT * FROM prescriptions WHERE type = %s",
-                (prescription_type,), fetch_one=True
-            )
-            return prescription
+            return async_db.fetch_many([('prescription_by_category', (prescription_type,))
+                                        for prescription_type in prescription_types], fetch_one=True)
         except Exception as e:
-            logger.error(f"Erreur récupération prescription: {e}")
-            return None
+            logger.error(f"Erreur récupération prescriptions: {e}")
+            return [None] * len(prescription_types)
     
     def _update_prescription(self, existing_prescription: Dict, need: Dict, cluster_documents: List[Dict]) -> Dict:
         """Met à jour une prescription existante"""
@@ -510,11 +563,19 @@ class ThreatEvaluationService:
             prescription_id = existing_prescription['id']
             
             # Mettre à jour en base
-            optimized_db.execute_query("""
+            updated = optimized_db.execute_query("""
                 UPDATE prescriptions 
-                SET priority = %s, description = %s, updated_at = NOW()
+                SET priority = %s, confidence = %s, actions = %s::jsonb, updated_at = NOW()
                 WHERE id = %s
-            """, (need['priority'], need['description'], prescription_id))
+                RETURNING id
+            """, (
+                need['priority'],
+                self._prescription_confidence(need, cluster_documents),
+                json.dumps(self._prescription_actions(need)),
+                prescription_id
+            ), fetch_one=True)
+            if not updated:
+                return {'error': f"Prescription {prescription_id} non mise à jour"}
             
             return {
                 'id': prescription_id,
@@ -528,29 +589,37 @@ class ThreatEvaluationService:
             logger.error(f"Erreur mise à jour prescription: {e}")
             return {'error': str(e)}
     
-    def _create_new_prescription(self, need: Dict, cluster_documents: List[Dict]) -> Dict:
-        """Crée une nouvelle prescription"""
+    def _create_new_prescription(self, need: Dict, cluster_documents: List[Dict],
+                                 new_document: Optional[Dict] = None) -> Dict:
+        """Crée une nouvelle prescription
+
+        Colonnes de la table prescriptions : le type du besoin va dans category,
+        sa description dans actions, et threat_id désigne le document à
+        l'origine de la réévaluation (à défaut, le premier du cluster).
+        """
         try:
-            # Créer la prescription
+            source_document = new_document or cluster_documents[0]
             prescription_data = {
-                'type': need['type'],
+                'threat_id': str(source_document.get('id')),
                 'priority': need['priority'],
-                'description': need['description'],
-                'status': 'pending',
-                'cluster_size': len(cluster_documents)
+                'category': need['type'],
+                'confidence': self._prescription_confidence(need, cluster_documents),
+                'actions': self._prescription_actions(need),
+                'status': 'pending'
             }
             
             # Insérer en base
             prescription_id = optimized_db.execute_query("""
-                INSERT INTO prescriptions (type, priority, description, status, cluster_size, created_at)
-                VALUES (%s, %s, %s, %s, %s, NOW())
+                INSERT INTO prescriptions (threat_id, priority, category, confidence, actions, status, created_at)
+                VALUES (%s, %s, %s, %s, %s::jsonb, %s, NOW())
                 RETURNING id
             """, (
-                prescription_data['type'],
+                prescription_data['threat_id'],
                 prescription_data['priority'],
-                prescription_data['description'],
-                prescription_data['status'],
-                prescription_data['cluster_size']
+                prescription_data['category'],
+                prescription_data['confidence'],
+                json.dumps(prescription_data['actions']),
+                prescription_data['status']
             ), fetch_one=True)
             
             return {
@@ -565,19 +634,20 @@ class ThreatEvaluationService:
             logger.error(f"Erreur création prescription: {e}")
             return {'error': str(e)}
     
+    @staticmethod
+    def _prescription_confidence(need: Dict, cluster_documents: List[Dict]) -> float:
+        """Part du cluster concernée par le besoin"""
+        return round(need['document_count'] / max(len(cluster_documents), 1), 3)
+    
+    @staticmethod
+    def _prescription_actions(need: Dict) -> List[Dict]:
+        """Action unique de révision portant la description du besoin"""
+        return [{'type': 'review', 'description': need['description']}]
+    
     def _invalidate_related_caches(self):
         """Invalide les caches liés aux évaluations"""
         try:
-            cache_patterns = [
-                'threats*',
-                'predictions*',
-                'prescriptions*',
-                'dashboard*',
-                'clustering*'
-            ]
-            
-            for pattern in cache_patterns:
-                cache_manager.invalidate_pattern(pattern)
+            cache_manager.invalidate_tags(['threats', 'predictions', 'prescriptions', 'clustering'])
                 
         except Exception as e:
             logger.error(f"Erreur invalidation cache: {e}")
\ No newline at end of file
@@ -10,13 +10,16 @@ import sys
 import time
 import psutil
 from datetime import datetime, timedelta
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, send_file, stream_with_context
 from flask_cors import CORS
 from werkzeug.security import check_password_hash, generate_password_hash
 from services.prescription_service import PrescriptionService
 from services.document_clustering_service import DocumentClusteringService
 from services.threat_evaluation_service import ThreatEvaluationService
+from services.incremental_clustering_service import IncrementalClusteringService
+from services.similarity_artifact_store import SimilarityArtifactStore
 from optimized_database import optimized_db
+from async_database import async_db
 from cache_manager import cache_manager
 from performance_monitor import performance_monitor
 from routes.deep_learning_routes import deep_learning_bp
@@ -59,6 +62,11 @@ app.register_blueprint(deep_learning_bp)
 prescription_service = PrescriptionService()
 clustering_service = DocumentClusteringService()
 threat_evaluation_service = ThreatEvaluationService()
+cluster_state_service = IncrementalClusteringService(clustering_service)
+similarity_artifacts = SimilarityArtifactStore()
+
+# Mettre à jour l'index ANN à chaque document stocké
+optimized_db.add_document_listener(cluster_state_service.index_document)
 
 # Démarrer le monitoring des performances
 performance_monitor.start_monitoring()
@@ -120,6 +128,13 @@ def calculate_threat_score(data):
         print(f"Erreur calcul score de menace: {e}")
         return 0.3  # Score par défaut
 
+def load_cluster_documents(cluster_handle):
+    """Compléter un cluster de l'état incrémental avec ses documents (clé primaire)"""
+    return {
+        **cluster_handle,
+        'documents': optimized_db.get_documents_by_ids(cluster_handle['document_ids'])
+    }
+
 # =============================================================================
 # ROUTES D'AUTHENTIFICATION
 # =============================================================================
@@ -133,10 +148,7 @@ def login():
         password = data.get('password')
 
         # Vérifier les credentials depuis la base optimisée
-        user = optimized_db.execute_query(
-            "SELECT * FROM users WHERE username = %s AND is_active = TRUE",
-            (username,), fetch_one=True
-        )
+        user = optimized_db.execute_prepared('user_by_username', (username,), fetch_one=True)
 
         if user and check_password_hash(user['password'], password):
             user_data = {
@@ -169,10 +181,7 @@ def auth_login():
             return jsonify({'success': False, 'message': 'Nom d\'utilisateur et mot de passe requis'}), 400
 
         # Vérification via la base de données optimisée
-        user = optimized_db.execute_query(
-            "SELECT * FROM users WHERE username = %s AND is_active = TRUE",
-            (username,), fetch_one=True
-        )
+        user = optimized_db.execute_prepared('user_by_username', (username,), fetch_one=True)
 
         if user and check_password_hash(user['password'], password):
             token = f'db_token_{username}_{int(time.time())}'
@@ -229,6 +238,28 @@ def dashboard_stats():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _page_args(default_limit: int = 50):
+    """Paramètres de pagination keyset : (curseur, taille de page, champs)"""
+    cursor = request.args.get('cursor') or None
+    limit = max(1, min(request.args.get('limit', default_limit, type=int), 500))
+    fields = request.args.get('fields') or None
+    return cursor, limit, fields
+
+@app.route('/api/threats', methods=['GET'])
+@token_required
+def list_threats():
+    """List threats, keyset-paginated (?cursor=&limit=&fields=)"""
+    try:
+        cursor, limit, fields = _page_args(default_limit=50)
+        page = optimized_db.get_threats_page(fields, cursor, limit)  # Cache 3 minutes
+
+        return jsonify({'threats': page['items'], 'next_cursor': page['next_cursor'], 'fields': page['fields']})
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/threats/realtime', methods=['GET'])
 @token_required
 def realtime_threats():
@@ -236,24 +267,12 @@ def realtime_threats():
     try:
         limit = int(request.args.get('limit', 10))
 
-        # Utiliser le cache pour les menaces
-        cache_key = f"realtime_threats_limit_{limit}"
-        cached_threats = cache_manager.get(cache_key)
-
-        if cached_threats:
-            return jsonify({'threats': cached_threats})
-
-        threats = optimized_db.execute_query("""
-            SELECT id, name, description, score, severity, status, 
-                   created_at as timestamp, metadata
-            FROM threats 
-            WHERE status = 'active'
-            ORDER BY score DESC, created_at DESC
-            LIMIT %s
-        """, (limit,), fetch_all=True)
-
-        if threats:
-            cache_manager.set(cache_key, threats, 60)  # Cache 1 minute
+        # Utiliser le cache pour les menaces (requêtes simultanées regroupées)
+        threats = cache_manager.get_or_compute(
+            f"realtime_threats_limit_{limit}",
+            lambda: optimized_db.execute_prepared('realtime_threats', (limit,), fetch_all=True),
+            60, depends_on=['threats']  # Cache 1 minute
+        )
 
         return jsonify({'threats': threats or []})
 
@@ -267,62 +286,47 @@ def threat_evolution():
     try:
         filter_period = request.args.get('filter', '24H')
 
-        cache_key = f"threat_evolution_{filter_period}"
-        cached_evolution = cache_manager.get(cache_key)
-
-        if cached_evolution:
-            return jsonify({'evolution': cached_evolution})
-
-        # Calculer les données d'évolution
-        evolution_data = {
-            'predictions': [],
-            'scores': [],
-            'timeline': []
-        }
-
-        # Récupérer les données historiques
-        threats = optimized_db.execute_query("""
-            SELECT score, created_at
-            FROM threats
-            WHERE created_at >= NOW() - INTERVAL '1 day'
-            ORDER BY created_at
-        """, fetch_all=True)
-
-        if threats:
-            for threat in threats:
-                evolution_data['scores'].append({
-                    'timestamp': threat['created_at'].isoformat(),
-                    'score': threat['score']
-                })
-
-        cache_manager.set(cache_key, evolution_data, 300)  # Cache 5 minutes
+        evolution_data = cache_manager.get_or_compute(
+            f"threat_evolution_{filter_period}", _compute_threat_evolution,
+            300, depends_on=['threats']  # Cache 5 minutes
+        )
 
         return jsonify({'evolution': evolution_data})
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _compute_threat_evolution():
+    """Données d'évolution des menaces sur les dernières 24 heures"""
+    # Calculer les données d'évolution
+    evolution_data = {
+        'predictions': [],
+        'scores': [],
+        'timeline': []
+    }
+
+    # Récupérer les données historiques
+    threats = optimized_db.execute_prepared('threat_evolution_24h', fetch_all=True)
+
+    if threats:
+        for threat in threats:
+            evolution_data['scores'].append({
+                'timestamp': threat['created_at'].isoformat(),
+                'score': threat['score']
+            })
+
+    return evolution_data
+
 @app.route('/api/scenarios', methods=['GET'])
 @token_required
 def get_scenarios():
     """Get active scenarios with caching"""
     try:
-        cache_key = "active_scenarios"
-        cached_scenarios = cache_manager.get(cache_key)
-
-        if cached_scenarios:
-            return jsonify({'scenarios': cached_scenarios})
-
-        scenarios = optimized_db.execute_query("""
-            SELECT id, name, description, conditions, actions, 
-                   status, priority, validity_window, created_at
-            FROM scenarios 
-            WHERE status = 'active'
-            ORDER BY priority ASC
-        """, fetch_all=True)
-
-        if scenarios:
-            cache_manager.set(cache_key, scenarios, 180)  # Cache 3 minutes
+        scenarios = cache_manager.get_or_compute(
+            "active_scenarios",
+            lambda: optimized_db.execute_prepared('active_scenarios', fetch_all=True),
+            180, depends_on=['scenarios']  # Cache 3 minutes
+        )
 
         return jsonify({'scenarios': scenarios or []})
 
@@ -332,27 +336,15 @@ def get_scenarios():
 @app.route('/api/actions', methods=['GET'])
 @token_required
 def get_actions():
-    """Get recent actions with caching"""
+    """Get recent actions, keyset-paginated (?cursor=&limit=&fields=)"""
     try:
-        cache_key = "recent_actions"
-        cached_actions = cache_manager.get(cache_key)
-
-        if cached_actions:
-            return jsonify({'actions': cached_actions})
-
-        actions = optimized_db.execute_query("""
-            SELECT id, type, description, priority, status, 
-                   related_threat_id, created_at, metadata
-            FROM actions 
-            ORDER BY created_at DESC
-            LIMIT 50
-        """, fetch_all=True)
+        cursor, limit, fields = _page_args(default_limit=50)
+        page = optimized_db.get_actions_page(fields, cursor, limit)  # Cache 2 minutes
 
-        if actions:
-            cache_manager.set(cache_key, actions, 120)  # Cache 2 minutes
-
-        return jsonify({'actions': actions or []})
+        return jsonify({'actions': page['items'], 'next_cursor': page['next_cursor'], 'fields': page['fields']})
 
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -361,23 +353,11 @@ def get_actions():
 def get_alerts():
     """Get active alerts with caching"""
     try:
-        cache_key = "active_alerts"
-        cached_alerts = cache_manager.get(cache_key)
-
-        if cached_alerts:
-            return jsonify({'alerts': cached_alerts})
-
-        alerts = optimized_db.execute_query("""
-            SELECT id, type, severity, title, message, is_read, 
-                   related_threat_id, created_at
-            FROM alerts 
-            WHERE is_read = FALSE
-            ORDER BY created_at DESC
-            LIMIT 20
-        """, fetch_all=True)
-
-        if alerts:
-            cache_manager.set(cache_key, alerts, 60)  # Cache 1 minute
+        alerts = cache_manager.get_or_compute(
+            "active_alerts",
+            lambda: optimized_db.execute_prepared('active_alerts', fetch_all=True),
+            60, depends_on=['alerts']  # Cache 1 minute
+        )
 
         return jsonify({'alerts': alerts or []})
 
@@ -389,16 +369,10 @@ def get_alerts():
 def get_prescriptions():
     """Get prescriptions with caching"""
     try:
-        cache_key = "prescriptions_all"
-        cached_prescriptions = cache_manager.get(cache_key)
-
-        if cached_prescriptions:
-            return jsonify({'prescriptions': cached_prescriptions})
-
-        prescriptions = prescription_service.get_prescriptions()
-
-        if prescriptions:
-            cache_manager.set(cache_key, prescriptions, 180)  # Cache 3 minutes
+        prescriptions = cache_manager.get_or_compute(
+            "prescriptions_all", prescription_service.get_prescriptions,
+            180, depends_on=['prescriptions']  # Cache 3 minutes
+        )
 
         return jsonify({'prescriptions': prescriptions or []})
     except Exception as e:
@@ -409,16 +383,10 @@ def get_prescriptions():
 def get_prescriptions_statistics():
     """Get prescriptions statistics with caching"""
     try:
-        cache_key = "prescriptions_statistics"
-        cached_stats = cache_manager.get(cache_key)
-
-        if cached_stats:
-            return jsonify({'statistics': cached_stats})
-
-        statistics = prescription_service.get_prescription_statistics()
-
-        if statistics:
-            cache_manager.set(cache_key, statistics, 120)  # Cache 2 minutes
+        statistics = cache_manager.get_or_compute(
+            "prescriptions_statistics", prescription_service.get_prescription_statistics,
+            120, depends_on=['prescriptions']  # Cache 2 minutes
+        )
 
         return jsonify({'statistics': statistics or []})
     except Exception as e:
@@ -431,17 +399,48 @@ def get_prescriptions_statistics():
 @app.route('/api/clustering/database-documents', methods=['GET'])
 @token_required
 def get_database_documents():
-    """Récupérer tous les documents de la base de données avec cache"""
+    """Récupérer tous les documents de la base de données
+
+    Avec cursor, limit ou fields : une page keyset (created_at, id) projetée
+    sur les champs demandés. Sinon la réponse JSON complète est produite en
+    flux : la liste en cache si elle existe, sinon une lecture par pages
+    keyset, sans charger toute la table ni garder une connexion du pool
+    pendant que le client lit la réponse.
+    """
     try:
-        documents = optimized_db.get_all_documents_cached()
-
-        return jsonify({
-            'success': True,
-            'documents': documents,
-            'count': len(documents),
-            'message': f'{len(documents)} documents récupérés de la base de données'
-        })
+        if any(name in request.args for name in ('cursor', 'limit', 'fields')):
+            cursor, limit, fields = _page_args(default_limit=100)
+            page = optimized_db.get_documents_page(fields, cursor, limit)
+            return jsonify({
+                'success': True,
+                'documents': page['items'],
+                'count': len(page['items']),
+                'next_cursor': page['next_cursor'],
+                'fields': page['fields'],
+                'message': f"{len(page['items'])} documents récupérés de la base de données"
+            })
 
+        cached_documents = cache_manager.get("all_documents", namespace='documents')
+        documents = iter(cached_documents) if cached_documents else optimized_db.iter_documents_paged()
+        # Premier document lu avant l'envoi : une erreur de base renvoie encore un 500
+        first_document = next(documents, None)
+
+        def generate():
+            count = 0
+            yield '{"success": true, "documents": ['
+            if first_document is not None:
+                yield json.dumps(first_document, default=str)
+                count = 1
+                for document in documents:
+                    yield ',' + json.dumps(document, default=str)
+                    count += 1
+            message = json.dumps(f'{count} documents récupérés de la base de données')
+            yield f'], "count": {count}, "message": {message}}}'
+
+        return Response(stream_with_context(generate()), mimetype='application/json')
+
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -470,7 +469,15 @@ def analyze_document_clustering():
             return jsonify({'error': 'Pas assez de documents pour l\'analyse (minimum 2 requis)'}), 400
 
         # Effectuer le clustering avec cache intégré
-        clustering_result = clustering_service.cluster_documents_by_similarity(all_documents)
+        clustering_result = clustering_service.cluster_documents_by_similarity(all_documents, return_matrix=True)
+        
+        # La matrice est exportée en artefact binaire, pas sérialisée en JSON
+        similarity_matrix = clustering_result.pop('similarity_matrix', None)
+        if similarity_matrix is not None:
+            clustering_result['similarity_artifact'] = similarity_artifacts.save(
+                similarity_matrix, [doc.get('id') for doc in all_documents]
+            )
+            del similarity_matrix
 
         # Générer des insights si pas d'erreur
         insights = {}
@@ -502,6 +509,60 @@ def analyze_document_clustering():
             'message': 'Erreur lors de l\'analyse de clustering'
         }), 500
 
+@app.route('/api/clustering/similarity/<artifact_id>', methods=['GET'])
+@token_required
+def download_similarity_matrix(artifact_id):
+    """Télécharger la matrice de similarité (float16 .npy ou COO .npz)"""
+    try:
+        path = similarity_artifacts.get_file_path(artifact_id)
+        if path is None or not os.path.exists(path):
+            return jsonify({'error': 'Matrice de similarité introuvable'}), 404
+        
+        return send_file(path, mimetype='application/octet-stream', as_attachment=True,
+                         download_name=os.path.basename(path))
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/clustering/similarity/<artifact_id>/rows', methods=['GET'])
+@token_required
+def get_similarity_rows(artifact_id):
+    """Lignes paginées de la matrice de similarité, réduites aux top-k voisins"""
+    try:
+        offset = max(request.args.get('offset', 0, type=int), 0)
+        limit = max(1, min(request.args.get('limit', 50, type=int), 500))
+        top_k = max(1, min(request.args.get('top_k', 10, type=int), 100))
+        
+        page = similarity_artifacts.get_rows(artifact_id, offset, limit, top_k)
+        if page is None:
+            return jsonify({'error': 'Matrice de similarité introuvable'}), 404
+        
+        return jsonify({'success': True, **page})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/clustering/state', methods=['GET'])
+@token_required
+def get_clustering_state():
+    """Obtenir l'état des clusters incrémentaux (centroïdes, dérive)"""
+    try:
+        return jsonify({'success': True, 'state': cluster_state_service.get_state_stats()})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/clustering/rebuild', methods=['POST'])
+@token_required
+def rebuild_clustering_state():
+    """Lancer la reconstruction complète des clusters en arrière-plan"""
+    try:
+        started = cluster_state_service.schedule_rebuild()
+        return jsonify({
+            'success': True,
+            'started': started,
+            'message': 'Reconstruction lancée' if started else 'Reconstruction déjà en cours'
+        }), 202
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 # =============================================================================
 # ROUTES DE PERFORMANCE
 # =============================================================================
@@ -522,6 +583,8 @@ def system_performance():
                 'response_times': performance_summary.get('response_times', {}),
                 'system_resources': performance_summary.get('system_resources', {}),
                 'cache_performance': performance_summary.get('cache_performance', {}),
+                'embedding_cache': performance_summary.get('embedding_cache', {}),
+                'inference': performance_summary.get('inference', {}),
                 'database_queries': performance_summary.get('database_queries', {}),
                 'cache_stats': cache_stats
             }
@@ -535,26 +598,20 @@ def system_performance():
 def ingestion_status():
     """Get data ingestion status"""
     try:
-        cache_key = "ingestion_status"
-        cached_status = cache_manager.get(cache_key)
-
-        if cached_status:
-            return jsonify(cached_status)
-
-        # Simuler des statistiques d'ingestion
-        processing_stats = {
-            'avg_processing_time': 150,
-            'total_processed': 1250,
-            'errors': 5,
-            'throughput': 8.5
-        }
-
-        result = {
-            'processing_stats': processing_stats,
-            'last_update': datetime.now().isoformat()
-        }
-
-        cache_manager.set(cache_key, result, 60)  # Cache 1 minute
+        result = cache_manager.get_or_compute(
+            "ingestion_status",
+            lambda: {
+                # Simuler des statistiques d'ingestion
+                'processing_stats': {
+                    'avg_processing_time': 150,
+                    'total_processed': 1250,
+                    'errors': 5,
+                    'throughput': 8.5
+                },
+                'last_update': datetime.now().isoformat()
+            },
+            60, depends_on=['documents']  # Cache 1 minute
+        )
 
         return jsonify(result)
 
@@ -636,14 +693,14 @@ def ingestion_upload():
                 cursor.close()
                 
                 # Invalider le cache
-                cache_manager.invalidate_pattern("documents_*")
-                cache_manager.invalidate_pattern("ingestion_*")
+                cache_manager.invalidate_tags(['documents', 'ingestion'])
                 
             except Exception as db_error:
                 conn.rollback()
                 print(f"Erreur base de données: {db_error}")
             finally:
-                conn.close()
+                # Rendre la connexion au pool (la fermer la ferait fuir du pool)
+                optimized_db.return_connection(conn)
         
         return jsonify({
             'success': True,
@@ -789,22 +846,26 @@ def get_collection_requests():
 def get_prescription_signals():
     """Get prescription signals (weak and strong)"""
     try:
-        # Récupérer les signaux faibles et forts
-        signals = {
-            'weak_signals': optimized_db.execute_query("""
+        # Récupérer les signaux faibles et forts (deux lectures indépendantes, en parallèle)
+        weak_signals, strong_signals = async_db.fetch_many([
+            ("""
                 SELECT id, title, description, confidence_score, created_at
                 FROM prescriptions 
                 WHERE confidence_score < 0.5 AND status = 'pending'
                 ORDER BY created_at DESC
                 LIMIT 10
-            """, fetch_all=True),
-            'strong_signals': optimized_db.execute_query("""
+            """, ()),
+            ("""
                 SELECT id, title, description, confidence_score, created_at
                 FROM prescriptions 
                 WHERE confidence_score >= 0.7 AND status IN ('pending', 'in_progress')
                 ORDER BY confidence_score DESC, created_at DESC
                 LIMIT 10
-            """, fetch_all=True)
+            """, ())
+        ], fetch_all=True)
+        signals = {
+            'weak_signals': weak_signals,
+            'strong_signals': strong_signals
         }
         
         return jsonify(signals)
@@ -921,53 +982,44 @@ def data_ingestion():
             stored_document = optimized_db.store_document(document)
             
             # RÉÉVALUATION AUTOMATIQUE INTÉGRÉE
-            # Récupérer tous les documents pour le clustering
-            all_documents = optimized_db.get_all_documents_cached(force_refresh=True)
-            
-            # Effectuer le clustering avec le nouveau document
+            # Affecter le nouveau document aux clusters existants (centroïdes),
+            # sans re-clusteriser tout le corpus
+            document_cluster = None
+            cluster_document = {**document, 'id': str(stored_document.get('id', document.get('id')))}
             try:
-                clustering_result = clustering_service.cluster_documents_by_similarity(all_documents)
+                stored_rows = optimized_db.get_documents_by_ids([stored_document.get('id')])
+                if stored_rows:
+                    cluster_document = stored_rows[0]
+                assigned_cluster = cluster_state_service.assign_document(cluster_document)
+                if assigned_cluster:
+                    document_cluster = load_cluster_documents(assigned_cluster)
+                clustering_result = {
+                    'clusters': [document_cluster] if document_cluster else [],
+                    'assignment': assigned_cluster,
+                    'state': cluster_state_service.get_state_stats()
+                }
             except Exception as e:
                 print(f"Erreur clustering: {e}")
                 clustering_result = {'error': str(e), 'clusters': []}
             
-            # Identifier le cluster du nouveau document
-            document_cluster = None
-            if 'error' not in clustering_result:
-                for cluster in clustering_result.get('clusters', []):
-                    for doc in cluster.get('documents', []):
-                        if doc.get('id') == document.get('id'):
-                            document_cluster = cluster
-                            break
-            
-            # Évaluer automatiquement le document
-            evaluation_result = threat_evaluation_service.evaluate_new_document(document)
+            # Évaluer en une passe le document et tout son cluster
+            # (document isolé : évalué seul)
+            evaluated_cluster = document_cluster or {'id': None, 'documents': [cluster_document]}
+            evaluation_result = threat_evaluation_service.evaluate_cluster(evaluated_cluster, cluster_document)
             
             # RÉÉVALUATION DU CLUSTER COMPLET
             cluster_reevaluation = {}
             if document_cluster:
                 cluster_documents = document_cluster.get('documents', [])
-                cluster_evaluations = []
-                
-                # Réévaluer tous les documents du même cluster
-                for doc in cluster_documents:
-                    if doc.get('id') != document.get('id'):  # Éviter de réévaluer le même document
-                        doc_evaluation = threat_evaluation_service.evaluate_new_document(doc)
-                        cluster_evaluations.append(doc_evaluation)
-                
                 cluster_reevaluation = {
                     'cluster_id': document_cluster.get('id'),
                     'cluster_size': len(cluster_documents),
-                    'documents_reevaluated': len(cluster_evaluations),
-                    'evaluations': cluster_evaluations
+                    'documents_reevaluated': evaluation_result.get('threats', {}).get('total_processed', 0),
+                    'evaluations': evaluation_result.get('threats', {})
                 }
             
             # Invalider les caches pertinents
-            cache_manager.invalidate_pattern('threats')
-            cache_manager.invalidate_pattern('documents')
-            cache_manager.invalidate_pattern('clusters')
-            cache_manager.invalidate_pattern('prescriptions')
-            cache_manager.invalidate_pattern('predictions')
+            cache_manager.invalidate_tags(['threats', 'documents', 'clustering', 'prescriptions', 'predictions'])
             
             return jsonify({
                 'success': True,
@@ -989,10 +1041,7 @@ def data_ingestion():
             }
 
             # Invalider les caches pertinents
-            cache_manager.invalidate_pattern('threats')
-            cache_manager.invalidate_pattern('dashboard')
-            cache_manager.invalidate_pattern('prescriptions')
-            cache_manager.invalidate_pattern('predictions')
+            cache_manager.invalidate_tags(['threats', 'prescriptions', 'predictions'])
 
             return jsonify({
                 'success': True,
@@ -1007,10 +1056,89 @@ def data_ingestion():
             'message': 'Erreur lors de l\'ingestion des données'
         }), 500
 
+@app.route('/api/ingestion/bulk', methods=['POST'])
+@token_required
+def bulk_ingestion():
+    """Ingestion groupée de documents au format NDJSON (un document JSON par ligne)
+
+    Le corps est lu en flux et écrit par lots, avec une seule invalidation du
+    cache. Pas de réévaluation par document : POST /api/clustering/rebuild
+    reconstruit les clusters après un import massif.
+    """
+    try:
+        batch_size = max(1, min(request.args.get('batch_size', 1000, type=int), 10000))
+        parse_errors = []
+
+        def read_documents():
+            for line_number, line in enumerate(request.stream, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    item = json.loads(line)
+                except ValueError as e:
+                    parse_errors.append(f"Ligne {line_number}: JSON invalide ({e})")
+                    continue
+                if not isinstance(item, dict):
+                    parse_errors.append(f"Ligne {line_number}: objet JSON attendu")
+                    continue
+                # Même enveloppe que /api/ingestion ({"type": "document", "document": {...}}) ou document nu
+                yield item.get('document', {}) if item.get('type') == 'document' else item
+
+        summary = optimized_db.store_documents_bulk(read_documents(), batch_size=batch_size)
+        failed = summary['failed'] + len(parse_errors)
+
+        return jsonify({
+            'success': failed == 0,
+            'stored': summary['stored'],
+            'failed': failed,
+            'batches': summary['batches'],
+            'ids': summary['ids'],
+            'errors': (parse_errors + summary['errors'])[:20],
+            'message': f"{summary['stored']} documents ingérés, {failed} en échec"
+        }), 200 if summary['stored'] or not failed else 400
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'message': 'Erreur lors de l\'ingestion groupée'
+        }), 500
+
 # =============================================================================
 # NOUVEAUX ENDPOINTS DE RÉÉVALUATION
 # =============================================================================
 
+@app.route('/api/documents/<int:document_id>/similar', methods=['GET'])
+@token_required
+def get_similar_documents(document_id):
+    """Top-k documents les plus proches via l'index ANN (sans matrice n²)"""
+    try:
+        k = max(1, min(request.args.get('k', 10, type=int), 100))
+        neighbours = cluster_state_service.find_similar_documents(document_id, k)
+        
+        if neighbours is None:
+            return jsonify({'error': 'Document non indexé'}), 404
+        
+        documents = optimized_db.get_documents_by_ids([n['document_id'] for n in neighbours])
+        documents_by_id = {str(doc.get('id')): doc for doc in documents}
+        for neighbour in neighbours:
+            neighbour['document'] = documents_by_id.get(neighbour['document_id'])
+        
+        return jsonify({
+            'success': True,
+            'document_id': document_id,
+            'k': k,
+            'similar_documents': neighbours
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'message': 'Erreur lors de la recherche de documents similaires'
+        }), 500
+
 @app.route('/api/documents/<int:document_id>/evaluate', methods=['POST'])
 @token_required
 def evaluate_document(document_id):
@@ -1025,46 +1153,26 @@ def evaluate_document(document_id):
         if not document:
             return jsonify({'error': 'Document non trouvé'}), 404
         
-        # Récupérer tous les documents pour le clustering
-        all_documents = optimized_db.get_all_documents_cached(force_refresh=True)
+        # Retrouver le cluster du document dans l'état incrémental
+        cluster_handle = cluster_state_service.get_document_cluster(document_id)
+        document_cluster = load_cluster_documents(cluster_handle) if cluster_handle else None
         
-        # Effectuer le clustering
-        clustering_result = clustering_service.cluster_documents_by_similarity(all_documents)
+        # Évaluer le document et tout son cluster en une passe
+        evaluated_cluster = document_cluster or {'id': None, 'documents': [document]}
+        evaluation_result = threat_evaluation_service.evaluate_cluster(evaluated_cluster, document)
         
-        # Identifier le cluster du document
-        document_cluster = None
-        if 'error' not in clustering_result:
-            for cluster in clustering_result.get('clusters', []):
-                for doc in cluster.get('documents', []):
-                    if doc.get('id') == document_id:
-                        document_cluster = cluster
-                        break
-        
-        # Évaluer le document
-        evaluation_result = threat_evaluation_service.evaluate_new_document(document)
-        
-        # Réévaluer tout le cluster
         cluster_reevaluation = {}
         if document_cluster:
             cluster_documents = document_cluster.get('documents', [])
-            cluster_evaluations = []
-            
-            for doc in cluster_documents:
-                if doc.get('id') != document_id:
-                    doc_evaluation = threat_evaluation_service.evaluate_new_document(doc)
-                    cluster_evaluations.append(doc_evaluation)
-            
             cluster_reevaluation = {
                 'cluster_id': document_cluster.get('id'),
                 'cluster_size': len(cluster_documents),
-                'documents_reevaluated': len(cluster_evaluations),
-                'evaluations': cluster_evaluations
+                'documents_reevaluated': evaluation_result.get('threats', {}).get('total_processed', 0),
+                'evaluations': evaluation_result.get('threats', {})
             }
         
         # Invalider les caches
-        cache_manager.invalidate_pattern('threats')
-        cache_manager.invalidate_pattern('prescriptions')
-        cache_manager.invalidate_pattern('predictions')
+        cache_manager.invalidate_tags(['threats', 'prescriptions', 'predictions'])
         
         return jsonify({
             'success': True,
@@ -1085,42 +1193,25 @@ def evaluate_document(document_id):
 def evaluate_cluster(cluster_id):
     """Réévalue tous les documents d'un cluster - utilisé par l'ingestion intégrée"""
     try:
-        # Récupérer tous les documents pour le clustering
-        all_documents = optimized_db.get_all_documents_cached()
-        
-        # Effectuer le clustering
-        clustering_result = clustering_service.cluster_documents_by_similarity(all_documents)
-        
-        if 'error' in clustering_result:
-            return jsonify({'error': f'Erreur clustering: {clustering_result["error"]}'}), 500
-        
-        # Trouver le cluster spécifique
-        target_cluster = None
-        for cluster in clustering_result.get('clusters', []):
-            if cluster.get('id') == cluster_id:
-                target_cluster = cluster
-                break
+        # Retrouver le cluster dans l'état incrémental (sans re-clustering)
+        cluster_handle = cluster_state_service.get_cluster(f"cluster_{cluster_id}")
         
-        if not target_cluster:
+        if not cluster_handle:
             return jsonify({'error': 'Cluster non trouvé'}), 404
         
-        # Évaluer chaque document du cluster
-        evaluation_results = []
-        cluster_documents = target_cluster.get('documents', [])
+        target_cluster = load_cluster_documents(cluster_handle)
         
-        for doc in cluster_documents:
-            evaluation_result = threat_evaluation_service.evaluate_new_document(doc)
-            evaluation_results.append(evaluation_result)
+        # Évaluer tous les documents du cluster en une passe
+        evaluation_result = threat_evaluation_service.evaluate_cluster(target_cluster)
+        evaluation_results = [evaluation_result]
         
         # Invalider les caches
-        cache_manager.invalidate_pattern('threats')
-        cache_manager.invalidate_pattern('prescriptions')
-        cache_manager.invalidate_pattern('predictions')
+        cache_manager.invalidate_tags(['threats', 'prescriptions', 'predictions'])
         
         return jsonify({
             'success': True,
             'cluster_id': cluster_id,
-            'documents_evaluated': len(evaluation_results),
+            'documents_evaluated': len(target_cluster.get('documents', [])),
             'evaluation_results': evaluation_results,
             'message': f'Cluster {cluster_id} réévalué avec succès - intégré avec ingestion'
         })
@@ -0,0 +1,46 @@
+"""
+Tests de l'index ANN par LSH (ré-indexation, compactage)
+
+Usage: python -m pytest test_ann_index.py
+"""
+
+import numpy as np
+import pytest
+
+from services.ann_index import ANNIndex, RandomProjectionLSHIndex
+
+def random_vectors(count, dimension=32, seed=0):
+    return np.random.default_rng(seed).random((count, dimension)).astype(np.float32)
+
+def test_ann_index_is_abstract():
+    with pytest.raises(TypeError):
+        ANNIndex()
+
+def test_reindexing_compacts_dead_positions():
+    index = RandomProjectionLSHIndex(32, n_tables=8, n_bits=6)
+    ids = [str(i) for i in range(100)]
+    index.add(ids, random_vectors(100))
+
+    for round_ in range(20):
+        index.add(ids[:10], random_vectors(10, seed=round_ + 1))
+
+    assert len(index) == 100
+    assert len(index.ids) - len(index) <= index.compact_ratio * len(index.ids)
+    assert sum(len(bucket) for bucket in index.tables[0].values()) == len(index.ids)
+
+def test_queries_after_compaction_return_latest_vectors():
+    index = RandomProjectionLSHIndex(32, n_tables=8, n_bits=6)
+    vectors = random_vectors(50)
+    index.add([str(i) for i in range(50)], vectors)
+
+    replacement = random_vectors(40, seed=7)
+    index.add([str(i) for i in range(40)], replacement)
+    index.compact()
+
+    assert len(index.ids) == 50
+    np.testing.assert_allclose(
+        index.get_vector('3').toarray().ravel(), replacement[3] / np.linalg.norm(replacement[3]), rtol=1e-5
+    )
+    neighbours = index.query(replacement[3], k=1)
+    assert neighbours[0][0] == '3'
+    assert neighbours[0][1] == pytest.approx(1.0, abs=1e-5)
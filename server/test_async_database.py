@@ -0,0 +1,82 @@
+"""
+Tests d'AsyncDatabase avec un pool factice (sans asyncpg ni PostgreSQL)
+
+Usage: python -m pytest test_async_database.py
+"""
+
+import asyncio
+
+import pytest
+
+import async_database
+from async_database import AsyncDatabase
+
+class FailingPool:
+    """Pool dont chaque connexion lève error à l'exécution"""
+
+    def __init__(self, error):
+        self.error = error
+        self.attempts = 0
+
+    def acquire(self, timeout=None):
+        pool = self
+
+        class Connection:
+            async def __aenter__(self):
+                pool.attempts += 1
+                return self
+
+            async def __aexit__(self, *exc_info):
+                return False
+
+            async def fetch(self, sql, *params):
+                raise pool.error
+
+            fetchrow = execute = fetch
+
+        return Connection()
+
+class RecordingFallback:
+    def __init__(self):
+        self.calls = []
+
+    def execute_query(self, query, params=None, fetch_one=False, fetch_all=False):
+        self.calls.append(query)
+        return [{'source': 'synchrone'}]
+
+@pytest.fixture
+def database():
+    db = AsyncDatabase(dsn='postgresql://test', fallback=RecordingFallback())
+    db.retry_backoff = 0
+    yield db
+    db.close()
+
+def use_pool(db, pool):
+    async def get_pool():
+        return pool
+    db._get_pool = get_pool
+
+def test_query_error_is_raised_without_retry(database):
+    pool = FailingPool(ValueError("colonne inconnue"))
+    use_pool(database, pool)
+
+    with pytest.raises(ValueError):
+        database.run(database.execute_query("SELECT 1", fetch_all=True))
+    assert pool.attempts == 1
+
+def test_connection_error_is_raised_after_last_retry(database):
+    pool = FailingPool(ConnectionResetError("connexion perdue"))
+    use_pool(database, pool)
+
+    with pytest.raises(ConnectionResetError):
+        database.run(database.execute_query("SELECT 1", fetch_all=True))
+    assert pool.attempts == database.max_retries
+
+def test_fetch_many_falls_back_to_sync_on_query_error(database, monkeypatch):
+    monkeypatch.setattr(async_database, 'ASYNCPG_AVAILABLE', True)
+    use_pool(database, FailingPool(ValueError("relation inconnue")))
+
+    results = database.fetch_many([("SELECT * FROM threats WHERE id = %s", (1,))], fetch_all=True)
+
+    assert results == [[{'source': 'synchrone'}]]
+    assert database.fallback.calls == ["SELECT * FROM threats WHERE id = %s"]
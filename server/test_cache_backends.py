@@ -0,0 +1,45 @@
+"""
+Tests des niveaux L2 du cache (Redis ignoré s'il est injoignable)
+
+Usage: REDIS_URL=redis://localhost:6379 python -m pytest test_cache_backends.py
+"""
+
+import os
+import uuid
+
+import pytest
+
+from cache_backends import InMemoryCacheBackend, RedisCacheBackend
+
+@pytest.fixture(params=['memory', 'redis'])
+def backend(request):
+    if request.param == 'memory':
+        yield InMemoryCacheBackend()
+        return
+    try:
+        redis_backend = RedisCacheBackend(os.environ.get('REDIS_URL', 'redis://localhost:6379'),
+                                          prefix=f"test:{uuid.uuid4().hex[:8]}:")
+    except Exception:
+        pytest.skip("Redis injoignable")
+    yield redis_backend
+    redis_backend.clear()
+
+def test_invalidate_tags_removes_values_and_tag(backend):
+    backend.set('threats:list', [1, 2], 60, ['threats'])
+    backend.set('threats:page', [1], 60, ['threats', 'pages'])
+    backend.set('documents:list', ['a'], 60, ['documents'])
+
+    backend.invalidate_tags(['threats'])
+
+    assert backend.get('threats:list') is None
+    assert backend.get('threats:page') is None
+    assert backend.get('documents:list')[0] == ['a']
+
+def test_key_tagged_after_invalidation_stays_invalidatable(backend):
+    backend.set('threats:list', [1], 60, ['threats'])
+    backend.invalidate_tags(['threats'])
+    backend.set('threats:list', [2], 60, ['threats'])
+
+    backend.invalidate_tags(['threats'])
+
+    assert backend.get('threats:list') is None
@@ -0,0 +1,62 @@
+"""
+Tests du CacheManager (L1 fragmenté, sans L2)
+
+Usage: python -m pytest test_cache_manager.py
+"""
+
+import threading
+
+from cache_manager import CacheManager
+
+def test_max_entries_below_shard_count_is_enforced():
+    cache = CacheManager(shard_count=16)
+    cache.set_namespace_limits('alerts', max_entries=4)
+
+    for i in range(10):
+        cache.set(f"alerts:{i}", {'id': i})
+
+    assert cache.get_stats()['namespaces']['alerts']['entries'] == 4
+    # La dernière écriture n'est jamais évincée par sa propre insertion
+    assert cache.get("alerts:9") == {'id': 9}
+
+def test_max_entries_spans_all_shards():
+    cache = CacheManager(shard_count=4)
+    cache.set_namespace_limits('reports', max_entries=10)
+
+    for i in range(100):
+        cache.set(f"reports:{i}", i)
+
+    stats = cache.get_stats()['namespaces']['reports']
+    assert stats['entries'] == 10
+    assert stats['evictions'] == 90
+
+def test_invalidation_during_compute_discards_only_its_tags():
+    cache = CacheManager(shard_count=4)
+
+    def compute_while_invalidating(tag):
+        def compute():
+            cache.invalidate_tags([tag])
+            return ['résultat']
+        return compute
+
+    cache.get_or_compute("threats:list", compute_while_invalidating('threats'), depends_on=['threats'])
+    assert cache.get("threats:list") is None
+
+    cache.get_or_compute("threats:list", compute_while_invalidating('documents'), depends_on=['threats'])
+    assert cache.get("threats:list") == ['résultat']
+
+def test_concurrent_invalidations_are_all_counted():
+    cache = CacheManager(shard_count=4)
+
+    def invalidate():
+        for _ in range(1000):
+            cache.invalidate_tags(['threats'])
+
+    threads = [threading.Thread(target=invalidate) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert cache.invalidation_epoch == 8000
+    assert cache.tag_epochs['threats'] == 8000
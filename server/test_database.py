@@ -0,0 +1,74 @@
+"""
+Tests de la façade Database (API historique) sur le pool d'OptimizedDatabase
+Les tests en base utilisent PostgreSQL (DATABASE_URL) et sont ignorés si
+aucune base n'est joignable
+
+Usage: DATABASE_URL=postgresql://localhost/test_db python -m pytest test_database.py
+"""
+
+import os
+import uuid
+
+import pytest
+
+psycopg2 = pytest.importorskip("psycopg2")
+
+from database import Database
+from optimized_database import OptimizedDatabase, optimized_db
+
+@pytest.fixture
+def engine():
+    if not os.environ.get('DATABASE_URL'):
+        pytest.skip("DATABASE_URL non définie")
+    engine = OptimizedDatabase(min_connections=1, max_connections=2)
+    if not engine.ensure_schema():
+        pytest.skip("Base PostgreSQL injoignable")
+    yield engine
+    if engine.connection_pool:
+        engine.connection_pool.closeall()
+
+@pytest.fixture
+def facade(engine):
+    return Database(engine)
+
+@pytest.fixture
+def username(engine):
+    """Nom d'utilisateur unique, supprimé en fin de test"""
+    name = f"test_{uuid.uuid4().hex[:8]}"
+    yield name
+    engine.execute_query("DELETE FROM users WHERE username = %s", (name,))
+
+def test_facade_shares_the_global_engine_by_default():
+    assert Database().engine is optimized_db
+
+def test_user_lifecycle(facade, username):
+    created = facade.create_user(username, 's3cret', 2, 'Agent Test', f"{username}@example.org")
+    assert created['username'] == username
+    assert 'password' not in created
+    assert facade.create_user(username, 'autre', 1, 'Doublon', 'x@example.org') is None
+
+    assert facade.verify_password(username, 's3cret')['id'] == created['id']
+    assert facade.verify_password(username, 'faux') is None
+
+    updated = facade.update_user(created['id'], clearance_level=4)
+    assert updated['clearance_level'] == 4
+
+    assert facade.delete_user(created['id'])
+    assert facade.get_user_by_id(created['id']) is None
+
+def test_connections_are_returned_to_the_pool(facade, engine, username):
+    facade.create_user(username, 's3cret', 1, 'Agent Test', f"{username}@example.org")
+    for _ in range(5):
+        facade.get_user_by_username(username)
+
+    assert engine.get_pool_stats()['in_use'] == 0
+
+def test_failed_statement_rolls_back_and_releases_connection(facade, engine, username):
+    created = facade.create_user(username, 's3cret', 1, 'Agent Test', f"{username}@example.org")
+
+    # Valeur non entière : erreur SQL, transaction annulée
+    assert facade.update_user(created['id'], name='Renommé', email=None, is_active=None,
+                              clearance_level='pas un entier') is None
+
+    assert facade.get_user_by_id(created['id'])['name'] == 'Agent Test'
+    assert engine.get_pool_stats()['in_use'] == 0
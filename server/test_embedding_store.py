@@ -0,0 +1,107 @@
+"""
+Tests du stockage persistant des embeddings (répertoire temporaire)
+
+Usage: python -m pytest test_embedding_store.py
+"""
+
+import numpy as np
+import pytest
+
+import models.embedding_store as embedding_store_module
+from models.embedding_store import EmbeddingStore, content_hash
+
+DIM = 8
+
+def random_vectors(count, seed=0):
+    return np.random.default_rng(seed).standard_normal((count, DIM)).astype(np.float32)
+
+@pytest.fixture
+def store(tmp_path):
+    return EmbeddingStore(str(tmp_path), enabled=True)
+
+@pytest.fixture
+def namespace(store):
+    return store.namespace('test/model', max_length=128)
+
+class FakeEncoder:
+    """Encodeur déterministe qui mémorise les textes reçus"""
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, batch_size=None):
+        self.encoded.extend(texts)
+        vectors = np.stack([random_vectors(1, seed=len(text))[0] for text in texts])
+        return type('Tensor', (), {'numpy': lambda _: vectors})()
+
+def test_vectors_round_trip_through_float16(namespace):
+    vectors = random_vectors(3)
+    namespace.add(['a', 'b', 'c'], vectors)
+
+    found = namespace.lookup(['c', 'a', 'absent'])
+
+    assert set(found) == {'a', 'c'}
+    np.testing.assert_allclose(found['a'], vectors[0], atol=1e-2)
+    np.testing.assert_allclose(found['c'], vectors[2], atol=1e-2)
+    assert found['a'].dtype == np.float32
+
+def test_known_hashes_are_not_written_twice(namespace):
+    namespace.add(['a', 'b'], random_vectors(2))
+    namespace.add(['b', 'c'], random_vectors(2, seed=1))
+
+    stats = namespace.get_stats()
+    assert stats['entries'] == 3
+    assert stats['writes'] == 3
+    assert stats['disk_bytes'] == 3 * DIM * 2
+
+def test_dimension_mismatch_is_rejected(namespace):
+    namespace.add(['a'], random_vectors(1))
+
+    with pytest.raises(ValueError):
+        namespace.add(['b'], np.zeros((1, DIM + 1), dtype=np.float32))
+
+def test_other_store_reads_entries_from_disk(tmp_path, namespace):
+    vectors = random_vectors(2)
+    namespace.add(['a', 'b'], vectors)
+
+    # Autre worker : nouvelle instance sur le même répertoire
+    other = EmbeddingStore(str(tmp_path), enabled=True).namespace('test/model', max_length=128)
+
+    np.testing.assert_allclose(other.lookup(['b'])['b'], vectors[1], atol=1e-2)
+
+def test_compact_keeps_only_requested_hashes(tmp_path, store, namespace):
+    vectors = random_vectors(4)
+    namespace.add(['a', 'b', 'c', 'd'], vectors)
+
+    results = store.compact('test/model', keep_hashes=['b', 'd'])
+
+    assert results == [{'model_id': 'test/model', 'entries': 2, 'removed_rows': 2}]
+    assert namespace.get_stats()['generation'] == 1
+    found = namespace.lookup(['a', 'b', 'c', 'd'])
+    assert set(found) == {'b', 'd'}
+    np.testing.assert_allclose(found['d'], vectors[3], atol=1e-2)
+    # Fichiers de l'ancienne génération supprimés
+    assert sorted(path.name for path in tmp_path.rglob('*.f16')) == ['vectors.1.f16']
+
+def test_compact_then_add_appends_to_new_generation(store, namespace):
+    namespace.add(['a', 'b'], random_vectors(2))
+    store.compact('test/model', keep_hashes=['a'])
+
+    vectors = random_vectors(1, seed=5)
+    namespace.add(['e'], vectors)
+
+    assert set(namespace.lookup(['a', 'b', 'e'])) == {'a', 'e'}
+    np.testing.assert_allclose(namespace.lookup(['e'])['e'], vectors[0], atol=1e-2)
+
+def test_encode_only_runs_encoder_on_unknown_texts(monkeypatch, store):
+    encoder = FakeEncoder()
+    monkeypatch.setattr(embedding_store_module, 'get_text_encoder', lambda model_id=None: encoder)
+
+    first = store.encode(['alerte', 'convoi', 'alerte'], model_id='test/model')
+    second = store.encode(['convoi', 'patrouille'], model_id='test/model',
+                          hashes=[content_hash('convoi'), None])
+
+    assert encoder.encoded == ['alerte', 'convoi', 'patrouille']
+    assert first.shape == (3, DIM)
+    np.testing.assert_array_equal(first[0], first[2])
+    np.testing.assert_allclose(second[0], first[1], atol=1e-2)
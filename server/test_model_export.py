@@ -0,0 +1,79 @@
+"""
+Tests de parité des modèles exportés (TorchScript et ONNX)
+Les trois modèles du moteur deep learning sont sauvegardés dans un répertoire
+temporaire (save_models écrit .pth, .pt et .onnx) ; chaque runtime rechargé
+doit reproduire les sorties du mode eager, à tolérance fixée, sur des lots de
+tailles et de longueurs variées (masque de padding compris)
+
+Usage: python -m pytest test_model_export.py
+"""
+
+import pytest
+
+# Ignoré si torch n'est pas installé
+torch = pytest.importorskip("torch")
+
+from models.deep_learning_models import DeepLearningThreatEngine
+from models.model_export import ONNXRUNTIME_AVAILABLE
+
+ATOL = 1e-4
+RTOL = 1e-3
+
+RUNTIMES = [
+    'torchscript',
+    pytest.param('onnx', marks=pytest.mark.skipif(not ONNXRUNTIME_AVAILABLE, reason="onnxruntime non installé")),
+]
+
+def attention_inputs(lengths, dim=768, seed=0):
+    """Séquences d'embeddings paddées (steps, batch, dim) et masque (batch, steps)"""
+    generator = torch.Generator().manual_seed(seed)
+    steps = max(lengths)
+    embeddings = torch.zeros(steps, len(lengths), dim)
+    padding_mask = torch.ones(len(lengths), steps, dtype=torch.bool)
+    for i, length in enumerate(lengths):
+        embeddings[:length, i] = torch.randn(length, dim, generator=generator)
+        padding_mask[i, :length] = False
+    return embeddings, padding_mask
+
+def random_inputs(*shape, seed=0):
+    return (torch.rand(*shape, generator=torch.Generator().manual_seed(seed)),)
+
+# Lot unitaire et lots plus grands que ceux du traçage
+PARITY_CASES = [
+    pytest.param('lstm', random_inputs(1, 10, 10), id='lstm-1x10'),
+    pytest.param('lstm', random_inputs(32, 3, 10, seed=1), id='lstm-32x3'),
+    pytest.param('autoencoder', random_inputs(1, 50), id='autoencoder-1'),
+    pytest.param('autoencoder', random_inputs(64, 50, seed=1), id='autoencoder-64'),
+    pytest.param('attention', attention_inputs([1]), id='attention-1'),
+    pytest.param('attention', attention_inputs([6, 6, 6, 6], seed=1), id='attention-4x6'),
+    pytest.param('attention', attention_inputs([12, 1, 5, 7, 12, 3, 9, 2], seed=2), id='attention-padded'),
+]
+
+@pytest.fixture(scope='module')
+def exported(tmp_path_factory):
+    """(répertoire des modèles exportés, moteur eager de référence)"""
+    torch.manual_seed(0)
+    model_path = str(tmp_path_factory.mktemp('deep_learning'))
+    engine = DeepLearningThreatEngine(model_path, runtime='eager')
+    engine.save_models()
+    return model_path, engine
+
+@pytest.fixture(scope='module', params=RUNTIMES)
+def runtime_engine(request, exported):
+    model_path, _ = exported
+    return DeepLearningThreatEngine(model_path, runtime=request.param)
+
+@pytest.mark.parametrize('model', ['lstm', 'autoencoder', 'attention'])
+def test_exported_graph_is_loaded(runtime_engine, model):
+    # Un graphe absent ferait retomber le runtime sur le module eager
+    assert runtime_engine.runners[model] is not runtime_engine._eager_modules()[model]
+
+@pytest.mark.parametrize('model, inputs', PARITY_CASES)
+def test_exported_model_matches_eager(exported, runtime_engine, model, inputs):
+    _, eager_engine = exported
+    with torch.inference_mode():
+        expected = eager_engine.runners[model](*inputs)
+        output = runtime_engine.runners[model](*inputs)
+
+    assert output.shape == expected.shape
+    torch.testing.assert_close(output, expected, atol=ATOL, rtol=RTOL)
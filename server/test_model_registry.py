@@ -0,0 +1,91 @@
+"""
+Tests du registre des modèles partagés (chargement unique, préchauffage, métriques)
+
+Usage: python -m pytest test_model_registry.py
+"""
+
+import threading
+import time
+
+import pytest
+
+from models.model_registry import ModelRegistry
+
+class CountingLoader:
+    """Chargeur qui compte ses appels et renvoie un objet distinct à chaque fois"""
+
+    def __init__(self, delay=0.0):
+        self.calls = 0
+        self.delay = delay
+
+    def __call__(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        return object()
+
+def test_loader_runs_only_on_first_get():
+    registry = ModelRegistry()
+    loader = CountingLoader()
+    registry.register('encoder', loader)
+
+    assert loader.calls == 0
+    assert not registry.is_loaded('encoder')
+
+    model = registry.get('encoder')
+
+    assert registry.get('encoder') is model
+    assert loader.calls == 1
+    assert registry.is_loaded('encoder')
+
+def test_concurrent_gets_share_one_load():
+    registry = ModelRegistry()
+    loader = CountingLoader(delay=0.05)
+    registry.register('encoder', loader)
+    results = []
+
+    threads = [threading.Thread(target=lambda: results.append(registry.get('encoder'))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert loader.calls == 1
+    assert len(results) == 8
+    assert all(model is results[0] for model in results)
+
+def test_unregistered_model_raises_key_error():
+    with pytest.raises(KeyError):
+        ModelRegistry().get('absent')
+
+def test_warm_up_reports_failures_and_retries_later():
+    registry = ModelRegistry()
+    attempts = []
+
+    def flaky_loader():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise OSError("modèle introuvable")
+        return object()
+
+    registry.register('ok', CountingLoader())
+    registry.register('flaky', flaky_loader)
+
+    assert registry.warm_up() == {'ok': True, 'flaky': False}
+    assert not registry.is_loaded('flaky')
+    # Un échec n'est pas mémorisé : le prochain get recharge
+    assert registry.get('flaky') is not None
+    assert len(attempts) == 2
+
+def test_stats_list_registered_models_with_load_metrics():
+    registry = ModelRegistry()
+    registry.register('loaded', CountingLoader())
+    registry.register('lazy', CountingLoader())
+    registry.get('loaded')
+
+    stats = registry.get_stats()
+
+    assert stats['lazy'] == {'loaded': False}
+    assert stats['loaded']['loaded'] is True
+    assert stats['loaded']['load_time'] >= 0
+    assert stats['loaded']['parameter_bytes'] is None
+    assert stats['loaded']['rss_after_bytes'] > 0
@@ -0,0 +1,107 @@
+"""
+Tests d'OptimizedDatabase sur une base PostgreSQL réelle (DATABASE_URL)
+Ignorés si aucune base n'est joignable
+
+Usage: DATABASE_URL=postgresql://localhost/test_db python -m pytest test_optimized_database.py
+"""
+
+import os
+import uuid
+
+import pytest
+
+psycopg2 = pytest.importorskip("psycopg2")
+
+from optimized_database import OptimizedDatabase
+
+@pytest.fixture
+def database():
+    if not os.environ.get('DATABASE_URL'):
+        pytest.skip("DATABASE_URL non définie")
+    db = OptimizedDatabase(min_connections=1, max_connections=2)
+    # Premier emprunt : crée aussi le schéma (tables de base et migrations)
+    conn = db.get_connection()
+    if conn is None:
+        pytest.skip("Base PostgreSQL injoignable")
+    db.return_connection(conn)
+    yield db
+    if db.connection_pool:
+        db.connection_pool.closeall()
+
+@pytest.fixture
+def scratch_table(database):
+    """Table jetable, supprimée en fin de test"""
+    table = f"returning_check_{uuid.uuid4().hex[:8]}"
+    database.execute_query(f"CREATE TABLE {table} (id SERIAL PRIMARY KEY, name TEXT UNIQUE, score REAL)")
+    yield table
+    database.execute_query(f"DROP TABLE IF EXISTS {table}")
+
+def read_fresh(query, params=None):
+    """Lecture sur une connexion neuve, hors du pool (voit seulement les données validées)"""
+    with psycopg2.connect(os.environ['DATABASE_URL']) as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(query, params)
+            return cursor.fetchall()
+
+def test_insert_returning_fetch_one_is_committed(database, scratch_table):
+    row = database.execute_query(
+        f"INSERT INTO {scratch_table} (name, score) VALUES (%s, %s) RETURNING id",
+        ('menace', 0.7), fetch_one=True
+    )
+    assert row is not None
+
+    assert read_fresh(f"SELECT id, name FROM {scratch_table} WHERE id = %s", (row['id'],)) == [(row['id'], 'menace')]
+
+def test_upsert_returning_fetch_all_is_committed(database, scratch_table):
+    rows = database.execute_query(
+        f"""INSERT INTO {scratch_table} (name, score) VALUES ('a', 0.1), ('b', 0.2)
+            ON CONFLICT (name) DO UPDATE SET score = EXCLUDED.score RETURNING id, name""",
+        fetch_all=True
+    )
+    assert sorted(row['name'] for row in rows) == ['a', 'b']
+
+    assert read_fresh(f"SELECT name FROM {scratch_table} ORDER BY name") == [('a',), ('b',)]
+
+def test_cursor_round_trips_null_created_at():
+    cursor = OptimizedDatabase.encode_cursor(None, 42)
+
+    assert OptimizedDatabase.decode_cursor(cursor) == (None, 42)
+
+def test_keyset_pages_cover_rows_without_created_at(database, scratch_table):
+    database.execute_query(f"ALTER TABLE {scratch_table} ADD COLUMN created_at TIMESTAMP")
+    database.execute_query(
+        f"""INSERT INTO {scratch_table} (name, created_at) VALUES
+            ('a', NULL), ('b', NULL), ('c', NOW()), ('d', NOW() - INTERVAL '1 day'), ('e', NULL)"""
+    )
+
+    seen, cursor = [], None
+    while True:
+        condition, params = database.keyset_condition(cursor) if cursor else ("TRUE", [])
+        rows = database.execute_query(
+            f"SELECT id, created_at FROM {scratch_table} WHERE {condition} "
+            f"ORDER BY created_at DESC, id DESC LIMIT 2", tuple(params), fetch_all=True
+        )
+        if not rows:
+            break
+        seen.extend(row['id'] for row in rows)
+        cursor = database.encode_cursor(rows[-1]['created_at'], rows[-1]['id'])
+
+    assert sorted(seen) == [row[0] for row in read_fresh(f"SELECT id FROM {scratch_table} ORDER BY id")]
+
+def test_bulk_store_inserts_rows_with_their_ids(database):
+    tag = uuid.uuid4().hex[:8]
+    explicit_id = 1_500_000_000 + int(tag, 16) % 100_000_000
+    documents = [{'name': f"bulk-{tag}-{i}", 'content': f"contenu {i}", 'threat_score': 0.1 * i} for i in range(5)]
+    documents.append({'id': explicit_id, 'name': f"bulk-{tag}-explicite", 'content': "id fourni", 'threat_score': 0.9})
+
+    try:
+        summary = database.store_documents_bulk(documents, batch_size=4)
+
+        assert summary['failed'] == 0, summary['errors']
+        assert summary['stored'] == 6
+        assert explicit_id in summary['ids']
+        stored = dict(read_fresh("SELECT id, name FROM threats WHERE id = ANY(%s)", (summary['ids'],)))
+        assert sorted(stored.values()) == sorted(document['name'] for document in documents)
+        assert stored[explicit_id] == f"bulk-{tag}-explicite"
+    finally:
+        database.execute_query("DELETE FROM threats WHERE name LIKE %s", (f"bulk-{tag}-%",))
@@ -0,0 +1,73 @@
+"""
+Tests des requêtes préparées : reprise quand la session et le registre divergent
+Les tests de reprise utilisent une base PostgreSQL réelle (DATABASE_URL) et
+sont ignorés si aucune base n'est joignable
+
+Usage: DATABASE_URL=postgresql://localhost/test_db python -m pytest test_prepared_statements.py
+"""
+
+import os
+from types import SimpleNamespace
+
+import pytest
+
+psycopg2 = pytest.importorskip("psycopg2")
+
+import prepared_statements
+from prepared_statements import PreparedStatementConnection, execute_prepared
+
+@pytest.fixture
+def echo_query(monkeypatch):
+    """Requête de test ajoutée au registre, sans dépendance au schéma"""
+    monkeypatch.setitem(prepared_statements.PREPARED_QUERIES, 'echo_value', "SELECT $1::int AS value")
+    return 'echo_value'
+
+@pytest.fixture
+def connection():
+    if not os.environ.get('DATABASE_URL'):
+        pytest.skip("DATABASE_URL non définie")
+    try:
+        conn = psycopg2.connect(os.environ['DATABASE_URL'], connection_factory=PreparedStatementConnection)
+    except psycopg2.OperationalError:
+        pytest.skip("Base PostgreSQL injoignable")
+    yield conn
+    conn.close()
+
+def run(conn, name, value):
+    with conn.cursor() as cursor:
+        execute_prepared(cursor, name, (value,))
+        return cursor.fetchone()[0]
+
+def test_unknown_query_is_rejected():
+    with pytest.raises(KeyError):
+        execute_prepared(None, 'absent_query')
+
+def test_plain_connection_is_rejected(echo_query):
+    cursor = SimpleNamespace(connection=SimpleNamespace())
+
+    with pytest.raises(TypeError):
+        execute_prepared(cursor, echo_query, (1,))
+
+def test_statement_is_prepared_once_per_session(connection, echo_query):
+    assert run(connection, echo_query, 1) == 1
+    assert run(connection, echo_query, 2) == 2
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT count(*) FROM pg_prepared_statements WHERE name = %s", (echo_query,))
+        assert cursor.fetchone()[0] == 1
+
+def test_statement_lost_by_the_session_is_prepared_again(connection, echo_query):
+    run(connection, echo_query, 1)
+    with connection.cursor() as cursor:
+        # Ex. DISCARD ALL d'un pooler : la session oublie ses requêtes préparées
+        cursor.execute("DEALLOCATE ALL")
+
+    assert run(connection, echo_query, 3) == 3
+
+def test_statement_prepared_behind_the_registry_is_reused(connection, echo_query):
+    run(connection, echo_query, 1)
+    # Le registre local l'oublie alors que la session la connaît encore
+    connection.prepared_statements.clear()
+
+    assert run(connection, echo_query, 4) == 4
+    assert echo_query in connection.prepared_statements
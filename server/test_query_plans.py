@@ -0,0 +1,149 @@
+"""
+Tests de non-régression des plans de requête
+Crée un schéma jetable sur une base PostgreSQL locale (DATABASE_URL), y
+construit le schéma réel (SCHEMA_TABLES d'init_tables puis SCHEMA_MIGRATIONS),
+génère des données, puis vérifie avec EXPLAIN que les requêtes de l'évaluation
+des menaces utilisent bien leurs index et que les compteurs de threat_stats
+restent exacts. Ignorés si aucune base n'est joignable
+
+Usage: DATABASE_URL=postgresql://localhost/test_db python -m pytest test_query_plans.py
+"""
+
+import json
+import os
+
+import pytest
+
+psycopg2 = pytest.importorskip("psycopg2")
+
+from prepared_statements import PREPARED_QUERIES
+from schema_migrations import SCHEMA_MIGRATIONS, SCHEMA_TABLES
+
+SCHEMA = 'query_plan_check'
+
+# Données générées après les migrations : threat_stats est tenue à jour par ses triggers
+SEED_SQL = """
+    INSERT INTO threats (name, score, severity, metadata)
+    SELECT 'Menace ' || i, random(), 'medium',
+           jsonb_build_object('document_id', i::text, 'source', 'source_' || (i %% 50))
+    FROM generate_series(1, %(rows)s) AS i;
+
+    INSERT INTO predictions (pattern, confidence, frequency, type, cluster_size)
+    SELECT 'pattern_' || i, random(), i %% 10, 'trend', i %% 20
+    FROM generate_series(1, %(rows)s) AS i;
+
+    INSERT INTO prescriptions (threat_id, priority, category, confidence, actions, status)
+    SELECT i::text, 'medium', 'category_' || i, random(), '[]'::jsonb, 'pending'
+    FROM generate_series(1, %(rows)s) AS i;
+"""
+
+# (requête préparée ou SQL, paramètres, index attendu)
+PLAN_CHECKS = [
+    pytest.param('threats_by_document_ids', (['42', '4242'],), 'idx_threats_document_id',
+                 id='threats-by-document'),
+    pytest.param('prediction_by_pattern', ('pattern_42',), 'idx_predictions_pattern',
+                 id='prediction-by-pattern'),
+    pytest.param('prescription_by_category', ('category_42',), 'idx_prescriptions_category',
+                 id='prescription-by-category'),
+    pytest.param("SELECT id FROM threats WHERE metadata @> %s::jsonb", (json.dumps({'source': 'source_7'}),),
+                 'idx_threats_metadata_gin', id='threats-by-metadata'),
+]
+
+# Écritures rejouées avant de comparer threat_stats à un recalcul complet
+STATS_WRITES = [
+    "UPDATE threats SET status = 'resolved', score = score / 2 WHERE id % 7 = 0",
+    "UPDATE threats SET severity = 'critical' WHERE id % 11 = 0",
+    "DELETE FROM threats WHERE id % 13 = 0",
+    """INSERT INTO threats (id, name, score, severity, metadata)
+       SELECT i, 'Menace ' || i, 0.9, 'high', '{}'::jsonb FROM generate_series(1, 50) AS i
+       ON CONFLICT (id) DO UPDATE SET score = EXCLUDED.score, severity = EXCLUDED.severity""",
+]
+
+DASHBOARD_RECOMPUTE = """
+    SELECT
+        COUNT(*) as total_threats,
+        COUNT(CASE WHEN status = 'active' THEN 1 END) as active_threats,
+        AVG(score::numeric) as avg_score,
+        COUNT(CASE WHEN severity = 'high' THEN 1 END) as high_severity,
+        COUNT(CASE WHEN severity = 'critical' THEN 1 END) as critical_severity
+    FROM threats
+"""
+
+@pytest.fixture(scope='module')
+def plan_connection():
+    """Schéma réel et données générées, dans une transaction annulée en fin de module"""
+    db_url = os.environ.get('DATABASE_URL')
+    if not db_url:
+        pytest.skip("DATABASE_URL non définie")
+    try:
+        conn = psycopg2.connect(db_url)
+    except psycopg2.OperationalError:
+        pytest.skip("Base PostgreSQL injoignable")
+
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"CREATE SCHEMA {SCHEMA}")
+        cursor.execute(f"SET search_path TO {SCHEMA}")
+        for query in SCHEMA_TABLES:
+            cursor.execute(query)
+        for _, _, sql in SCHEMA_MIGRATIONS:
+            cursor.execute(sql)
+        cursor.execute(SEED_SQL, {'rows': int(os.environ.get('QUERY_PLAN_ROWS', '20000'))})
+        cursor.execute("ANALYZE")
+        cursor.close()
+        yield conn
+    finally:
+        # La base reste intacte
+        conn.rollback()
+        conn.close()
+
+@pytest.fixture
+def cursor(plan_connection):
+    """Curseur dont les écritures sont annulées à la fin du test"""
+    cursor = plan_connection.cursor()
+    cursor.execute("SAVEPOINT plan_test")
+    yield cursor
+    cursor.execute("ROLLBACK TO SAVEPOINT plan_test")
+    cursor.close()
+
+def index_names(plan):
+    """Index utilisés par un plan EXPLAIN (FORMAT JSON), tous nœuds confondus"""
+    names = set()
+    if plan.get('Index Name'):
+        names.add(plan['Index Name'])
+    for child in plan.get('Plans', []):
+        names |= index_names(child)
+    return names
+
+def explain(cursor, query, params):
+    """Plan d'une requête du registre PREPARED_QUERIES (via PREPARE) ou d'un SQL brut"""
+    if query in PREPARED_QUERIES:
+        cursor.execute(f"PREPARE plan_check AS {PREPARED_QUERIES[query]}")
+        try:
+            placeholders = ', '.join(['%s'] * len(params))
+            cursor.execute(f"EXPLAIN (FORMAT JSON) EXECUTE plan_check ({placeholders})", params)
+            result = cursor.fetchone()[0]
+        finally:
+            cursor.execute("DEALLOCATE plan_check")
+    else:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {query}", params)
+        result = cursor.fetchone()[0]
+    if isinstance(result, str):
+        result = json.loads(result)
+    return result[0]['Plan']
+
+@pytest.mark.parametrize('query, params, expected_index', PLAN_CHECKS)
+def test_query_uses_its_index(cursor, query, params, expected_index):
+    assert expected_index in index_names(explain(cursor, query, params))
+
+def test_threat_stats_match_full_recompute(cursor):
+    # Les compteurs tenus par triggers doivent égaler un recalcul complet de threats
+    for query in STATS_WRITES:
+        cursor.execute(query)
+
+    cursor.execute(PREPARED_QUERIES['dashboard_stats'])
+    maintained = cursor.fetchone()
+    cursor.execute(DASHBOARD_RECOMPUTE)
+    expected = cursor.fetchone()
+
+    assert [float(value) for value in maintained] == pytest.approx([float(value) for value in expected])
@@ -0,0 +1,59 @@
+"""
+Tests du stockage des matrices de similarité (artefacts dense et COO)
+
+Usage: python -m pytest test_similarity_artifact_store.py
+"""
+
+import numpy as np
+import pytest
+from scipy import sparse
+
+from services.similarity_artifact_store import SimilarityArtifactStore
+
+SIMILARITY = np.array([
+    [0.0, 0.9, 0.2, 0.5],
+    [0.9, 0.0, 0.4, 0.1],
+    [0.2, 0.4, 0.0, 0.8],
+    [0.5, 0.1, 0.8, 0.0],
+], dtype=np.float32)
+DOCUMENT_IDS = ['a', 'b', 'c', 'd']
+
+@pytest.fixture
+def store(tmp_path):
+    return SimilarityArtifactStore(str(tmp_path))
+
+def neighbours(page):
+    return [[(n['document_id'], n['similarity']) for n in row['neighbours']] for row in page['rows']]
+
+def test_dense_rows_are_paginated_top_k(store):
+    artifact = store.save(SIMILARITY, DOCUMENT_IDS)
+    assert artifact['format'] == 'dense'
+
+    page = store.get_rows(artifact['id'], offset=1, limit=2, top_k=2)
+
+    assert [row['document_id'] for row in page['rows']] == ['b', 'c']
+    assert page['next_offset'] == 3
+    assert neighbours(page) == [[('a', 0.8999), ('c', 0.3999)], [('d', 0.7998), ('b', 0.3999)]]
+
+def test_coo_rows_keep_only_entries_above_threshold(store):
+    artifact = store.save(sparse.csr_matrix(SIMILARITY), DOCUMENT_IDS)
+    assert artifact['format'] == 'coo'
+    assert artifact['nnz'] == 8
+
+    page = store.get_rows(artifact['id'], offset=2, limit=10, top_k=3)
+
+    assert page['next_offset'] is None
+    assert neighbours(page) == [[('d', 0.7998), ('b', 0.3999)], [('c', 0.7998), ('a', 0.5)]]
+
+def test_large_dense_matrix_is_exported_as_coo(store):
+    store.dense_limit = 2
+    artifact = store.save(SIMILARITY, DOCUMENT_IDS)
+
+    assert artifact['format'] == 'coo'
+    assert artifact['threshold'] == store.sparse_threshold
+    page = store.get_rows(artifact['id'], limit=1, top_k=5)
+    assert neighbours(page) == [[('b', 0.8999), ('d', 0.5)]]
+
+def test_unknown_or_invalid_artifact_returns_none(store):
+    assert store.get_rows('0' * 32) is None
+    assert store.get_rows('../../etc/passwd') is None
@@ -0,0 +1,90 @@
+"""
+Tests de TextEncoder : padding dynamique par micro-lots et mean pooling masqué
+Un tokenizer et un modèle minimaux (torch seul) remplacent le modèle
+transformers ; les positions de padding produisent des états non nuls, si
+bien qu'un pooling qui les compterait s'écarterait de la passe sans padding
+
+Usage: python -m pytest test_text_encoder.py
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+# Ignoré si torch n'est pas installé
+torch = pytest.importorskip("torch")
+
+from models.model_registry import TextEncoder
+
+HIDDEN_SIZE = 16
+PAD_ID = 0
+
+class WordTokenizer:
+    """Un identifiant par mot ; pad() complète à la plus longue séquence du lot"""
+
+    def __init__(self):
+        self.vocabulary = {}
+
+    def __call__(self, texts, max_length=None, truncation=False, padding=False):
+        input_ids = []
+        for text in texts:
+            ids = [self.vocabulary.setdefault(word, len(self.vocabulary) + 1) for word in text.split()]
+            input_ids.append(ids[:max_length] if truncation and max_length else ids)
+        return {'input_ids': input_ids, 'attention_mask': [[1] * len(ids) for ids in input_ids]}
+
+    def pad(self, features, padding='longest', return_tensors='pt'):
+        longest = max(len(feature['input_ids']) for feature in features)
+        return {
+            key: torch.tensor([feature[key] + [PAD_ID] * (longest - len(feature[key])) for feature in features])
+            for key in ('input_ids', 'attention_mask')
+        }
+
+class PositionalModel(torch.nn.Module):
+    """Embedding + position : l'état d'un token ne dépend pas du padding qui le suit"""
+
+    def __init__(self):
+        super().__init__()
+        self.config = SimpleNamespace(hidden_size=HIDDEN_SIZE)
+        generator = torch.Generator().manual_seed(0)
+        self.embeddings = torch.nn.Parameter(torch.randn(256, HIDDEN_SIZE, generator=generator))
+        self.positions = torch.nn.Parameter(torch.randn(64, HIDDEN_SIZE, generator=generator))
+
+    def forward(self, input_ids, attention_mask):
+        hidden = self.embeddings[input_ids] + self.positions[:input_ids.shape[1]]
+        return SimpleNamespace(last_hidden_state=hidden)
+
+TEXTS = [
+    "alerte",
+    "intrusion réseau détectée sur le serveur principal de la base",
+    "convoi signalé",
+    "exfiltration de données chiffrées vers un serveur externe",
+    "patrouille",
+    "communication anormale",
+]
+
+@pytest.fixture
+def encoder():
+    return TextEncoder('test-encoder', WordTokenizer(), PositionalModel().eval(), source='test')
+
+def test_padded_batches_match_unpadded_passes(encoder):
+    batched = encoder.encode(TEXTS, batch_size=4, max_length=32)
+    # Lot de 1 : aucune position de padding
+    single = torch.stack([encoder.encode([text], batch_size=1, max_length=32)[0] for text in TEXTS])
+
+    assert batched.shape == (len(TEXTS), HIDDEN_SIZE)
+    torch.testing.assert_close(batched, single, atol=1e-5, rtol=1e-5)
+
+def test_embeddings_follow_input_order(encoder):
+    forward = encoder.encode(TEXTS, batch_size=3, max_length=32)
+    backward = encoder.encode(TEXTS[::-1], batch_size=3, max_length=32)
+
+    torch.testing.assert_close(forward, backward.flip(0))
+
+def test_truncation_limits_sequence_length(encoder):
+    long_text = ' '.join(f"mot{i}" for i in range(40))
+    truncated = ' '.join(f"mot{i}" for i in range(8))
+
+    torch.testing.assert_close(encoder.encode([long_text], max_length=8), encoder.encode([truncated], max_length=8))
+
+def test_empty_input_returns_empty_matrix(encoder):
+    assert encoder.encode([]).shape == (0, HIDDEN_SIZE)